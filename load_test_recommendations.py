@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Load test cho Recommendation API Server
+
+Mỗi client là 1 process giữ 1 kết nối keep-alive và gửi request liên tục
+(closed loop). Giỏ hàng được lấy mẫu từ antecedent của các luật (để có
+kết quả) trộn với sản phẩm ngẫu nhiên.
+
+    python load_test_recommendations.py --spawn --clients 4 --duration 10
+    python load_test_recommendations.py --url http://127.0.0.1:8001 --clients 8
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing as mp
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).parent
+RULES_FILE = ROOT / "output" / "recommendation_rules.json"
+
+
+def sample_carts(rules_file, count, seed=0):
+    with open(rules_file, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    rng = random.Random(seed)
+    products = sorted({name for rule in rules for name in rule["input"]} | {rule["suggest"] for rule in rules})
+    carts = []
+    for _ in range(count):
+        cart = list(rng.choice(rules)["input"]) if rules else []
+        cart += rng.sample(products, min(len(products), rng.randint(0, 4)))
+        carts.append(cart)
+    return carts
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {host}:{port} did not become ready")
+
+
+def run_client(args):
+    host, port, carts, limit, duration, seed = args
+    rng = random.Random(seed)
+    bodies = [json.dumps({"cart": cart, "limit": limit}).encode("utf-8") for cart in carts]
+    headers = {"Content-Type": "application/json"}
+    latencies = []
+    errors = 0
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        body = bodies[rng.randrange(len(bodies))]
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/api/recommend", body, headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    k = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test Recommendation API")
+    parser.add_argument("--url", default="http://127.0.0.1:8001")
+    parser.add_argument("--spawn", action="store_true", help="Tự chạy 1 server local trên cổng trống")
+    parser.add_argument("--rules", default=str(RULES_FILE))
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--limit", type=int, default=6)
+    parser.add_argument("--carts", type=int, default=1000)
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        host, port = "127.0.0.1", free_port()
+        server = subprocess.Popen([
+            sys.executable, str(ROOT / "recommendation_server.py"),
+            "--host", host, "--port", str(port), "--rules", args.rules,
+        ], stdout=subprocess.DEVNULL)
+    else:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+
+    try:
+        wait_until_ready(host, port)
+        carts = sample_carts(args.rules, args.carts)
+        print(f"Load test: {args.clients} clients x {args.duration:.0f}s -> http://{host}:{port}/api/recommend")
+        tasks = [(host, port, carts, args.limit, args.duration, seed) for seed in range(args.clients)]
+        with mp.Pool(args.clients) as pool:
+            results = pool.map(run_client, tasks)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = sorted(lat for lats, _ in results for lat in lats)
+    errors = sum(err for _, err in results)
+    ms = [lat * 1000 for lat in latencies]
+    print(f"  Requests:   {len(latencies):,} ok, {errors:,} errors")
+    print(f"  Throughput: {len(latencies) / args.duration:,.0f} req/s")
+    print(f"  Latency ms: p50 {percentile(ms, 50):.2f} | p90 {percentile(ms, 90):.2f} | "
+          f"p99 {percentile(ms, 99):.2f} | max {ms[-1] if ms else float('nan'):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Recommendation API Server
+POST giỏ hàng, nhận về top-N sản phẩm gợi ý (từ recommendation_rules.json)
+
+    POST /api/recommend   {"cart": ["JUMBO BAG RED RETROSPOT", ...], "limit": 6}
+    GET  /api/health
+"""
+
+import argparse
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src" / "processing"))
+from rule_index import ReloadingRuleIndex
+
+# Configuration
+PORT = 8001
+ROOT = Path(__file__).parent
+RULES_FILE = ROOT / "output" / "recommendation_rules.json"
+PRODUCTS_FILE = ROOT / "output" / "products_with_price.csv"
+DEFAULT_LIMIT = 6
+MAX_LIMIT = 100
+MAX_BODY_BYTES = 1 << 20
+
+
+class RecommendationHandler(BaseHTTPRequestHandler):
+    # Keep-alive: client gửi nhiều request trên cùng 1 kết nối
+    protocol_version = "HTTP/1.1"
+    # Header và body được ghi 2 lần; tắt Nagle để không bị delayed ACK giữ lại ~40ms
+    disable_nagle_algorithm = True
+    server_version = "RecommendationServer/1.0"
+
+    def log_message(self, format, *args):
+        # Log từng request làm chậm đáng kể ở vài nghìn request/giây
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        # CORS preflight (web demo chạy trên cổng khác)
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "POST, GET, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path != "/api/health":
+            self.send_json(404, {"error": "not found"})
+            return
+        index = self.server.rules.current()
+        self.send_json(200, {"status": "ok", "rules": index.num_rules})
+
+    def do_POST(self):
+        if self.path != "/api/recommend":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self.send_json(400, {"error": "missing or oversized body"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            cart = request["cart"]
+            limit = min(int(request.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+            if not isinstance(cart, list):
+                raise TypeError("cart must be a list")
+            if limit < 1:
+                raise ValueError("limit must be at least 1")
+        except (ValueError, KeyError, TypeError, OverflowError) as e:
+            self.send_json(400, {"error": f"invalid request: {e}"})
+            return
+
+        start = time.perf_counter()
+        suggestions = self.server.rules.current().recommend(cart, limit)
+        self.send_json(200, {
+            "suggestions": suggestions,
+            "took_ms": round((time.perf_counter() - start) * 1000, 3),
+        })
+
+
+class RecommendationServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, rules, verbose=False):
+        super().__init__(address, RecommendationHandler)
+        self.rules = rules
+        self.verbose = verbose
+
+
+def create_server(host="127.0.0.1", port=PORT, rules_file=RULES_FILE, products_file=PRODUCTS_FILE,
+                  reload_interval=1.0, verbose=False):
+    rules = ReloadingRuleIndex(str(rules_file), str(products_file), check_interval=reload_interval)
+    return RecommendationServer((host, port), rules, verbose=verbose)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommendation API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--rules", default=str(RULES_FILE))
+    parser.add_argument("--products", default=str(PRODUCTS_FILE))
+    parser.add_argument("--reload-interval", type=float, default=1.0,
+                        help="Số giây giữa 2 lần kiểm tra file luật mới")
+    parser.add_argument("--verbose", action="store_true", help="Log từng request")
+    args = parser.parse_args()
+
+    httpd = create_server(args.host, args.port, args.rules, args.products,
+                          args.reload_interval, args.verbose)
+    index = httpd.rules.current()
+    print("=" * 60)
+    print("🛍️  Recommendation API Server")
+    print("=" * 60)
+    print(f"📂 Rules: {args.rules} ({index.num_rules:,} rules, hot reload)")
+    print(f"🌐 POST http://{args.host}:{args.port}/api/recommend")
+    print("=" * 60)
+    print("Press Ctrl+C to stop the server")
+    print("=" * 60)
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\n✅ Server stopped. Goodbye!")
+    finally:
+        httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from .synthetic_data import SyntheticRetail, generate_online_retail, write_synthetic_dataset
+
+__all__ = ['SyntheticRetail', 'generate_online_retail', 'write_synthetic_dataset']
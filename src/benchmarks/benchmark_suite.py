@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark các stage của pipeline trên dataset tổng hợp nhiều kích thước
+
+    python src/benchmarks/benchmark_suite.py --sizes 10k 100k 1m
+    python src/benchmarks/benchmark_suite.py --sizes 10k 100k --save-baseline
+
+Mỗi stage chạy trong 1 process riêng (đo thời gian và peak RSS độc lập),
+đọc output của stage trước từ thư mục làm việc. Kết quả ghi ra JSON và so
+với baseline; stage nào chậm hơn / tốn bộ nhớ hơn quá ngưỡng thì bị đánh dấu
+regression (exit code 1).
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "processing"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import write_synthetic_dataset
+
+try:
+    import resource
+except ImportError:  # Windows: đo bằng tracemalloc
+    resource = None
+
+RESULTS_VERSION = 1
+SYNTHETIC_DIR = os.path.join(ROOT, "data", "synthetic")
+WORK_DIR = os.path.join(ROOT, "data", "benchmarks")
+BENCHMARK_DIR = os.path.join(ROOT, "output", "benchmarks")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+STAGES = ["process_data", "clean_and_filter_data", "parse_spmf_file", "read_spmf_store",
+          "find_high_utility_itemsets_optimized", "generate_rules"]
+
+# Ngưỡng regression: tương đối + tuyệt đối (tránh báo nhiễu ở stage rất nhanh)
+TIME_TOLERANCE = 0.20
+MIN_TIME_DELTA = 0.05
+MEMORY_TOLERANCE = 0.20
+MIN_MEMORY_DELTA_MB = 20.0
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(text):
+    """'10k' -> 10000, '50M' -> 50000000"""
+    text = str(text).strip().lower().replace("_", "")
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def stage_paths(work_dir):
+    return {
+        "mapped_csv": os.path.join(work_dir, "mapped_data.csv"),
+        "mapping_json": os.path.join(work_dir, "item_mapping.json"),
+        "spmf": os.path.join(work_dir, "clean_transactions_spmf.txt"),
+        "store_dir": os.path.join(work_dir, "transaction_store"),
+        "product_table": os.path.join(work_dir, "product_table.csv"),
+        "patterns": os.path.join(work_dir, "high_utility_itemsets.txt"),
+        "rules": os.path.join(work_dir, "recommendation_rules.json"),
+        "products_with_price": os.path.join(work_dir, "products_with_price.csv"),
+        "rule_artifacts": os.path.join(work_dir, "rule_artifacts"),
+    }
+
+
+def run_stage(name, raw_file, work_dir, config):
+    """
+    Chạy 1 stage (trong process con), đọc/ghi file trong work_dir
+
+    Returns:
+        Dict thông tin thêm của stage (số dòng, số transaction, ...)
+    """
+    paths = stage_paths(work_dir)
+    if name == "process_data":
+        from data_ingestion import process_data
+        df = process_data(raw_file, paths["mapped_csv"], paths["mapping_json"], use_cache=False)
+        return {"rows": len(df)}
+    if name == "clean_and_filter_data":
+        from data_cleaning import clean_and_filter_data
+        stats = clean_and_filter_data(paths["mapped_csv"], paths["mapping_json"], paths["spmf"],
+                                      paths["store_dir"], paths["product_table"], return_df=False)
+        return {"rows": stats["rows_out"], "transactions": stats["transactions"]}
+    if name == "parse_spmf_file":
+        from mining_implementation import parse_spmf_file
+        return {"transactions": len(parse_spmf_file(paths["spmf"]))}
+    if name == "read_spmf_store":
+        from spmf_reader import read_spmf_store
+        return {"transactions": len(read_spmf_store(paths["spmf"]))}
+    if name == "find_high_utility_itemsets_optimized":
+        from mining_implementation import find_high_utility_itemsets_optimized, load_item_mapping, save_results
+        from transaction_store import load_transaction_store
+        store = load_transaction_store(paths["store_dir"])
+        itemsets = find_high_utility_itemsets_optimized(store, config["min_utility"], max_size=config["max_size"])
+        save_results(itemsets, paths["patterns"], load_item_mapping(paths["mapping_json"]))
+        return {"itemsets": len(itemsets)}
+    if name == "generate_rules":
+        from product_table import load_product_table
+        from result_evaluation import generate_rules
+        generate_rules(paths["patterns"], paths["rules"], paths["products_with_price"],
+                       artifacts_output=paths["rule_artifacts"],
+                       products=load_product_table(paths["product_table"]))
+        with open(paths["rules"], "r", encoding="utf-8") as f:
+            return {"rules": len(json.load(f))}
+    raise ValueError(f"Unknown stage: {name}")
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả KB, macOS trả byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure_stage(name, raw_file, work_dir, config):
+    """Chạy stage trong process hiện tại (process con), đo thời gian + bộ nhớ"""
+    tracing = resource is None
+    if tracing:
+        import tracemalloc
+        tracemalloc.start()
+    else:
+        rss_before = _peak_rss_mb()
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        info = run_stage(name, raw_file, work_dir, config)
+        seconds = time.perf_counter() - start
+
+    if tracing:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+        memory = {"peak_mb": round(peak_mb, 1), "memory_source": "tracemalloc"}
+    else:
+        peak_mb = _peak_rss_mb()
+        memory = {
+            "peak_mb": round(peak_mb, 1),
+            "delta_mb": round(peak_mb - rss_before, 1),
+            "memory_source": "peak_rss",
+        }
+    return {"seconds": round(seconds, 4), **memory, **info}
+
+
+def run_size(rows, seed, config, stages=STAGES):
+    raw_file = os.path.join(SYNTHETIC_DIR, f"online_retail_{rows}_s{seed}.csv")
+    if not os.path.exists(raw_file):
+        write_synthetic_dataset(raw_file, rows, seed=seed)
+    work_dir = os.path.join(WORK_DIR, str(rows))
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = {}
+    for name in stages:
+        # Process mới cho mỗi stage: peak RSS không bị lẫn giữa các stage
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as executor:
+            results[name] = executor.submit(measure_stage, name, raw_file, work_dir, config).result()
+        r = results[name]
+        print(f"  {name:<40} {r['seconds']:>9.3f}s  {r['peak_mb']:>9.1f} MB")
+    return results
+
+
+def environment_info():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare_with_baseline(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    So kết quả với baseline (chỉ các cặp kích thước/stage có trong cả 2)
+
+    Returns:
+        List dict regression {'rows', 'stage', 'metric', 'baseline', 'current', 'ratio'}
+    """
+    regressions = []
+    checks = [
+        ("seconds", time_tolerance, MIN_TIME_DELTA),
+        ("peak_mb", memory_tolerance, MIN_MEMORY_DELTA_MB),
+    ]
+    for rows, stages in results["runs"].items():
+        base_stages = baseline.get("runs", {}).get(rows, {})
+        for stage, current in stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            for metric, tolerance, min_delta in checks:
+                if metric not in base or metric not in current:
+                    continue
+                if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] > min_delta:
+                    regressions.append({
+                        "rows": rows,
+                        "stage": stage,
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "current": current[metric],
+                        "ratio": round(current[metric] / base[metric], 3) if base[metric] else None,
+                    })
+    return regressions
+
+
+def write_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline trên dataset tổng hợp")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "100k"],
+                        help="Số dòng dataset, vd. 10k 100k 1m 10m 50m")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-utility", type=float, default=10000)
+    parser.add_argument("--max-size", type=int, default=2)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Ghi kết quả lần này làm baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    config = {"seed": args.seed, "min_utility": args.min_utility, "max_size": args.max_size}
+    # Stage sau đọc output của stage trước nên luôn chạy theo thứ tự pipeline
+    stages = [name for name in STAGES if name in args.stages]
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "config": config,
+        "runs": {},
+    }
+    for rows in (parse_size(size) for size in args.sizes):
+        print(f"\n>>> {rows:,} rows")
+        results["runs"][str(rows)] = run_size(rows, args.seed, config, stages)
+
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    result_file = os.path.join(BENCHMARK_DIR, f"benchmark-{stamp}.json")
+    write_json(results, result_file)
+    print(f"\n✓ Results: {result_file}")
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"⚠ Baseline config {baseline.get('config')} khác config hiện tại, kết quả so sánh chỉ mang tính tham khảo")
+        regressions = compare_with_baseline(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for r in regressions:
+            print(f"✗ REGRESSION {r['rows']} rows / {r['stage']} / {r['metric']}: "
+                  f"{r['baseline']} -> {r['current']} (x{r['ratio']})")
+        if not regressions:
+            print(f"✓ Không có regression so với {args.baseline}")
+
+    if args.save_baseline:
+        write_json(results, args.baseline)
+        print(f"✓ Saved baseline: {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Schema giống file Online Retail gốc
+RAW_COLUMNS = [
+    "InvoiceNo", "StockCode", "Description", "Quantity",
+    "InvoiceDate", "UnitPrice", "CustomerID", "Country",
+]
+
+# Số dòng sinh + ghi ra file mỗi lần (giới hạn bộ nhớ khi sinh 50M dòng)
+CHUNK_ROWS = 1_000_000
+
+# Các tham số lấy xấp xỉ theo dataset thật (541k dòng, ~4k mã hàng, ~4.4k khách)
+REFERENCE_ROWS = 541_909
+FIRST_INVOICE_NO = 536365
+START_DATE = np.datetime64("2010-12-01T08:00:00", "s")
+DATE_SPAN_DAYS = 373
+CANCEL_RATE = 0.017
+MISSING_CUSTOMER_RATE = 0.25
+ZERO_PRICE_RATE = 0.001
+SPECIAL_CODE_RATE = 0.003
+SPECIAL_CODES = ["POST", "M", "D", "BANK CHARGES"]
+SPECIAL_CODE_WEIGHTS = [0.7, 0.2, 0.07, 0.03]
+PACK_SIZES = np.array([1, 2, 3, 4, 6, 8, 10, 12, 24, 48, 96, 144])
+PACK_WEIGHTS = np.array([30, 14, 6, 6, 10, 3, 4, 14, 7, 3, 2, 1], dtype=np.float64)
+COUNTRIES = [
+    "United Kingdom", "Germany", "France", "EIRE", "Spain", "Netherlands",
+    "Belgium", "Switzerland", "Portugal", "Australia", "Norway", "Italy",
+]
+COUNTRY_WEIGHTS = [0.89, 0.02, 0.02, 0.015, 0.01, 0.01, 0.008, 0.007, 0.006, 0.005, 0.005, 0.004]
+COLORS = ["RED", "BLUE", "PINK", "WHITE", "GREEN", "IVORY", "BLACK", "VINTAGE", "RETROSPOT", "SILVER"]
+NOUNS = [
+    "HEART T-LIGHT HOLDER", "LUNCH BAG", "JUMBO BAG", "CAKE CASES", "TEACUP AND SAUCER",
+    "ALARM CLOCK", "PARTY BUNTING", "NAPKINS", "WATER BOTTLE", "DOORMAT",
+    "CHRISTMAS DECORATION", "GIFT WRAP", "STORAGE TIN", "PHOTO FRAME", "CANDLE",
+]
+
+
+def default_num_items(n_rows):
+    """Số mã hàng tăng chậm theo số dòng (catalog không tăng tuyến tính)"""
+    return int(np.clip(4000 * (n_rows / REFERENCE_ROWS) ** 0.25, 200, 50_000))
+
+
+def default_num_customers(n_rows):
+    return int(max(100, 4400 * (n_rows / REFERENCE_ROWS) ** 0.8))
+
+
+def zipf_cdf(n, exponent):
+    """CDF của phân phối Zipf trên thứ hạng 1..n (để lấy mẫu bằng searchsorted)"""
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+class SyntheticRetail:
+    """
+    Sinh dataset giống Online Retail theo từng chunk, có seed
+
+    - Độ phổ biến của mã hàng theo Zipf (mã hot xuất hiện trong rất nhiều giỏ)
+    - Số dòng mỗi invoice theo lognormal (trung bình ~20, đuôi dài)
+    - Invoice hủy có tiền tố 'C' và Quantity âm, một ít mã đặc biệt
+      (POST, M, D, BANK CHARGES), UnitPrice = 0, CustomerID bị thiếu
+
+    Thông tin mã hàng/khách hàng chỉ phụ thuộc seed; các chunk dùng stream
+    ngẫu nhiên riêng nên cùng (seed, n_rows, chunk_rows) luôn ra cùng file.
+    """
+
+    def __init__(self, n_rows, seed=0, n_items=None, n_customers=None,
+                 zipf_exponent=0.9, mean_basket=20.0, basket_sigma=1.0):
+        self.n_rows = int(n_rows)
+        self.seed = seed
+        self.n_items = n_items or default_num_items(self.n_rows)
+        self.n_customers = n_customers or default_num_customers(self.n_rows)
+        self.basket_mu = np.log(mean_basket) - basket_sigma ** 2 / 2
+        self.basket_sigma = basket_sigma
+
+        seeds = np.random.SeedSequence(seed)
+        items_seed, customers_seed, self._chunks_seed = seeds.spawn(3)
+
+        # Mã hàng: thứ hạng phổ biến -> StockCode, Description, giá gốc
+        rng = np.random.default_rng(items_seed)
+        self.item_cdf = zipf_cdf(self.n_items, zipf_exponent)
+        codes = 10000 + rng.permutation(90000)[:self.n_items]
+        suffixes = np.where(rng.random(self.n_items) < 0.1, rng.choice(list("ABCDEFG"), self.n_items), "")
+        self.item_codes = np.char.add(codes.astype(str), suffixes).astype(object)
+        self.item_names = np.array([
+            f"{COLORS[c]} {NOUNS[n]} {i + 1}"
+            for i, (c, n) in enumerate(zip(rng.integers(len(COLORS), size=self.n_items),
+                                           rng.integers(len(NOUNS), size=self.n_items)))
+        ], dtype=object)
+        self.item_prices = np.round(np.clip(rng.lognormal(np.log(2.5), 0.9, self.n_items), 0.06, 650.0), 2)
+
+        # Khách hàng: CustomerID và Country cố định cho mỗi khách, mức mua theo Zipf
+        rng = np.random.default_rng(customers_seed)
+        self.customer_cdf = zipf_cdf(self.n_customers, 0.7)
+        self.customer_ids = 12346 + rng.permutation(self.n_customers * 2)[:self.n_customers]
+        self.customer_countries = np.array(COUNTRIES, dtype=object)[
+            rng.choice(len(COUNTRIES), self.n_customers, p=np.array(COUNTRY_WEIGHTS) / sum(COUNTRY_WEIGHTS))
+        ]
+
+        # Khoảng cách thời gian trung bình giữa 2 invoice để trải đều DATE_SPAN_DAYS
+        expected_invoices = max(1.0, self.n_rows / mean_basket)
+        self.seconds_per_invoice = DATE_SPAN_DAYS * 86400 / expected_invoices
+
+    def chunks(self, chunk_rows=CHUNK_ROWS):
+        """
+        Yields:
+            DataFrame theo schema RAW_COLUMNS, tổng cộng đúng n_rows dòng
+        """
+        invoice_index = 0
+        remaining = self.n_rows
+        for chunk_seed in self._chunks_seed.spawn((self.n_rows + chunk_rows - 1) // chunk_rows):
+            if remaining <= 0:
+                return
+            rows = min(chunk_rows, remaining)
+            df = self._make_chunk(np.random.default_rng(chunk_seed), rows, invoice_index)
+            invoice_index = int(df["_invoice"].iloc[-1]) + 1
+            remaining -= rows
+            yield df.drop(columns="_invoice")
+
+    def _make_chunk(self, rng, rows, first_invoice):
+        # Kích thước giỏ: sinh dư rồi cắt đúng số dòng
+        sizes = []
+        total = 0
+        while total < rows:
+            batch = np.clip(np.floor(rng.lognormal(self.basket_mu, self.basket_sigma, 4096)).astype(np.int64) + 1, 1, 600)
+            sizes.append(batch)
+            total += int(batch.sum())
+        sizes = np.concatenate(sizes)
+        n_invoices = int(np.searchsorted(np.cumsum(sizes), rows)) + 1
+        sizes = sizes[:n_invoices]
+        sizes[-1] -= int(sizes.sum()) - rows
+
+        # Thuộc tính theo invoice
+        invoices = first_invoice + np.arange(n_invoices)
+        cancelled = rng.random(n_invoices) < CANCEL_RATE
+        customers = np.searchsorted(self.customer_cdf, rng.random(n_invoices))
+        has_customer = rng.random(n_invoices) >= MISSING_CUSTOMER_RATE
+        offsets = rng.uniform(0, self.seconds_per_invoice, n_invoices)
+        dates = START_DATE + ((invoices * self.seconds_per_invoice + offsets) // 60 * 60).astype("timedelta64[s]")
+
+        # Theo dòng
+        line_invoice = np.repeat(np.arange(n_invoices), sizes)
+        items = np.searchsorted(self.item_cdf, rng.random(rows))
+        quantities = PACK_SIZES[rng.choice(len(PACK_SIZES), rows, p=PACK_WEIGHTS / PACK_WEIGHTS.sum())]
+        quantities = np.where(cancelled[line_invoice], -quantities, quantities)
+        prices = self.item_prices[items] * np.where(rng.random(rows) < 0.1, 0.85, 1.0)
+        prices = np.where(rng.random(rows) < ZERO_PRICE_RATE, 0.0, np.round(prices, 2))
+        codes = self.item_codes[items].copy()
+        names = self.item_names[items].copy()
+
+        special = rng.random(rows) < SPECIAL_CODE_RATE
+        if special.any():
+            picked = np.array(SPECIAL_CODES, dtype=object)[
+                rng.choice(len(SPECIAL_CODES), int(special.sum()), p=SPECIAL_CODE_WEIGHTS)
+            ]
+            codes[special] = picked
+            names[special] = picked
+
+        invoice_nos = (FIRST_INVOICE_NO + invoices).astype(str).astype(object)
+        invoice_nos[cancelled] = "C" + invoice_nos[cancelled]
+        customer_ids = np.where(has_customer, self.customer_ids[customers], np.nan)
+
+        return pd.DataFrame({
+            "InvoiceNo": invoice_nos[line_invoice],
+            "StockCode": codes,
+            "Description": names,
+            "Quantity": quantities,
+            "InvoiceDate": dates[line_invoice],
+            "UnitPrice": prices,
+            "CustomerID": customer_ids[line_invoice],
+            "Country": self.customer_countries[customers][line_invoice],
+            "_invoice": invoices[line_invoice],
+        })
+
+
+def generate_online_retail(n_rows, seed=0, **kwargs):
+    """Sinh toàn bộ dataset trong bộ nhớ (dùng cho kích thước nhỏ)"""
+    generator = SyntheticRetail(n_rows, seed=seed, **kwargs)
+    parts = list(generator.chunks())
+    if not parts:
+        return pd.DataFrame(columns=RAW_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_synthetic_dataset(output_file, n_rows, seed=0, chunk_rows=CHUNK_ROWS, **kwargs):
+    """
+    Ghi dataset tổng hợp ra CSV theo từng chunk (đọc lại được bằng
+    dataset_cache.load_raw_dataset / process_data)
+
+    Returns:
+        Đường dẫn file
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    generator = SyntheticRetail(n_rows, seed=seed, **kwargs)
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(generator.chunks(chunk_rows)):
+            chunk.to_csv(f, header=(i == 0), index=False, date_format="%Y-%m-%d %H:%M:%S")
+    os.replace(tmp_file, output_file)
+    print(f"✓ Synthetic dataset: {n_rows:,} rows, {generator.n_items:,} items, "
+          f"{generator.n_customers:,} customers (seed {seed}) -> {output_file}")
+    return output_file
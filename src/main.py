@@ -1,17 +1,8 @@
-from processing.data_ingestion import process_data
-from processing.data_cleaning import clean_and_filter_data
+import sys
+
+from pipeline import main
 
 if __name__ == "__main__":
-    # Xử lý dữ liệu -- Member 1
-    df = process_data(
-        input_file='src/data/dataset.xlsx',
-        output_csv='data/processed/mapped_data.csv',
-        output_json='data/processed/item_mapping.json'
-    )
-    
-    # Cleaning & Filtering -- Member 3
-    df_clean = clean_and_filter_data(
-        input_file='data/processed/mapped_data.csv',
-        mapping_file='data/processed/item_mapping.json',
-        output_file='data/processed/clean_transactions_spmf.txt'
-    )
+    # Ingestion (Member 1) -> Cleaning & Filtering (Member 3) -> Mining -> Rules -> Web artifacts, + EDA
+    # Chỉ chạy lại các stage có input/tham số thay đổi (xem src/pipeline.py, --help để xem tùy chọn)
+    sys.exit(main())
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Chạy toàn bộ pipeline theo DAG, chỉ chạy lại các bước có input/tham số thay đổi
+
+    python src/pipeline.py                        # chạy (hoặc bỏ qua) mọi stage
+    python src/pipeline.py --targets rules        # chỉ những gì cần cho rules
+    python src/pipeline.py --set thresholds=[1000,5000,20000] --dry-run
+    python src/pipeline.py --config my_config.json --jobs 2
+
+    ingest ─> clean ─┬─> mine[1000]
+                     ├─> mine[5000]
+                     └─> mine[10000] ─> rules ─> web_artifacts
+    eda (đọc dataset gốc, chạy song song với nhánh mining)
+    partition ─> mine_partitions (khi đặt partition_by, vd. --set partition_by=Country)
+
+Mỗi ngưỡng là 1 stage riêng nên đổi 1 ngưỡng chỉ mine lại ngưỡng đó. Stage
+được bỏ qua khi key (hash của tham số + nội dung input + source code của
+bước đó) đã có output trong cache; xem processing/pipeline_dag.py.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROCESSING_DIR = os.path.join(ROOT, "src", "processing")
+sys.path.insert(0, PROCESSING_DIR)
+
+from pipeline_dag import STATUS_BLOCKED, STATUS_FAILED, ArtifactCache, PipelineRunner, Stage
+
+DEFAULT_CONFIG = {
+    "input_file": "src/data/dataset.xlsx",
+    # Seed của Unit_Profit (xem data_ingestion.PROFIT_SEED)
+    "profit_seed": 42,
+    # Ingestion/cleaning theo từng chunk (None = đọc cả file vào RAM)
+    "chunk_rows": None,
+    "thresholds": [1000, 5000, 10000],
+    "max_size": 2,
+    "engine": "utility_list",
+    # 'all' | 'closed' | 'maximal': chỉ ghi HUI closed / maximal (ít pattern và luật hơn)
+    "itemset_mode": "all",
+    # Số process khi mine 1 ngưỡng (không ảnh hưởng kết quả, không nằm trong key)
+    "workers": None,
+    "rules_threshold": 10000,
+    "rules_top_k": None,
+    # EDA xem nhanh: biểu đồ DPI thấp, số liệu trên mẫu dữ liệu
+    "eda_preview": False,
+    # Mine riêng từng partition (vd. "Country", "CustomerID"); None = tắt
+    "partition_by": None,
+    # Ngưỡng của partition: theo tên > tỉ lệ trên tổng TU của partition > ngưỡng chung
+    "partition_thresholds": {},
+    "partition_min_utility_ratio": 0.001,
+    "partition_min_utility": None,
+    # Partition ít transaction hơn được gom vào 'Other'
+    "partition_min_transactions": 0,
+}
+
+# Đường dẫn tương đối với thư mục gốc của repo
+PATHS = {
+    "mapped_csv": "data/processed/mapped_data.csv",
+    "mapping_json": "data/processed/item_mapping.json",
+    "spmf": "data/processed/clean_transactions_spmf.txt",
+    "store_dir": "data/processed/transaction_store",
+    "product_table": "data/processed/product_table.csv",
+    "patterns": "output/patterns/high_utility_itemsets_{threshold}.txt",
+    "rules": "output/recommendation_rules.json",
+    "products_with_price": "output/products_with_price.csv",
+    "rule_artifacts": "output/rule_artifacts",
+    "partitions_dir": "data/processed/partitions",
+    "partition_output": "output/partitions",
+    "eda_outputs": [
+        "output/eda_country_distribution.png",
+        "output/eda_quantity_outliers.png",
+        "output/eda_top10_comparison.png",
+        "output/eda_report.txt",
+    ],
+}
+
+# Source code của từng bước: sửa code thì stage tương ứng chạy lại
+CODE = {
+    "ingest": ["data_ingestion.py", "dataset_cache.py"],
+    "clean": ["data_cleaning.py", "transaction_store.py", "product_table.py"],
+    "eda": ["eda_analysis.py", "dataset_cache.py"],
+    "mine": ["mining_implementation.py", "hui_miner.py", "parallel_mining.py", "topk_miner.py",
+             "condensed_miner.py", "tidset_backends.py", "transaction_store.py"],
+    "rules": ["result_evaluation.py", "product_table.py"],
+    "web_artifacts": ["rule_artifacts.py", "rule_index.py"],
+    "partition": ["partitioned_mining.py", "data_cleaning.py", "transaction_store.py"],
+    "mine_partitions": ["partitioned_mining.py", "mining_implementation.py", "hui_miner.py", "topk_miner.py",
+                        "condensed_miner.py", "tidset_backends.py", "transaction_store.py", "result_evaluation.py", "product_table.py"],
+}
+
+
+def code_files(step):
+    return [os.path.join("src", "processing", name) for name in CODE[step]]
+
+
+def patterns_file(threshold):
+    return PATHS["patterns"].format(threshold=threshold)
+
+
+# --- Các stage (hàm cấp module để chạy được trong process con) ---
+
+def ingest(input_file, output_csv, output_json, seed, chunk_rows=None):
+    from data_ingestion import process_data
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+    process_data(input_file, output_csv, output_json, seed=seed, chunk_rows=chunk_rows)
+
+
+def clean(input_file, mapping_file, output_file, store_dir, product_table_file, chunk_rows=None):
+    from data_cleaning import clean_and_filter_data
+    clean_and_filter_data(input_file, mapping_file, output_file, store_dir, product_table_file,
+                          return_df=False, chunk_rows=chunk_rows)
+
+
+def eda(input_file, preview=False):
+    from eda_analysis import run_full_eda
+    os.makedirs("output", exist_ok=True)
+    run_full_eda(input_file, preview=preview)
+
+
+def mine(store_dir, mapping_file, output_file, min_utility, max_size, engine, itemset_mode="all", workers=None):
+    from mining_implementation import find_high_utility_itemsets_optimized, load_item_mapping, save_results
+    from transaction_store import load_transaction_store
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    itemsets = find_high_utility_itemsets_optimized(
+        load_transaction_store(store_dir), min_utility, max_size=max_size, engine=engine, workers=workers,
+        itemset_mode=itemset_mode,
+    )
+    save_results(itemsets, output_file, load_item_mapping(mapping_file))
+
+
+def rules(patterns_file, rules_output, products_with_price_output, product_table_file, top_k=None):
+    from product_table import load_product_table
+    from result_evaluation import generate_rules
+    generate_rules(patterns_file, rules_output, products_with_price_output, top_k=top_k,
+                   artifacts_output=None, products=load_product_table(product_table_file))
+
+
+def web_artifacts(rules_file, products_file, out_dir):
+    from rule_artifacts import build_from_files
+    build_from_files(rules_file, products_file, out_dir)
+
+
+def partition(input_file, mapping_file, key, out_dir, min_transactions):
+    from partitioned_mining import split_transactions
+    split_transactions(input_file, mapping_file, key, out_dir, min_transactions)
+
+
+def mine_partitions(partitions_dir, mapping_file, product_table_file, output_dir, min_utility,
+                    min_utility_ratio, thresholds, max_size, engine, rules_top_k, itemset_mode="all",
+                    workers=None):
+    import partitioned_mining
+    partitioned_mining.mine_partitions(
+        partitions_dir, mapping_file, product_table_file, output_dir, min_utility=min_utility,
+        min_utility_ratio=min_utility_ratio, thresholds=thresholds, max_size=max_size,
+        engine=engine, rules_top_k=rules_top_k, workers=workers, itemset_mode=itemset_mode,
+    )
+
+
+def build_stages(config):
+    """
+    Danh sách Stage của pipeline theo config (xem DEFAULT_CONFIG)
+
+    Returns:
+        List Stage; phụ thuộc giữa các stage suy ra từ inputs/outputs
+    """
+    thresholds = sorted(set(config["thresholds"]) | {config["rules_threshold"]})
+    stages = [
+        Stage(
+            "ingest", ingest,
+            inputs=[config["input_file"]] + code_files("ingest"),
+            outputs=[PATHS["mapped_csv"], PATHS["mapping_json"]],
+            params={"input_file": config["input_file"], "output_csv": PATHS["mapped_csv"],
+                    "output_json": PATHS["mapping_json"], "seed": config["profit_seed"],
+                    "chunk_rows": config["chunk_rows"]},
+        ),
+        Stage(
+            "clean", clean,
+            inputs=[PATHS["mapped_csv"], PATHS["mapping_json"]] + code_files("clean"),
+            outputs=[PATHS["spmf"], PATHS["store_dir"], PATHS["product_table"]],
+            params={"input_file": PATHS["mapped_csv"], "mapping_file": PATHS["mapping_json"],
+                    "output_file": PATHS["spmf"], "store_dir": PATHS["store_dir"],
+                    "product_table_file": PATHS["product_table"], "chunk_rows": config["chunk_rows"]},
+        ),
+        Stage(
+            "eda", eda,
+            inputs=[config["input_file"]] + code_files("eda"),
+            outputs=PATHS["eda_outputs"],
+            params={"input_file": config["input_file"], "preview": config["eda_preview"]},
+        ),
+    ]
+    for threshold in thresholds:
+        output_file = patterns_file(threshold)
+        stages.append(Stage(
+            f"mine[{threshold}]", mine,
+            inputs=[PATHS["store_dir"], PATHS["mapping_json"]] + code_files("mine"),
+            outputs=[output_file, output_file.replace(".txt", "_readable.txt")],
+            params={"store_dir": PATHS["store_dir"], "mapping_file": PATHS["mapping_json"],
+                    "output_file": output_file, "min_utility": threshold,
+                    "max_size": config["max_size"], "engine": config["engine"],
+                    "itemset_mode": config["itemset_mode"]},
+            options={"workers": config["workers"]},
+        ))
+    stages += [
+        Stage(
+            "rules", rules,
+            inputs=[patterns_file(config["rules_threshold"]), PATHS["product_table"]] + code_files("rules"),
+            outputs=[PATHS["rules"], PATHS["products_with_price"]],
+            params={"patterns_file": patterns_file(config["rules_threshold"]),
+                    "rules_output": PATHS["rules"],
+                    "products_with_price_output": PATHS["products_with_price"],
+                    "product_table_file": PATHS["product_table"], "top_k": config["rules_top_k"]},
+        ),
+        Stage(
+            "web_artifacts", web_artifacts,
+            inputs=[PATHS["rules"], PATHS["products_with_price"]] + code_files("web_artifacts"),
+            outputs=[PATHS["rule_artifacts"]],
+            params={"rules_file": PATHS["rules"], "products_file": PATHS["products_with_price"],
+                    "out_dir": PATHS["rule_artifacts"]},
+        ),
+    ]
+    if config["partition_by"]:
+        stages += [
+            Stage(
+                "partition", partition,
+                inputs=[PATHS["mapped_csv"], PATHS["mapping_json"]] + code_files("partition"),
+                outputs=[PATHS["partitions_dir"]],
+                params={"input_file": PATHS["mapped_csv"], "mapping_file": PATHS["mapping_json"],
+                        "key": config["partition_by"], "out_dir": PATHS["partitions_dir"],
+                        "min_transactions": config["partition_min_transactions"]},
+            ),
+            Stage(
+                "mine_partitions", mine_partitions,
+                inputs=[PATHS["partitions_dir"], PATHS["mapping_json"], PATHS["product_table"]]
+                + code_files("mine_partitions"),
+                outputs=[PATHS["partition_output"]],
+                params={"partitions_dir": PATHS["partitions_dir"], "mapping_file": PATHS["mapping_json"],
+                        "product_table_file": PATHS["product_table"],
+                        "output_dir": PATHS["partition_output"],
+                        "min_utility": config["partition_min_utility"],
+                        "min_utility_ratio": config["partition_min_utility_ratio"],
+                        "thresholds": config["partition_thresholds"], "max_size": config["max_size"],
+                        "engine": config["engine"], "rules_top_k": config["rules_top_k"],
+                        "itemset_mode": config["itemset_mode"]},
+                options={"workers": config["workers"]},
+            ),
+        ]
+    return stages
+
+
+def load_config(config_file=None, overrides=()):
+    """
+    DEFAULT_CONFIG + file JSON + các cặp 'key=value' (value đọc theo JSON nếu được)
+
+    Raises:
+        ValueError: key không có trong DEFAULT_CONFIG
+    """
+    config = dict(DEFAULT_CONFIG)
+    updates = {}
+    if config_file:
+        with open(config_file, "r", encoding="utf-8") as f:
+            updates.update(json.load(f))
+    for item in overrides:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got '{item}'")
+        try:
+            updates[key] = json.loads(value)
+        except ValueError:
+            updates[key] = value
+    unknown = set(updates) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown config keys {sorted(unknown)}, expected {sorted(DEFAULT_CONFIG)}")
+    config.update(updates)
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chạy pipeline (bỏ qua các stage đã cập nhật)")
+    parser.add_argument("--config", help="File JSON ghi đè DEFAULT_CONFIG")
+    parser.add_argument("--set", nargs="+", default=[], metavar="KEY=VALUE",
+                        help="Ghi đè config, vd. thresholds=[1000,5000] max_size=3")
+    parser.add_argument("--targets", nargs="+", help="Chỉ chạy các stage này (và stage chúng cần)")
+    parser.add_argument("--force", nargs="+", default=[], help="Luôn chạy lại các stage này ('all' = tất cả)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Số stage chạy song song (mặc định: số CPU)")
+    parser.add_argument("--cache-dir", default=None, help="Thư mục cache (mặc định: .pipeline_cache)")
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ in stage nào sẽ chạy")
+    args = parser.parse_args(argv)
+
+    # Mọi đường dẫn trong pipeline tương đối với thư mục gốc
+    os.chdir(ROOT)
+    config = load_config(args.config, args.set)
+    cache = ArtifactCache(args.cache_dir) if args.cache_dir else ArtifactCache()
+    runner = PipelineRunner(build_stages(config), cache=cache, jobs=args.jobs)
+
+    if args.dry_run:
+        for name, action in runner.plan(args.targets, args.force):
+            print(f"  {name:<28} {action}")
+        cache.save_hash_index()
+        return 0
+
+    results = runner.run(args.targets, args.force)
+    return 1 if any(r["status"] in (STATUS_FAILED, STATUS_BLOCKED) for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import numpy as np
+
+try:
+    from .hui_miner import (
+        MiningContext, MiningIndex, _no_phase, build_utility_lists,
+        finalize_results, mine_high_utility_itemsets, mine_item, prepare_search,
+    )
+except ImportError:
+    from hui_miner import (
+        MiningContext, MiningIndex, _no_phase, build_utility_lists,
+        finalize_results, mine_high_utility_itemsets, mine_item, prepare_search,
+    )
+
+
+# 'all': mọi HUI; 'closed': HUI không có superset cùng support;
+# 'maximal': HUI không có superset nào cũng là HUI
+ITEMSET_MODES = ('all', 'closed', 'maximal')
+
+
+class CondensedCollector:
+    """
+    Nhận các HUI tìm được trong lúc duyệt (dùng thay dict kết quả), chỉ giữ
+    lại itemset closed / maximal
+
+    Mọi HUI đã ghi được đánh index theo item (closed: theo (support, item)),
+    "đã có superset chưa" là phép giao các set của từng item. HUI có kích thước max_size không
+    có superset trong không gian tìm kiếm nên được giữ ngay; HUI nhỏ hơn chờ
+    đến khi duyệt xong cây con của nó (CondensedContext.visit).
+    """
+
+    def __init__(self, mode, max_size):
+        self.mode = mode
+        self.max_size = max_size
+        self.kept = {}
+        self.pending = {}
+        self.found = 0
+        self._index = {}
+
+    def _key(self, item, support):
+        return (support, item) if self.mode == 'closed' else item
+
+    def __setitem__(self, itemset, info):
+        self.found += 1
+        members = frozenset(itemset)
+        for item in itemset:
+            self._index.setdefault(self._key(item, info['support']), set()).add(members)
+        if self.max_size is not None and len(itemset) >= self.max_size:
+            self.kept[itemset] = info
+        else:
+            self.pending[itemset] = info
+
+    def __len__(self):
+        return len(self.kept)
+
+    def has_superset(self, itemset, support=None):
+        """Đã ghi HUI nào chứa thực sự itemset chưa (closed: chỉ xét HUI có cùng support)"""
+        members = frozenset(itemset)
+        sets = sorted((self._index.get(self._key(item, support), set()) for item in members), key=len)
+        common = sets[0].intersection(*sets[1:])
+        return len(common) > (members in common)
+
+
+class CondensedContext(MiningContext):
+    """
+    MiningContext cho chế độ closed / maximal
+
+    Item được duyệt theo rank và mỗi itemset chỉ mở rộng bằng item có rank
+    lớn hơn, nên khi bắt đầu duyệt prefix P thì mọi superset của P chứa 1
+    item rank nhỏ hơn (không thuộc P) đã được ghi; superset còn lại nằm
+    trong cây con của P. Vì vậy P được quyết định ngay sau khi duyệt xong
+    cây con, và cả cây con bị bỏ khi chắc chắn không có itemset nào được giữ:
+    - closed (max_size=None): đã có superset P ∪ {y} cùng support thì y có
+      mặt trong mọi transaction của P; mọi itemset trong cây con (không bao
+      giờ chứa y) đều không closed
+    - maximal: P ∪ {mọi item mở rộng được} đã nằm trong 1 HUI đã ghi thì
+      mọi itemset trong cây con đều không maximal
+    """
+
+    def __init__(self, db, eucs_keys, min_utility, max_size, collector, stats=None):
+        super().__init__(db, eucs_keys, min_utility, max_size, stats)
+        self.collector = collector
+        self.mode = collector.mode
+        self.pruned_subtrees = 0
+        # Prefix có mở rộng cùng support (closed)
+        self._extended = set()
+
+    def visit(self, prefix, ul, results):
+        found_before = results.found
+        super().visit(prefix, ul, results)
+        info = results.pending.pop(prefix, None)
+        if info is None:
+            return
+        if self.mode == 'closed':
+            # Superset trong cây con: đã biết qua prune_extensions (mở rộng cùng support)
+            keep = prefix not in self._extended and not results.has_superset(prefix, info['support'])
+        else:
+            keep = results.found == found_before and not results.has_superset(prefix)
+        if keep:
+            results.kept[prefix] = info
+
+    def prune_extensions(self, prefix, ul, support):
+        if self.mode == 'closed':
+            # Mở rộng có cùng support cũng là HUI (nếu prefix là HUI) nên prefix không closed
+            # (support của mở rộng <= support của prefix)
+            if support.max() == len(ul):
+                self._extended.add(prefix)
+            # Giới hạn max_size: itemset có kích thước max_size trong cây con vẫn closed
+            prune = self.max_size is None and self.collector.has_superset(prefix, len(ul))
+        else:
+            # Giới hạn max_size: chỉ bỏ được khi cả prefix + mọi mở rộng vẫn <= max_size
+            prune = (
+                (self.max_size is None or len(prefix) + np.count_nonzero(support) < self.max_size)
+                and self.collector.has_superset(prefix + tuple(self.db.rank_to_item[support > 0].tolist()))
+            )
+        if prune:
+            self.pruned_subtrees += 1
+            if self.stats is not None:
+                self.stats.count(f"pruned_{self.mode}")
+        return prune
+
+
+def mine_condensed_itemsets(store, min_utility, mode='closed', max_size=None, index=None, stats=None):
+    """
+    Khai phá closed hoặc maximal High-Utility Itemsets (ít pattern hơn, ít luật thừa hơn)
+
+    Closed / maximal được xét trong không gian tìm kiếm: itemset X (HUI) bị
+    loại nếu có superset kích thước <= max_size cùng support (closed) hoặc
+    cũng là HUI (maximal). Việc loại diễn ra trong lúc duyệt, cây con chắc
+    chắn không có itemset nào được giữ thì không duyệt (xem CondensedContext).
+
+    Args:
+        store: TransactionStore
+        min_utility: Ngưỡng utility tối thiểu
+        mode: 'closed', 'maximal' hoặc 'all' (= mine_high_utility_itemsets)
+        max_size: Kích thước itemset tối đa (None = không giới hạn)
+        index: MiningIndex dùng chung (None = tạo mới)
+        stats: MinerStats (hui_found đếm cả các HUI sau đó bị loại)
+
+    Returns:
+        Dict giống mine_high_utility_itemsets, chỉ gồm các itemset closed / maximal
+    """
+    if mode not in ITEMSET_MODES:
+        raise ValueError(f"Unknown itemset mode '{mode}', expected one of {ITEMSET_MODES}")
+    if mode == 'all':
+        return mine_high_utility_itemsets(store, min_utility, max_size, index=index, stats=stats)
+
+    phase = stats.phase if stats is not None else _no_phase
+    if index is None:
+        with phase("build_index"):
+            index = MiningIndex(store)
+    with phase("prepare_search"):
+        min_rank, db, eucs_keys = prepare_search(index, min_utility, max_size, stats)
+        utility_lists = build_utility_lists(db, min_rank)
+
+    collector = CondensedCollector(mode, max_size)
+    ctx = CondensedContext(db, eucs_keys, min_utility, max_size, collector, stats)
+    with phase("search"):
+        for ul in utility_lists:
+            mine_item(ul, ctx, collector)
+
+    # HUI trong cây con bị bỏ không được đếm: tổng số HUI (và mức giảm) >= số in ra
+    kept = len(collector)
+    shrink = 100.0 * (1 - kept / collector.found) if collector.found else 0.0
+    bound = ">=" if ctx.pruned_subtrees else ""
+    print(f"    - {mode.capitalize()}: kept {kept:,} of {bound}{collector.found:,} HUIs "
+          f"({bound}{shrink:.1f}% smaller), {ctx.pruned_subtrees:,} subtrees pruned")
+    return finalize_results(collector.kept)
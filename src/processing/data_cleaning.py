@@ -1,11 +1,36 @@
 import pandas as pd
+import numpy as np
 import json
 
+try:
+    from .product_table import build_product_table, save_product_table
+    from .transaction_store import TransactionStoreWriter, build_transaction_store, save_transaction_store
+except ImportError:
+    from product_table import build_product_table, save_product_table
+    from transaction_store import TransactionStoreWriter, build_transaction_store, save_transaction_store
+
+
+# Các cột cần để xuất SPMF / transaction store
+SPMF_COLUMNS = ["InvoiceNo", "StockCode", "Quantity", "Unit_Profit"]
+
+# Số dòng format + ghi ra file mỗi lần
+SPMF_BLOCK_ROWS = 200_000
+
+# Các cột đọc từ mapped_data.csv khi không cần giữ cả DataFrame
+CLEAN_COLUMNS = SPMF_COLUMNS + ["UnitPrice", "InvoiceDate", "Description"]
+
+# Các mã hàng không phải sản phẩm (phí ship, điều chỉnh, phí ngân hàng...)
+SPECIAL_CODES = ["POST", "M", "BANK CHARGES", "D"]
+
 
 def clean_and_filter_data(
     input_file="../../data/processed/mapped_data.csv",
     mapping_file="../../data/processed/item_mapping.json",
     output_file="../../data/processed/clean_transactions_spmf.txt",
+    store_dir="../../data/processed/transaction_store",
+    product_table_file="../../data/processed/product_table.csv",
+    return_df=True,
+    chunk_rows=None,
 ):
     """
     Cleaning & Filtering (Xử lý nhiễu đặc thù)
@@ -15,32 +40,93 @@ def clean_and_filter_data(
     1. Lọc đơn hủy: Loại bỏ dòng có Invoice bắt đầu bằng chữ 'C'
     2. Lọc mã hàng rác: Loại bỏ các StockCode đặc biệt (POST, M, BANK CHARGES, D)
     3. Xử lý giá trị âm: Loại bỏ dòng có Price <= 0 hoặc Quantity <= 0
-    4. Convert dữ liệu sang format SPMF (itemid:quantity:unit_profit)
+    4. Ghi transaction store dạng CSR (mảng nhị phân, miner memory-map trực tiếp)
+    5. Convert dữ liệu sang format SPMF (itemid:quantity:unit_profit) - tùy chọn
+    6. Ghi product table (ID, tên, giá) cho bước sinh luật
 
     Args:
         input_file: Đường dẫn file CSV đã được xử lý (có StockCode, Unit_Profit)
         mapping_file: File JSON chứa mapping StockCode -> ID
-        output_file: File output SPMF format
+        output_file: File output SPMF format (None để bỏ qua)
+        store_dir: Thư mục transaction store (None để bỏ qua)
+        product_table_file: File product table (None để bỏ qua)
+        return_df: False để không giữ DataFrame đã clean trong bộ nhớ
+            (chỉ đọc các cột cần cho SPMF/store, trả về dict thống kê)
+        chunk_rows: Đọc và clean theo từng chunk chunk_rows dòng (cần
+            return_df=False), bộ nhớ không phụ thuộc kích thước file
 
     Returns:
-        DataFrame đã clean
+        DataFrame đã clean (return_df=True) hoặc dict thống kê
+        {'rows_in', 'rows_out', 'transactions'}
     """
+    if chunk_rows:
+        if return_df:
+            raise ValueError("chunk_rows requires return_df=False")
+        return clean_and_filter_chunked(
+            input_file, mapping_file, output_file, store_dir, product_table_file, chunk_rows
+        )
+
     # Load dữ liệu từ mapped_data.csv (đã có Unit_Profit và StockCode là ID)
-    df = pd.read_csv(input_file)
+    if return_df:
+        df = pd.read_csv(input_file)
+    else:
+        df = pd.read_csv(
+            input_file,
+            usecols=lambda col: col in CLEAN_COLUMNS,
+        )
     original_count = len(df)
 
-    # Load item_mapping.json để lọc mã rác
+    df = filter_rows(df, load_special_ids(mapping_file))
+
+    # Sắp xếp 1 lần theo InvoiceNo (stable: giữ thứ tự dòng trong invoice)
+    invoice_nos, item_ids, quantities, profits, invoice_dates = sorted_transaction_columns(df)
+    rows_out = len(df)
+    # Bảng sản phẩm nhỏ để result_evaluation không phải đọc lại cả dataset
+    if product_table_file and "Description" in df.columns:
+        save_product_table(build_product_table(df), product_table_file)
+    if not return_df:
+        del df
+
+    transactions_written = int(rows_out > 0) + int(
+        np.count_nonzero(invoice_nos[1:] != invoice_nos[:-1])
+    )
+
+    # Ghi transaction store (offsets, items, quantities, utilities, TU)
+    if store_dir:
+        store = build_transaction_store(invoice_nos, item_ids, quantities, profits, invoice_dates)
+        save_transaction_store(store, store_dir)
+        print(f"Transaction store: {len(store):,} transactions → {store_dir}")
+
+    # Convert sang format SPMF (gom theo InvoiceNo)
+    # Mỗi dòng = 1 transaction, các items cách nhau bởi khoảng trắng
+    # Format: itemid:quantity:unit_profit itemid:quantity:unit_profit ...
+    if output_file:
+        transactions_written = write_spmf_file(
+            invoice_nos, item_ids, quantities, profits, output_file
+        )
+
+    print(
+        f"Cleaned: {original_count:,} → {rows_out:,} items → {transactions_written:,} transactions → {output_file or store_dir}"
+    )
+
+    if return_df:
+        return df
+    return {
+        "rows_in": original_count,
+        "rows_out": rows_out,
+        "transactions": transactions_written,
+    }
+
+
+def load_special_ids(mapping_file):
+    """ID của các mã đặc biệt cần lọc (SPECIAL_CODES có trong item_mapping.json)"""
     with open(mapping_file, "r", encoding="utf-8") as f:
         stockcode_mapping = json.load(f)
+    return [stockcode_mapping[code] for code in SPECIAL_CODES if code in stockcode_mapping]
 
-    # Tìm ID của các mã đặc biệt cần lọc
-    special_codes = ["POST", "M", "BANK CHARGES", "D"]
-    special_ids = [
-        stockcode_mapping.get(code)
-        for code in special_codes
-        if code in stockcode_mapping
-    ]
 
+def filter_rows(df, special_ids):
+    """Bỏ đơn hủy, mã hàng rác và dòng có Price/Quantity <= 0"""
     # Lọc đơn hủy (Invoice bắt đầu bằng 'C')
     df["InvoiceNo"] = df["InvoiceNo"].astype(str)
     df = df[~df["InvoiceNo"].str.startswith("C")]
@@ -50,28 +136,177 @@ def clean_and_filter_data(
         df = df[~df["StockCode"].isin(special_ids)]
 
     # Xử lý giá trị âm (Price <= 0 hoặc Quantity <= 0)
-    df = df[(df["UnitPrice"] > 0) & (df["Quantity"] > 0)]
+    return df[(df["UnitPrice"] > 0) & (df["Quantity"] > 0)]
 
-    # Convert sang format SPMF (gom theo InvoiceNo)
-    # Mỗi dòng = 1 transaction, các items cách nhau bởi khoảng trắng
-    # Format: itemid:quantity:unit_profit itemid:quantity:unit_profit ...
-    transactions_written = 0
-    with open(output_file, "w", encoding="utf-8") as f:
-        for invoice_no, group in df.groupby("InvoiceNo"):
-            items = []
-            for _, row in group.iterrows():
-                item_str = f"{int(row['StockCode'])}:{int(row['Quantity'])}:{row['Unit_Profit']:.2f}"
-                items.append(item_str)
 
-            if items:
-                f.write(" ".join(items) + "\n")
-                transactions_written += 1
+def sorted_transaction_columns(df):
+    """
+    Các cột cần cho SPMF/store, sắp xếp ổn định theo InvoiceNo
+
+    Returns:
+        (invoice_nos, item_ids, quantities, profits, invoice_dates hoặc None)
+    """
+    invoice_nos = df["InvoiceNo"].to_numpy(dtype=str)
+    order = np.argsort(invoice_nos, kind="stable")
+    invoice_nos = invoice_nos[order]
+    item_ids = df["StockCode"].to_numpy()[order]
+    quantities = df["Quantity"].to_numpy()[order]
+    profits = df["Unit_Profit"].to_numpy(dtype=np.float64)[order]
+    # InvoiceDate được giữ trong store để mine theo cửa sổ thời gian
+    invoice_dates = None
+    if "InvoiceDate" in df.columns:
+        invoice_dates = pd.to_datetime(df["InvoiceDate"]).to_numpy(dtype="datetime64[s]")[order]
+    return invoice_nos, item_ids, quantities, profits, invoice_dates
+
 
+def iter_invoice_blocks(input_file, columns, special_ids, chunk_rows):
+    """
+    Đọc CSV theo chunk, lọc từng chunk và gom thành các khối invoice hoàn chỉnh
+
+    Các dòng của invoice ở cuối chunk (theo dòng cuối trước khi lọc) được giữ
+    lại và ghép vào khối sau, nên invoice vắt qua ranh giới chunk không bị tách.
+
+    Yields:
+        (khối các invoice hoàn chỉnh, chunk vừa lọc theo thứ tự dòng gốc,
+        tổng số dòng đã đọc); khối cuối cùng có chunk rỗng
+    """
+    carry = None
+    rows_in = 0
+    reader = pd.read_csv(
+        input_file, usecols=None if columns is None else (lambda col: col in columns),
+        dtype={"InvoiceNo": str}, chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        rows_in += len(chunk)
+        # Invoice của dòng cuối (trước khi lọc) có thể còn tiếp ở chunk sau
+        open_invoice = str(chunk["InvoiceNo"].iloc[-1])
+        chunk = filter_rows(chunk, special_ids)
+        block = chunk if carry is None else pd.concat([carry, chunk])
+        held = (block["InvoiceNo"] == open_invoice).to_numpy()
+        carry = block[held]
+        yield block[~held], chunk, rows_in
+    if carry is not None and len(carry):
+        yield carry, carry.iloc[:0], rows_in
+
+
+def clean_and_filter_chunked(input_file, mapping_file, output_file, store_dir, product_table_file, chunk_rows):
+    """
+    clean_and_filter_data đọc mapped_data.csv theo từng chunk
+
+    Các dòng của invoice ở cuối chunk được giữ lại và ghép vào chunk sau, nên
+    invoice nằm vắt qua ranh giới chunk vẫn là 1 transaction hoàn chỉnh. Mỗi
+    phần được ghi nối tiếp vào file SPMF và transaction store; RAM chỉ giữ 1
+    chunk, invoice đang dở và product table.
+
+    Nếu các dòng của mỗi invoice nằm liền nhau trong file (như dataset gốc và
+    output của process_data) thì tập transaction giống hệt bản đọc cả file.
+    Thứ tự transaction chỉ giống
+    khi InvoiceNo còn lại tăng dần theo thứ tự file: bản đọc cả file sắp xếp
+    toàn cục, ở đây chỉ sắp xếp trong từng khối (vd. invoice 'A563185' của
+    dataset gốc ở vị trí của nó trong file thay vì cuối cùng). Invoice nằm rời
+    rạc ở nhiều chunk khác nhau bị tách thành nhiều transaction (có cảnh báo).
+
+    Returns:
+        Dict thống kê {'rows_in', 'rows_out', 'transactions'}
+    """
+    special_ids = load_special_ids(mapping_file)
+    writer = TransactionStoreWriter(store_dir) if store_dir else None
+    spmf = open(output_file, "w", encoding="utf-8") if output_file else None
+    product_table = None
+    rows_in = rows_out = transactions = 0
+    # Hash các InvoiceNo đã ghi (đã sắp xếp) để phát hiện invoice bị tách
+    seen_invoices = np.zeros(0, dtype=np.uint64)
+    split = False
+
+    def emit(df):
+        nonlocal rows_out, transactions, seen_invoices, split
+        invoice_nos, item_ids, quantities, profits, invoice_dates = sorted_transaction_columns(df)
+        hashes = np.unique(pd.util.hash_array(invoice_nos))
+        split = split or bool(np.isin(hashes, seen_invoices, assume_unique=True).any())
+        seen_invoices = np.union1d(seen_invoices, hashes)
+        rows_out += len(invoice_nos)
+        transactions += int(np.count_nonzero(invoice_nos[1:] != invoice_nos[:-1])) + 1
+        if writer is not None:
+            writer.append(build_transaction_store(invoice_nos, item_ids, quantities, profits, invoice_dates))
+        if spmf is not None:
+            write_spmf_file(invoice_nos, item_ids, quantities, profits, spmf)
+
+    try:
+        for block, chunk, rows_in in iter_invoice_blocks(input_file, CLEAN_COLUMNS, special_ids, chunk_rows):
+            if product_table_file and "Description" in chunk.columns:
+                part = build_product_table(chunk)
+                product_table = part if product_table is None else (
+                    pd.concat([product_table, part], ignore_index=True).drop_duplicates(ignore_index=True)
+                )
+            if len(block):
+                emit(block)
+            print(f"\r    - {rows_in:,} dòng → {transactions:,} transactions", end="")
+        print()
+    finally:
+        if spmf is not None:
+            spmf.close()
+        if writer is not None:
+            writer.close()
+
+    if split:
+        print("⚠ Có invoice nằm rời rạc ở nhiều chunk và bị tách thành nhiều transaction: "
+              "sắp xếp file theo InvoiceNo hoặc tăng chunk_rows")
+    if product_table is not None:
+        save_product_table(product_table.reset_index(drop=True), product_table_file)
+    if store_dir:
+        print(f"Transaction store: {transactions:,} transactions → {store_dir}")
     print(
-        f"Cleaned: {original_count:,} → {len(df):,} items → {transactions_written:,} transactions → {output_file}"
+        f"Cleaned: {rows_in:,} → {rows_out:,} items → {transactions:,} transactions → {output_file or store_dir}"
     )
+    return {
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "transactions": transactions,
+    }
+
+
+def write_spmf_file(invoice_nos, item_ids, quantities, profits, output_file,
+                    block_rows=SPMF_BLOCK_ROWS):
+    """
+    Ghi file SPMF theo từng block, format cả cột cùng lúc
+
+    Các mảng đầu vào phải đã được sắp xếp theo InvoiceNo. Mỗi entry được format
+    thành "itemid:quantity:unit_profit" kèm dấu phân cách (" " giữa các item,
+    "\n" ở item cuối của transaction), sau đó ghi từng block ra file.
+
+    Args:
+        output_file: Đường dẫn, hoặc file đã mở (ghi tiếp vào cuối)
+
+    Returns:
+        Số transaction đã ghi
+    """
+    if not isinstance(output_file, str):
+        return _write_spmf_blocks(invoice_nos, item_ids, quantities, profits, output_file, block_rows)
+    with open(output_file, "w", encoding="utf-8") as f:
+        return _write_spmf_blocks(invoice_nos, item_ids, quantities, profits, f, block_rows)
+
+
+def _write_spmf_blocks(invoice_nos, item_ids, quantities, profits, f, block_rows):
+    invoice_nos = np.asarray(invoice_nos)
+    n_rows = len(invoice_nos)
+    last_in_tx = np.ones(n_rows, dtype=bool)
+    last_in_tx[:-1] = invoice_nos[1:] != invoice_nos[:-1]
+    separators = np.where(last_in_tx, "\n", " ")
+
+    for start in range(0, n_rows, block_rows):
+        end = min(start + block_rows, n_rows)
+        tokens = np.char.add(
+            np.asarray(item_ids[start:end]).astype(np.int64).astype(str), ":"
+        )
+        tokens = np.char.add(
+            tokens, np.asarray(quantities[start:end]).astype(np.int64).astype(str)
+        )
+        tokens = np.char.add(tokens, ":")
+        tokens = np.char.add(tokens, np.char.mod("%.2f", profits[start:end]))
+        tokens = np.char.add(tokens, separators[start:end])
+        f.write("".join(tokens.tolist()))
 
-    return df
+    return int(last_in_tx.sum())
 
 
 def preview_spmf_file(
@@ -85,5 +320,6 @@ def preview_spmf_file(
             print(f"{i+1:3d}: {line.strip()}")
 
 
-df = clean_and_filter_data()
-df.to_csv("../data/cleaned_dataset.csv")
+if __name__ == "__main__":
+    df = clean_and_filter_data()
+    df.to_csv("../data/cleaned_dataset.csv")
@@ -1,13 +1,33 @@
-import pandas as pd
-import random
 import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .dataset_cache import iter_source_chunks, load_raw_dataset, normalize_raw_dtypes
+except ImportError:
+    from dataset_cache import iter_source_chunks, load_raw_dataset, normalize_raw_dtypes
+
 
+# Seed mặc định của tỷ lệ lợi nhuận: chạy lại ingestion cho ra đúng Unit_Profit cũ
+PROFIT_SEED = 42
+PROFIT_MARGIN_RANGE = (0.1, 0.4)
 
-def process_data(input_file, output_csv='data/processed/mapped_data.csv', output_json='data/processed/item_mapping.json'):
+# Kiểu dữ liệu gọn cho các cột số sau ingestion
+COMPACT_DTYPES = {
+    "StockCode": "int32",
+    "Quantity": "int32",
+    "UnitPrice": "float32",
+    "Unit_Profit": "float32",
+}
+
+
+def process_data(input_file, output_csv='data/processed/mapped_data.csv', output_json='data/processed/item_mapping.json', use_cache=True, seed=PROFIT_SEED, chunk_rows=None):
     """
     Xử lý dữ liệu từ file Excel:
     1. Đọc dữ liệu file excel
-    2. Tạo cột Unit_Profit (10-40% UnitPrice)
+    2. Tạo cột Unit_Profit (10-40% UnitPrice, tỷ lệ sinh từ seed cố định)
     3. Mã hóa StockCode thành số nguyên
     4. Xuất file CSV và JSON mapping
     
@@ -15,13 +35,20 @@ def process_data(input_file, output_csv='data/processed/mapped_data.csv', output
         input_file: Đường dẫn đến file Excel
         output_csv: Tên file CSV output
         output_json: Tên file JSON mapping
+        use_cache: Dùng snapshot cache của file Excel (xem dataset_cache)
+        seed: Seed của tỷ lệ lợi nhuận (cùng seed + cùng dữ liệu = cùng Unit_Profit)
+        chunk_rows: Xử lý theo từng chunk chunk_rows dòng, bộ nhớ không phụ
+            thuộc kích thước dataset (không dùng snapshot cache, output giống hệt)
         
     Returns:
-        DataFrame đã xử lý
+        DataFrame đã xử lý, hoặc dict thống kê {'rows_out', 'items'} khi chunk_rows
     """
+    if chunk_rows:
+        return process_data_chunked(input_file, output_csv, output_json, seed, chunk_rows)
+
     # 1. Load file .xlsx
     print(f"Đang đọc dữ liệu từ {input_file}...")
-    df = pd.read_excel(input_file)
+    df = load_raw_dataset(input_file, use_cache=use_cache)
     
     print(f"Shape của dataset: {df.shape}")
     print("\n5 dòng đầu tiên:")
@@ -29,19 +56,20 @@ def process_data(input_file, output_csv='data/processed/mapped_data.csv', output
     
     # 2. Tạo cột Unit_Profit (lợi nhuận từ 10-40% doanh thu)
     print("\nĐang tạo cột Unit_Profit...")
-    df['Unit_Profit'] = df['UnitPrice'].apply(lambda price: price * random.uniform(0.1, 0.4))
+    df['Unit_Profit'] = generate_unit_profit(df['UnitPrice'].to_numpy(dtype=np.float64), seed)
     
     # 3. Mã hóa StockCode thành số nguyên
     print("\nĐang mã hóa StockCode...")
-    stockcode_mapping = create_stockcode_mapping(df)
+    stockcode_ids, stockcode_mapping = encode_stockcodes(df['StockCode'])
     
     # Lưu mapping vào file JSON
     with open(output_json, 'w', encoding='utf-8') as f:
         json.dump(stockcode_mapping, f, ensure_ascii=False, indent=2)
     print(f"Đã lưu mapping của {len(stockcode_mapping)} StockCode vào {output_json}")
     
-    # Thay thế StockCode bằng ID số
-    df['StockCode'] = df['StockCode'].astype(str).map(stockcode_mapping)
+    # Thay thế StockCode bằng ID số, ép các cột số về kiểu gọn
+    df['StockCode'] = stockcode_ids
+    df = df.astype({col: dtype for col, dtype in COMPACT_DTYPES.items() if col in df.columns})
     
     # 4. Lưu dữ liệu đã xử lý vào file CSV
     print(f"\nĐang lưu dữ liệu vào {output_csv}...")
@@ -56,6 +84,86 @@ def process_data(input_file, output_csv='data/processed/mapped_data.csv', output
     return df
 
 
+def process_data_chunked(input_file, output_csv, output_json, seed=PROFIT_SEED, chunk_rows=1_000_000):
+    """
+    process_data theo từng chunk: đọc, tạo Unit_Profit, mã hóa và ghi CSV
+    từng phần, chỉ giữ mapping StockCode trong RAM
+
+    Mapping tăng dần theo thứ tự xuất hiện và tỷ lệ lợi nhuận lấy tiếp từ
+    cùng 1 generator, nên output giống process_data đọc cả file.
+
+    Returns:
+        Dict {'rows_out', 'items'}
+    """
+    print(f"Đang xử lý {input_file} theo chunk {chunk_rows:,} dòng...")
+    rng = np.random.default_rng(seed)
+    stockcode_mapping = {}
+    rows = 0
+    tmp_csv = output_csv + ".tmp"
+    with open(tmp_csv, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(iter_source_chunks(input_file, chunk_rows)):
+            chunk = normalize_raw_dtypes(chunk)
+            chunk['Unit_Profit'] = generate_unit_profit(chunk['UnitPrice'].to_numpy(dtype=np.float64), rng)
+            chunk['StockCode'] = encode_stockcodes(chunk['StockCode'], stockcode_mapping)[0]
+            chunk = chunk.astype({col: dtype for col, dtype in COMPACT_DTYPES.items() if col in chunk.columns})
+            chunk.to_csv(f, header=(i == 0), index=False)
+            rows += len(chunk)
+            print(f"\r    - {rows:,} dòng, {len(stockcode_mapping):,} StockCode", end="")
+    print()
+    os.replace(tmp_csv, output_csv)
+
+    with open(output_json, 'w', encoding='utf-8') as f:
+        json.dump(stockcode_mapping, f, ensure_ascii=False, indent=2)
+
+    print("\n=== Hoàn thành! ===")
+    print(f"- File {output_csv}: {rows} dòng")
+    print(f"- File {output_json}: {len(stockcode_mapping)} mã sản phẩm")
+    return {'rows_out': rows, 'items': len(stockcode_mapping)}
+
+
+def generate_unit_profit(unit_prices, seed=PROFIT_SEED):
+    """
+    Unit_Profit = UnitPrice * tỷ lệ ngẫu nhiên trong PROFIT_MARGIN_RANGE
+
+    Tỷ lệ của dòng thứ i chỉ phụ thuộc seed và i, nên cùng dữ liệu đầu vào
+    luôn cho cùng Unit_Profit (các lần mine so sánh được với nhau). seed có
+    thể là np.random.Generator để lấy tiếp tỷ lệ cho chunk sau.
+
+    Returns:
+        Mảng float32
+    """
+    rng = np.random.default_rng(seed)
+    margins = rng.uniform(*PROFIT_MARGIN_RANGE, size=len(unit_prices))
+    return (np.asarray(unit_prices, dtype=np.float64) * margins).astype(np.float32)
+
+
+def encode_stockcodes(stockcodes, stockcode_mapping=None):
+    """
+    Mã hóa StockCode thành ID 1, 2, 3... theo thứ tự xuất hiện đầu tiên
+
+    Làm trên mã categorical (mỗi mã hàng chỉ chuyển sang chuỗi 1 lần) thay vì
+    map từng dòng qua dict. StockCode thiếu được mã hóa như chuỗi 'nan'.
+
+    Args:
+        stockcodes: Series StockCode (categorical hoặc bất kỳ)
+        stockcode_mapping: Mapping của các chunk trước (được cập nhật tại chỗ,
+            mã mới nhận ID tiếp theo)
+
+    Returns:
+        (mảng ID int32 theo từng dòng, dict {stockcode: id})
+    """
+    if stockcode_mapping is None:
+        stockcode_mapping = {}
+    categorical = stockcodes.astype("category").cat
+    ids, first_codes = pd.factorize(categorical.codes.to_numpy())
+    names = np.append(categorical.categories.astype(str).to_numpy(dtype=object), "nan")[first_codes]
+    for name in names.tolist():
+        if name not in stockcode_mapping:
+            stockcode_mapping[name] = len(stockcode_mapping) + 1
+    ids = np.asarray([stockcode_mapping[name] for name in names.tolist()], dtype=np.int32)[ids]
+    return ids, stockcode_mapping
+
+
 def create_stockcode_mapping(df):
     """
     Tạo dictionary mapping từ StockCode sang ID số nguyên
@@ -66,6 +174,4 @@ def create_stockcode_mapping(df):
     Returns:
         Dictionary mapping {stockcode: id}
     """
-    unique_stockcodes = df['StockCode'].unique()
-    stockcode_mapping = {str(code): idx + 1 for idx, code in enumerate(unique_stockcodes)}
-    return stockcode_mapping
+    return encode_stockcodes(df['StockCode'])[1]
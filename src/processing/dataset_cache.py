@@ -0,0 +1,150 @@
+import hashlib
+import itertools
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    SNAPSHOT_FORMAT = "parquet"
+except ImportError:
+    SNAPSHOT_FORMAT = "pkl"
+
+# Tăng version khi thay đổi cách chuẩn hóa dtype để cache cũ tự bị bỏ qua
+SNAPSHOT_VERSION = 1
+
+CATEGORICAL_COLUMNS = ["StockCode", "Description", "Country"]
+
+
+def file_sha256(file_path, chunk_size=1 << 20):
+    """Hash nội dung file (đọc theo từng chunk)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_raw_dtypes(df):
+    """
+    Ép kiểu dữ liệu cố định cho dataset Online Retail
+
+    - InvoiceNo: chuỗi (dataset gốc trộn số và chuỗi 'C...')
+    - StockCode, Description, Country: categorical
+    - Quantity: int32, UnitPrice/CustomerID: float64, InvoiceDate: datetime
+    """
+    df = df.copy()
+    df["InvoiceNo"] = df["InvoiceNo"].astype(str)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            values = df[col]
+            values = values.where(values.isna(), values.astype(str))
+            df[col] = values.astype("category")
+    if "Quantity" in df.columns:
+        df["Quantity"] = df["Quantity"].astype("int32")
+    if "UnitPrice" in df.columns:
+        df["UnitPrice"] = df["UnitPrice"].astype("float64")
+    if "CustomerID" in df.columns:
+        df["CustomerID"] = df["CustomerID"].astype("float64")
+    if "InvoiceDate" in df.columns:
+        df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"])
+    return df
+
+
+def snapshot_path(input_file, content_hash, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(input_file)), ".snapshot_cache")
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    name = f"{stem}-v{SNAPSHOT_VERSION}-{content_hash[:16]}.{SNAPSHOT_FORMAT}"
+    return os.path.join(cache_dir, name)
+
+
+def _read_snapshot(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def _write_snapshot(df, path):
+    tmp_path = path + ".tmp"
+    if path.endswith(".parquet"):
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_source_file(input_file):
+    """Đọc file dataset gốc: Excel, hoặc CSV (vd. dataset tổng hợp cho benchmark)"""
+    if input_file.lower().endswith(".csv"):
+        return pd.read_csv(input_file, dtype={"InvoiceNo": str, "StockCode": str})
+    return pd.read_excel(input_file)
+
+
+def iter_source_chunks(input_file, chunk_rows):
+    """
+    Đọc file dataset gốc theo từng chunk chunk_rows dòng (chưa chuẩn hóa dtype)
+
+    CSV đọc bằng pandas chunksize; Excel đọc bằng openpyxl read-only (từng
+    dòng, không load cả sheet vào RAM).
+
+    Yields:
+        DataFrame theo schema của file gốc
+    """
+    if input_file.lower().endswith(".csv"):
+        yield from pd.read_csv(input_file, dtype={"InvoiceNo": str, "StockCode": str}, chunksize=chunk_rows)
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name) for name in next(rows, ())]
+        while True:
+            batch = list(itertools.islice(rows, chunk_rows))
+            if not batch:
+                return
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def load_raw_dataset(input_file, cache_dir=None, use_cache=True):
+    """
+    Đọc dataset Excel (hoặc CSV cùng schema) thông qua snapshot cache
+
+    Lần đầu đọc file Excel (chậm), chuẩn hóa dtype rồi lưu snapshot dạng cột
+    (Parquet nếu có pyarrow, ngược lại là pickle). Các lần sau chỉ load lại
+    snapshot. Snapshot được đặt tên theo hash nội dung file gốc nên sẽ tự
+    build lại khi file Excel thay đổi.
+
+    Args:
+        input_file: Đường dẫn đến file Excel
+        cache_dir: Thư mục chứa snapshot (mặc định: .snapshot_cache cạnh file gốc)
+        use_cache: False để luôn đọc trực tiếp file Excel
+
+    Returns:
+        DataFrame đã chuẩn hóa dtype
+    """
+    if not use_cache:
+        return normalize_raw_dtypes(read_source_file(input_file))
+
+    content_hash = file_sha256(input_file)
+    path = snapshot_path(input_file, content_hash, cache_dir)
+    if os.path.exists(path):
+        print(f"Đọc snapshot cache: {path}")
+        return _read_snapshot(path)
+
+    print(f"Chưa có snapshot, đọc file gốc {input_file}...")
+    df = normalize_raw_dtypes(read_source_file(input_file))
+
+    snapshot_dir = os.path.dirname(path)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    # Xóa snapshot cũ của cùng file nguồn
+    prefix = os.path.basename(path).rsplit("-", 1)[0] + "-"
+    for name in os.listdir(snapshot_dir):
+        if name.startswith(prefix) and name != os.path.basename(path):
+            os.remove(os.path.join(snapshot_dir, name))
+    _write_snapshot(df, path)
+    print(f"Đã lưu snapshot: {path}")
+    return df
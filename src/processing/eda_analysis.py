@@ -1,9 +1,19 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from pathlib import Path
 
+try:
+    from .dataset_cache import load_raw_dataset
+    from .pipeline_metrics import PipelineMetrics
+except ImportError:
+    from dataset_cache import load_raw_dataset
+    from pipeline_metrics import PipelineMetrics
+
 # Cấu hình matplotlib để hiển thị tiếng Việt
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
@@ -12,72 +22,145 @@ plt.rcParams['axes.unicode_minus'] = False
 sns.set_style("whitegrid")
 sns.set_palette("husl")
 
+# DPI của biểu đồ; preview dùng DPI thấp và mẫu dữ liệu để xem nhanh
+CHART_DPI = 300
+PREVIEW_DPI = 72
+PREVIEW_SAMPLE_ROWS = 100_000
+
+TOP_N = 10
+
+COUNTRY_CHART = 'output/eda_country_distribution.png'
+QUANTITY_CHART = 'output/eda_quantity_outliers.png'
+TOP10_CHART = 'output/eda_top10_comparison.png'
+REPORT_FILE = 'output/eda_report.txt'
 
-def load_data(file_path='src/data/dataset.xlsx'):
-    """Load dữ liệu từ file Excel"""
+
+def load_data(file_path='src/data/dataset.xlsx', use_cache=True):
+    """Load dữ liệu từ file Excel (qua snapshot cache)"""
     print(f"Đang load dữ liệu từ {file_path}...")
-    df = pd.read_excel(file_path)
+    df = load_raw_dataset(file_path, use_cache=use_cache)
     print(f" Đã load {len(df):,} dòng dữ liệu")
     return df
 
 
-def analyze_country_distribution(df):
+class EDAStats:
     """
-    Phân tích 1: Phân bố theo Country
-    Trả về: DataFrame thống kê và đề xuất lọc
+    Các số liệu tổng hợp của EDA, tính 1 lần bởi compute_eda_stats
+
+    Phần in kết quả, biểu đồ và báo cáo đều đọc từ object này thay vì quét
+    lại DataFrame gốc.
+
+    Attributes:
+        total_rows: Số dòng của dataset (sau khi lấy mẫu nếu có)
+        sampled_from: Số dòng gốc nếu dữ liệu được lấy mẫu (preview), ngược lại None
+        country_stats: DataFrame theo Country (Transactions, Total_Quantity,
+            Total_Revenue, Trans_Percent), nhiều giao dịch nhất trước
+        quantities: Mảng Quantity của các dòng Quantity > 0
+        quantity_summary: describe() của quantities
+        top_quantity_rows: Các dòng có Quantity cao nhất
+        product_stats: Quantity/Revenue theo (StockCode, Description), chỉ dòng Quantity > 0
     """
-    print("1. PHÂN TÍCH PHÂN BỐ COUNTRY")
-    
-    # Thống kê theo country
-    country_stats = df.groupby('Country').agg({
-        'InvoiceNo': 'count',
-        'Quantity': 'sum',
-        'UnitPrice': lambda x: (x * df.loc[x.index, 'Quantity']).sum()  # Total Revenue
-    }).rename(columns={
-        'InvoiceNo': 'Transactions',
-        'Quantity': 'Total_Quantity',
-        'UnitPrice': 'Total_Revenue'
+
+    def __init__(self, total_rows, country_stats, quantities, quantity_summary, top_quantity_rows,
+                 product_stats, top_n=TOP_N, sampled_from=None):
+        self.total_rows = total_rows
+        self.country_stats = country_stats
+        self.quantities = quantities
+        self.quantity_summary = quantity_summary
+        self.top_quantity_rows = top_quantity_rows
+        self.product_stats = product_stats
+        self.top_n = top_n
+        self.sampled_from = sampled_from
+
+        self.q1 = quantity_summary['25%']
+        self.q3 = quantity_summary['75%']
+        self.iqr = self.q3 - self.q1
+        self.outlier_threshold = self.q3 + 1.5 * self.iqr
+        self.num_positive = len(quantities)
+        self.num_outliers = int(np.count_nonzero(quantities > self.outlier_threshold))
+        self.outlier_percent = self.num_outliers / self.num_positive * 100 if self.num_positive else 0.0
+        self.uk_percent = country_stats['Trans_Percent'].get('United Kingdom', 0.0)
+
+        self.top_by_quantity = product_stats.sort_values('Quantity', ascending=False).head(top_n)
+        self.top_by_revenue = product_stats.sort_values('Revenue', ascending=False).head(top_n)
+
+    def outliers(self, df):
+        """Các dòng outlier (Quantity > ngưỡng) của df"""
+        return df[(df['Quantity'] > 0) & (df['Quantity'] > self.outlier_threshold)]
+
+
+def compute_eda_stats(df, top_n=TOP_N):
+    """
+    Tính mọi số liệu của EDA trong 1 lượt
+
+    Revenue = Quantity × UnitPrice được tính 1 lần (vector), sau đó mỗi nhóm
+    số liệu là 1 groupby/thao tác vector: Country (1 groupby), quantile của
+    Quantity (1 lần sắp xếp trong describe), outlier, top N dòng theo
+    Quantity và (StockCode, Description) (1 groupby cho cả 2 bảng top N).
+
+    Returns:
+        EDAStats
+    """
+    quantity = df['Quantity']
+    revenue = quantity.to_numpy(dtype=np.float64) * df['UnitPrice'].to_numpy(dtype=np.float64)
+    positive = (quantity > 0).to_numpy()
+
+    country_stats = pd.DataFrame({
+        'Transactions': df['InvoiceNo'],
+        'Total_Quantity': quantity,
+        'Total_Revenue': revenue,
+    }).groupby(df['Country'], observed=True).agg({
+        'Transactions': 'count',
+        'Total_Quantity': 'sum',
+        'Total_Revenue': 'sum',
     })
-    
-    # Tính phần trăm
     country_stats['Trans_Percent'] = (country_stats['Transactions'] / country_stats['Transactions'].sum() * 100)
     country_stats = country_stats.sort_values('Transactions', ascending=False)
-    
+
+    positive_quantity = quantity[positive]
+    top_quantity_rows = df.loc[
+        positive_quantity.nlargest(top_n).index,
+        ['InvoiceNo', 'StockCode', 'Description', 'Quantity', 'UnitPrice', 'Country'],
+    ]
+
+    product_stats = pd.DataFrame({
+        'Quantity': positive_quantity,
+        'Revenue': revenue[positive],
+    }).groupby([df['StockCode'][positive], df['Description'][positive]], observed=True).sum()
+
+    return EDAStats(
+        total_rows=len(df),
+        country_stats=country_stats,
+        quantities=positive_quantity.to_numpy(),
+        quantity_summary=positive_quantity.describe(),
+        top_quantity_rows=top_quantity_rows,
+        product_stats=product_stats,
+        top_n=top_n,
+    )
+
+
+def analyze_country_distribution(stats):
+    """
+    Phân tích 1: Phân bố theo Country
+    Trả về: DataFrame thống kê
+    """
+    print("1. PHÂN TÍCH PHÂN BỐ COUNTRY")
+    country_stats = stats.country_stats
+
     # Hiển thị top 10
     print("\nTop 10 quốc gia theo số lượng giao dịch:")
     print(country_stats.head(10).to_string())
-    
+
     # Thống kê UK
-    uk_percent = country_stats.loc['United Kingdom', 'Trans_Percent']
-    uk_transactions = country_stats.loc['United Kingdom', 'Transactions']
+    uk_percent = stats.uk_percent
+    uk_transactions = country_stats['Transactions'].get('United Kingdom', 0)
     total_transactions = country_stats['Transactions'].sum()
-    
+
     print(f"\n Thống kê UK:")
     print(f"   - Số giao dịch: {uk_transactions:,} / {total_transactions:,}")
     print(f"   - Chiếm: {uk_percent:.2f}% tổng giao dịch")
     print(f"   - Số quốc gia khác: {len(country_stats) - 1}")
-    
-    # Vẽ biểu đồ
-    plt.figure(figsize=(12, 6))
-    top_countries = country_stats.head(15)
-    colors = ['#FF6B6B' if country == 'United Kingdom' else '#4ECDC4' for country in top_countries.index]
-    
-    plt.barh(range(len(top_countries)), top_countries['Transactions'], color=colors)
-    plt.yticks(range(len(top_countries)), top_countries.index)
-    plt.xlabel('Số lượng giao dịch', fontsize=12)
-    plt.title('Top 15 quốc gia theo số lượng giao dịch', fontsize=14, fontweight='bold')
-    plt.gca().invert_yaxis()
-    
-    # Thêm nhãn giá trị
-    for i, (country, row) in enumerate(top_countries.iterrows()):
-        plt.text(row['Transactions'], i, f"  {row['Trans_Percent']:.1f}%", 
-                va='center', fontsize=9)
-    
-    plt.tight_layout()
-    plt.savefig('output/eda_country_distribution.png', dpi=300, bbox_inches='tight')
-    print("\n Đã lưu biểu đồ: output/eda_country_distribution.png")
-    plt.close()
-    
+
     # Đề xuất
     print("\n ĐỀ XUẤT:")
     if uk_percent > 80:
@@ -87,111 +170,61 @@ def analyze_country_distribution(df):
         print(f"     • Giảm nhiễu từ các thị trường nhỏ")
     else:
         print(f"   → CÂN NHẮC GIỮ NHIỀU QUỐC GIA vì UK chỉ chiếm {uk_percent:.1f}%")
-    
+
     return country_stats
 
 
-def analyze_quantity_outliers(df):
+def analyze_quantity_outliers(stats):
     """
     Phân tích 2: Tìm outliers trong Quantity
+    Trả về: Ngưỡng outlier (Q3 + 1.5*IQR)
     """
     print("2. PHÂN TÍCH QUANTITY & OUTLIERS")
-    
-    # Lọc Quantity > 0 (bỏ đơn hủy/trả hàng)
-    df_positive = df[df['Quantity'] > 0].copy()
-    
-    # Thống kê mô tả
+
+    # Thống kê mô tả (chỉ Quantity > 0, bỏ đơn hủy/trả hàng)
     print("\nThống kê Quantity (chỉ đơn hàng dương):")
-    print(df_positive['Quantity'].describe())
-    
-    # Tính quartiles và IQR
-    Q1 = df_positive['Quantity'].quantile(0.25)
-    Q3 = df_positive['Quantity'].quantile(0.75)
-    IQR = Q3 - Q1
-    outlier_threshold = Q3 + 1.5 * IQR
-    
+    print(stats.quantity_summary)
+
     print(f"\n Phân tích Outliers:")
-    print(f"   - Q1 (25%): {Q1:.0f}")
-    print(f"   - Q3 (75%): {Q3:.0f}")
-    print(f"   - IQR: {IQR:.0f}")
-    print(f"   - Ngưỡng outlier (Q3 + 1.5*IQR): {outlier_threshold:.0f}")
-    
-    # Tìm outliers
-    outliers = df_positive[df_positive['Quantity'] > outlier_threshold]
-    print(f"   - Số đơn hàng outlier: {len(outliers):,} / {len(df_positive):,} ({len(outliers)/len(df_positive)*100:.2f}%)")
-    print(f"   - Quantity lớn nhất: {df_positive['Quantity'].max():,}")
-    
+    print(f"   - Q1 (25%): {stats.q1:.0f}")
+    print(f"   - Q3 (75%): {stats.q3:.0f}")
+    print(f"   - IQR: {stats.iqr:.0f}")
+    print(f"   - Ngưỡng outlier (Q3 + 1.5*IQR): {stats.outlier_threshold:.0f}")
+    print(f"   - Số đơn hàng outlier: {stats.num_outliers:,} / {stats.num_positive:,} ({stats.outlier_percent:.2f}%)")
+    print(f"   - Quantity lớn nhất: {stats.quantities.max():,}")
+
     # Top 10 đơn hàng có Quantity cao nhất
     print("\nTop 10 đơn hàng có Quantity cao nhất:")
-    top_qty = df_positive.nlargest(10, 'Quantity')[['InvoiceNo', 'StockCode', 'Description', 'Quantity', 'UnitPrice', 'Country']]
-    print(top_qty.to_string(index=False))
-    
-    # Vẽ biểu đồ phân phối
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-    
-    # Histogram
-    axes[0].hist(df_positive['Quantity'], bins=50, color='skyblue', edgecolor='black', alpha=0.7)
-    axes[0].axvline(outlier_threshold, color='red', linestyle='--', linewidth=2, label=f'Ngưỡng outlier: {outlier_threshold:.0f}')
-    axes[0].set_xlabel('Quantity', fontsize=11)
-    axes[0].set_ylabel('Số lượng đơn hàng', fontsize=11)
-    axes[0].set_title('Phân phối Quantity', fontsize=12, fontweight='bold')
-    axes[0].legend()
-    axes[0].set_xlim(0, min(outlier_threshold * 2, df_positive['Quantity'].max()))
-    
-    # Box plot
-    axes[1].boxplot(df_positive['Quantity'], vert=True)
-    axes[1].set_ylabel('Quantity', fontsize=11)
-    axes[1].set_title('Box Plot - Quantity', fontsize=12, fontweight='bold')
-    axes[1].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig('output/eda_quantity_outliers.png', dpi=300, bbox_inches='tight')
-    print("\n✓ Đã lưu biểu đồ: output/eda_quantity_outliers.png")
-    plt.close()
-    
+    print(stats.top_quantity_rows.to_string(index=False))
+
     # Đề xuất
     print("\n ĐỀ XUẤT:")
-    outlier_percent = len(outliers) / len(df_positive) * 100
-    if outlier_percent > 5:
-        print(f"   → CÓ THỂ LỌC BỎ outliers (>{outlier_threshold:.0f}) vì:")
-        print(f"     • Chiếm {outlier_percent:.2f}% dữ liệu")
+    if stats.outlier_percent > 5:
+        print(f"   → CÓ THỂ LỌC BỎ outliers (>{stats.outlier_threshold:.0f}) vì:")
+        print(f"     • Chiếm {stats.outlier_percent:.2f}% dữ liệu")
         print(f"     • Có thể là đơn bán buôn, không đại diện cho bán lẻ")
     else:
         print(f"   → KHUYẾN NGHỊ GIỮ outliers vì:")
-        print(f"     • Chỉ chiếm {outlier_percent:.2f}% dữ liệu")
+        print(f"     • Chỉ chiếm {stats.outlier_percent:.2f}% dữ liệu")
         print(f"     • Vẫn là giao dịch hợp lệ của doanh nghiệp")
-    
-    return outliers, outlier_threshold
+
+    return stats.outlier_threshold
 
 
-def compare_top10_sellers_vs_revenue(df):
+def compare_top10_sellers_vs_revenue(stats):
     """
     Phân tích 3: So sánh Top 10 Best Sellers vs Top 10 Highest Revenue
+    Trả về: (top10_qty, top10_rev)
     """
     print("3. SO SÁNH TOP 10 BEST SELLERS VS HIGHEST REVENUE")
-    
-    # Lọc dữ liệu dương
-    df_positive = df[df['Quantity'] > 0].copy()
-    df_positive['Revenue'] = df_positive['Quantity'] * df_positive['UnitPrice']
-    
-    # Top 10 theo Quantity (Best Sellers)
-    top10_qty = df_positive.groupby(['StockCode', 'Description']).agg({
-        'Quantity': 'sum',
-        'Revenue': 'sum'
-    }).sort_values('Quantity', ascending=False).head(10)
-    
+    top10_qty, top10_rev = stats.top_by_quantity, stats.top_by_revenue
+
     print("\nTop 10 Best Sellers (theo Quantity):")
     print(top10_qty.to_string())
-    
-    # Top 10 theo Revenue (Highest Revenue)
-    top10_rev = df_positive.groupby(['StockCode', 'Description']).agg({
-        'Quantity': 'sum',
-        'Revenue': 'sum'
-    }).sort_values('Revenue', ascending=False).head(10)
-    
+
     print("\n\nTop 10 Highest Revenue (theo Revenue):")
     print(top10_rev.to_string())
-    
+
     # So sánh
     common_items = set(top10_qty.index) & set(top10_rev.index)
     print(f"\n Số sản phẩm xuất hiện ở cả 2 danh sách: {len(common_items)}/10")
@@ -199,55 +232,7 @@ def compare_top10_sellers_vs_revenue(df):
         print("   Sản phẩm chung:")
         for item in common_items:
             print(f"   - {item[1]} ({item[0]})")
-    
-    # Vẽ biểu đồ cột chồng
-    fig, axes = plt.subplots(2, 1, figsize=(14, 10))
-    
-    # Biểu đồ 1: Top 10 Best Sellers
-    ax1 = axes[0]
-    x_pos = np.arange(len(top10_qty))
-    
-    # Chuẩn hóa để hiển thị trên cùng 1 trục
-    qty_normalized = top10_qty['Quantity'] / top10_qty['Quantity'].max() * 100
-    rev_normalized = top10_qty['Revenue'] / top10_qty['Revenue'].max() * 100
-    
-    width = 0.35
-    ax1.bar(x_pos - width/2, qty_normalized, width, label='Quantity (chuẩn hóa)', color='#FF6B6B', alpha=0.8)
-    ax1.bar(x_pos + width/2, rev_normalized, width, label='Revenue (chuẩn hóa)', color='#4ECDC4', alpha=0.8)
-    
-    ax1.set_xlabel('Sản phẩm', fontsize=11)
-    ax1.set_ylabel('Giá trị chuẩn hóa (%)', fontsize=11)
-    ax1.set_title('Top 10 Best Sellers - So sánh Quantity vs Revenue', fontsize=13, fontweight='bold')
-    ax1.set_xticks(x_pos)
-    ax1.set_xticklabels([desc[:30] + '...' if len(desc) > 30 else desc 
-                         for code, desc in top10_qty.index], rotation=45, ha='right', fontsize=9)
-    ax1.legend()
-    ax1.grid(True, alpha=0.3, axis='y')
-    
-    # Biểu đồ 2: Top 10 Highest Revenue
-    ax2 = axes[1]
-    x_pos = np.arange(len(top10_rev))
-    
-    qty_normalized = top10_rev['Quantity'] / top10_rev['Quantity'].max() * 100
-    rev_normalized = top10_rev['Revenue'] / top10_rev['Revenue'].max() * 100
-    
-    ax2.bar(x_pos - width/2, qty_normalized, width, label='Quantity (chuẩn hóa)', color='#FF6B6B', alpha=0.8)
-    ax2.bar(x_pos + width/2, rev_normalized, width, label='Revenue (chuẩn hóa)', color='#4ECDC4', alpha=0.8)
-    
-    ax2.set_xlabel('Sản phẩm', fontsize=11)
-    ax2.set_ylabel('Giá trị chuẩn hóa (%)', fontsize=11)
-    ax2.set_title('Top 10 Highest Revenue - So sánh Quantity vs Revenue', fontsize=13, fontweight='bold')
-    ax2.set_xticks(x_pos)
-    ax2.set_xticklabels([desc[:30] + '...' if len(desc) > 30 else desc 
-                         for code, desc in top10_rev.index], rotation=45, ha='right', fontsize=9)
-    ax2.legend()
-    ax2.grid(True, alpha=0.3, axis='y')
-    
-    plt.tight_layout()
-    plt.savefig('output/eda_top10_comparison.png', dpi=300, bbox_inches='tight')
-    print("\n✓ Đã lưu biểu đồ: output/eda_top10_comparison.png")
-    plt.close()
-    
+
     # Phân tích insight
     print("\n INSIGHT:")
     print("   • Best Sellers: Sản phẩm bán chạy nhưng giá thấp (hàng phổ thông)")
@@ -256,22 +241,141 @@ def compare_top10_sellers_vs_revenue(df):
         print("   → Sự khác biệt lớn: Sản phẩm bán chạy ≠ Sản phẩm tạo doanh thu cao")
     else:
         print("   → Có sự trùng lặp: Một số sản phẩm vừa bán chạy vừa tạo doanh thu cao")
-    
+
     return top10_qty, top10_rev
 
 
-def generate_final_report(df, country_stats, outlier_threshold):
+# --- Biểu đồ (hàm cấp module, nhận dữ liệu đã tổng hợp để vẽ được trong process con) ---
+
+def plot_country_distribution(country_stats, output_file=COUNTRY_CHART, dpi=CHART_DPI):
+    plt.figure(figsize=(12, 6))
+    top_countries = country_stats.head(15)
+    colors = ['#FF6B6B' if country == 'United Kingdom' else '#4ECDC4' for country in top_countries.index]
+
+    plt.barh(range(len(top_countries)), top_countries['Transactions'], color=colors)
+    plt.yticks(range(len(top_countries)), top_countries.index)
+    plt.xlabel('Số lượng giao dịch', fontsize=12)
+    plt.title('Top 15 quốc gia theo số lượng giao dịch', fontsize=14, fontweight='bold')
+    plt.gca().invert_yaxis()
+
+    # Thêm nhãn giá trị
+    for i, (country, row) in enumerate(top_countries.iterrows()):
+        plt.text(row['Transactions'], i, f"  {row['Trans_Percent']:.1f}%",
+                va='center', fontsize=9)
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt.close()
+    return output_file
+
+
+def plot_quantity_outliers(quantities, outlier_threshold, output_file=QUANTITY_CHART, dpi=CHART_DPI):
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+    # Histogram
+    axes[0].hist(quantities, bins=50, color='skyblue', edgecolor='black', alpha=0.7)
+    axes[0].axvline(outlier_threshold, color='red', linestyle='--', linewidth=2, label=f'Ngưỡng outlier: {outlier_threshold:.0f}')
+    axes[0].set_xlabel('Quantity', fontsize=11)
+    axes[0].set_ylabel('Số lượng đơn hàng', fontsize=11)
+    axes[0].set_title('Phân phối Quantity', fontsize=12, fontweight='bold')
+    axes[0].legend()
+    axes[0].set_xlim(0, min(outlier_threshold * 2, quantities.max()))
+
+    # Box plot
+    axes[1].boxplot(quantities, vert=True)
+    axes[1].set_ylabel('Quantity', fontsize=11)
+    axes[1].set_title('Box Plot - Quantity', fontsize=12, fontweight='bold')
+    axes[1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt.close()
+    return output_file
+
+
+def _plot_normalized_bars(ax, top, title):
+    x_pos = np.arange(len(top))
+
+    # Chuẩn hóa để hiển thị trên cùng 1 trục
+    qty_normalized = top['Quantity'] / top['Quantity'].max() * 100
+    rev_normalized = top['Revenue'] / top['Revenue'].max() * 100
+
+    width = 0.35
+    ax.bar(x_pos - width/2, qty_normalized, width, label='Quantity (chuẩn hóa)', color='#FF6B6B', alpha=0.8)
+    ax.bar(x_pos + width/2, rev_normalized, width, label='Revenue (chuẩn hóa)', color='#4ECDC4', alpha=0.8)
+
+    ax.set_xlabel('Sản phẩm', fontsize=11)
+    ax.set_ylabel('Giá trị chuẩn hóa (%)', fontsize=11)
+    ax.set_title(title, fontsize=13, fontweight='bold')
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels([desc[:30] + '...' if len(desc) > 30 else desc
+                        for code, desc in top.index], rotation=45, ha='right', fontsize=9)
+    ax.legend()
+    ax.grid(True, alpha=0.3, axis='y')
+
+
+def plot_top10_comparison(top10_qty, top10_rev, output_file=TOP10_CHART, dpi=CHART_DPI):
+    fig, axes = plt.subplots(2, 1, figsize=(14, 10))
+    _plot_normalized_bars(axes[0], top10_qty, 'Top 10 Best Sellers - So sánh Quantity vs Revenue')
+    _plot_normalized_bars(axes[1], top10_rev, 'Top 10 Highest Revenue - So sánh Quantity vs Revenue')
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt.close()
+    return output_file
+
+
+def _render_chart(job):
+    func, args, kwargs = job
+    return func(*args, **kwargs)
+
+
+def render_charts(stats, dpi=CHART_DPI, workers=None):
+    """
+    Vẽ các biểu đồ EDA từ EDAStats, mỗi biểu đồ trong 1 process riêng
+
+    Args:
+        dpi: DPI khi lưu PNG (PREVIEW_DPI để xem nhanh)
+        workers: Số process (None = tối đa số biểu đồ/số CPU, 1 = vẽ tuần tự)
+
+    Returns:
+        List file đã lưu
+    """
+    jobs = [
+        (plot_country_distribution, (stats.country_stats, COUNTRY_CHART), {"dpi": dpi}),
+        (plot_quantity_outliers, (stats.quantities, stats.outlier_threshold, QUANTITY_CHART), {"dpi": dpi}),
+        (plot_top10_comparison, (stats.top_by_quantity, stats.top_by_revenue, TOP10_CHART), {"dpi": dpi}),
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        files = [_render_chart(job) for job in jobs]
+    else:
+        # pyplot không thread-safe nên mỗi biểu đồ vẽ trong 1 process
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            files = list(executor.map(_render_chart, jobs))
+    for output_file in files:
+        print(f"✓ Đã lưu biểu đồ: {output_file}")
+    return files
+
+
+def generate_final_report(stats):
     """
     Tạo báo cáo tổng hợp với các đề xuất ngưỡng lọc
     """
     print(" BÁO CÁO TỔNG HỢP VÀ ĐỀ XUẤT NGƯỠNG LỌC")
-    
-    uk_percent = country_stats.loc['United Kingdom', 'Trans_Percent']
-    df_positive = df[df['Quantity'] > 0]
-    outliers = df_positive[df_positive['Quantity'] > outlier_threshold]
-    outlier_percent = len(outliers) / len(df_positive) * 100
-    
-    report = f"""
+
+    uk_percent = stats.uk_percent
+    outlier_threshold = stats.outlier_threshold
+    outlier_percent = stats.outlier_percent
+    filter_outliers = outlier_percent > 5
+    filter_outliers_code = f"df = df[df['Quantity'] <= {outlier_threshold:.0f}]"
+    print_outliers_code = 'print(f"Sau khi lọc outliers: {len(df):,} dòng")'
+    preview_note = (
+        f"\n(PREVIEW: số liệu tính trên mẫu {stats.total_rows:,} / {stats.sampled_from:,} dòng)\n"
+        if stats.sampled_from else ""
+    )
+
+    report = f"""{preview_note}
 
 1. LỌC THEO COUNTRY:
     ĐỀ XUẤT: Chỉ giữ lại 'United Kingdom'
@@ -279,22 +383,22 @@ def generate_final_report(df, country_stats, outlier_threshold):
    LÝ DO:
    • UK chiếm {uk_percent:.1f}% tổng số giao dịch (áp đảo)
    • Dữ liệu đồng nhất về thị trường, văn hóa mua sắm
-   • Giảm nhiễu từ các thị trường nhỏ khác ({len(country_stats)-1} quốc gia)
+   • Giảm nhiễu từ các thị trường nhỏ khác ({len(stats.country_stats)-1} quốc gia)
    • Phù hợp cho phân tích hành vi khách hàng địa phương
    
    CODE THỰC HIỆN:
    df_filtered = df[df['Country'] == 'United Kingdom']
 
 2. LỌC THEO QUANTITY:
-    ĐỀ XUẤT: {"Lọc bỏ outliers" if outlier_percent > 5 else "Giữ lại outliers"}
+    ĐỀ XUẤT: {"Lọc bỏ outliers" if filter_outliers else "Giữ lại outliers"}
    
    LÝ DO:
    • Ngưỡng outlier: {outlier_threshold:.0f} (Q3 + 1.5*IQR)
-   • Số đơn outlier: {len(outliers):,} ({outlier_percent:.2f}%)
-   {"• Có thể là đơn bán buôn, không đại diện cho bán lẻ" if outlier_percent > 5 else "• Tỷ lệ nhỏ, vẫn là giao dịch hợp lệ"}
+   • Số đơn outlier: {stats.num_outliers:,} ({outlier_percent:.2f}%)
+   {"• Có thể là đơn bán buôn, không đại diện cho bán lẻ" if filter_outliers else "• Tỷ lệ nhỏ, vẫn là giao dịch hợp lệ"}
    
    CODE THỰC HIỆN:
-   {"df_filtered = df_filtered[df_filtered['Quantity'] <= " + f"{outlier_threshold:.0f}]" if outlier_percent > 5 else "# Giữ nguyên, không lọc outliers"}
+   {"df_filtered = df_filtered[df_filtered['Quantity'] <= " + f"{outlier_threshold:.0f}]" if filter_outliers else "# Giữ nguyên, không lọc outliers"}
 
 3. LỌC NEGATIVE QUANTITY (ĐƠN TRẢ HÀNG):
     ĐỀ XUẤT: Lọc bỏ đơn hàng có Quantity <= 0
@@ -307,10 +411,10 @@ def generate_final_report(df, country_stats, outlier_threshold):
    df_filtered = df_filtered[df_filtered['Quantity'] > 0]
 
 4. KẾT QUẢ SAU KHI LỌC:
-   • Dữ liệu gốc: {len(df):,} dòng
-   • Sau khi lọc UK: ~{int(len(df) * uk_percent / 100):,} dòng
-   • Sau khi lọc Quantity > 0: ~{len(df_positive):,} dòng
-   • Ước tính cuối cùng: ~{int(len(df_positive) * uk_percent / 100 * (1 - outlier_percent/100 if outlier_percent > 5 else 1)):,} dòng
+   • Dữ liệu gốc: {stats.total_rows:,} dòng
+   • Sau khi lọc UK: ~{int(stats.total_rows * uk_percent / 100):,} dòng
+   • Sau khi lọc Quantity > 0: ~{stats.num_positive:,} dòng
+   • Ước tính cuối cùng: ~{int(stats.num_positive * uk_percent / 100 * (1 - outlier_percent/100 if filter_outliers else 1)):,} dòng
 
 
 
@@ -326,58 +430,89 @@ def apply_filters(df):
     df = df[df['Quantity'] > 0]
     print(f"Sau khi lọc Quantity > 0: {{len(df):,}} dòng")
     
-    # Lọc 3: {"Bỏ outliers" if outlier_percent > 5 else "Giữ outliers"}
-    {"df = df[df['Quantity'] <= " + f"{outlier_threshold:.0f}]" if outlier_percent > 5 else "# Không lọc outliers"}
-    {"print(f\"Sau khi lọc outliers: {{len(df):,}} dòng\")" if outlier_percent > 5 else ""}
+    # Lọc 3: {"Bỏ outliers" if filter_outliers else "Giữ outliers"}
+    {filter_outliers_code if filter_outliers else "# Không lọc outliers"}
+    {print_outliers_code if filter_outliers else ""}
     
     return df
 
 # Sử dụng:
 df_clean = apply_filters(df)
 """
-    
+
     print(report)
-    
+
     # Lưu báo cáo ra file
-    with open('output/eda_report.txt', 'w', encoding='utf-8') as f:
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
         f.write(report)
-    print(" Đã lưu báo cáo: output/eda_report.txt")
-    
+    print(f" Đã lưu báo cáo: {REPORT_FILE}")
+
     return report
 
 
-def run_full_eda(input_file='src/data/dataset.xlsx'):
+def run_full_eda(input_file='src/data/dataset.xlsx', metrics=None, preview=False,
+                 sample_rows=PREVIEW_SAMPLE_ROWS, chart_workers=None):
     """
     Chạy toàn bộ quy trình EDA
+
+    Dataset được tổng hợp 1 lần (compute_eda_stats), các phân tích và báo cáo
+    đọc từ kết quả đó, 3 biểu đồ được vẽ song song.
+
+    Args:
+        metrics: PipelineMetrics để đo từng stage (mặc định ghi output/metrics/pipeline_metrics.jsonl)
+        preview: Xem nhanh: biểu đồ PREVIEW_DPI và số liệu tính trên mẫu sample_rows dòng
+        sample_rows: Số dòng lấy mẫu khi preview (None = không lấy mẫu)
+        chart_workers: Số process vẽ biểu đồ (1 = tuần tự)
     """
-       
+    metrics = metrics or PipelineMetrics("run_full_eda")
+    Path('output').mkdir(exist_ok=True)
+
     # Load dữ liệu
-    df = load_data(input_file)
-    
-    # Phân tích 1: Country
-    country_stats = analyze_country_distribution(df)
-    
-    # Phân tích 2: Quantity Outliers
-    outliers, outlier_threshold = analyze_quantity_outliers(df)
-    
-    # Phân tích 3: Top 10 Comparison
-    top10_qty, top10_rev = compare_top10_sellers_vs_revenue(df)
-    
-    # Tạo báo cáo tổng hợp
-    report = generate_final_report(df, country_stats, outlier_threshold)
-    
+    with metrics.stage("load_data") as stage:
+        df = load_data(input_file)
+        stage.set(rows_out=len(df)).read_file(input_file)
+
+    sampled_from = None
+    if preview and sample_rows and len(df) > sample_rows:
+        sampled_from = len(df)
+        df = df.sample(n=sample_rows, random_state=0).sort_index()
+        print(f" PREVIEW: lấy mẫu {len(df):,} / {sampled_from:,} dòng")
+
+    # Tổng hợp mọi số liệu trong 1 lượt
+    with metrics.stage("compute_eda_stats", rows_in=len(df)) as stage:
+        stats = compute_eda_stats(df)
+        stats.sampled_from = sampled_from
+
+    # Phân tích 1-3 + báo cáo tổng hợp (chỉ đọc từ stats)
+    with metrics.stage("generate_final_report", rows_in=len(df)) as stage:
+        country_stats = analyze_country_distribution(stats)
+        outlier_threshold = analyze_quantity_outliers(stats)
+        top10_qty, top10_rev = compare_top10_sellers_vs_revenue(stats)
+        report = generate_final_report(stats)
+        stage.wrote_file(REPORT_FILE)
+
+    # Biểu đồ
+    with metrics.stage("render_charts") as stage:
+        charts = render_charts(stats, dpi=PREVIEW_DPI if preview else CHART_DPI, workers=chart_workers)
+        stage.wrote_file(*charts)
+
+    outliers = stats.outliers(df)
+
     print("\n" + "="*70)
     print(" HOÀN THÀNH PHÂN TÍCH EDA!")
     print("="*70)
     print("\n Các file output đã tạo:")
-    print("   • output/eda_country_distribution.png - Phân bố theo quốc gia")
-    print("   • output/eda_quantity_outliers.png - Phân tích outliers")
-    print("   • output/eda_top10_comparison.png - So sánh Top 10")
-    print("   • output/eda_report.txt - Báo cáo tổng hợp\n")
-    
+    print(f"   • {COUNTRY_CHART} - Phân bố theo quốc gia")
+    print(f"   • {QUANTITY_CHART} - Phân tích outliers")
+    print(f"   • {TOP10_CHART} - So sánh Top 10")
+    print(f"   • {REPORT_FILE} - Báo cáo tổng hợp\n")
+    metrics.print_summary()
+
     return df, country_stats, outliers, outlier_threshold, top10_qty, top10_rev
 
 
 if __name__ == "__main__":
-    # Chạy EDA
-    results = run_full_eda('src/data/dataset.xlsx')
+    import sys
+
+    # Chạy EDA (--preview: biểu đồ DPI thấp + mẫu dữ liệu)
+    results = run_full_eda('src/data/dataset.xlsx', preview='--preview' in sys.argv)
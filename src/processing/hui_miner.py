@@ -0,0 +1,438 @@
+import contextlib
+
+import numpy as np
+
+
+# Sai số cho phép khi so sánh utility với ngưỡng (utility được cộng dồn
+# theo thứ tự khác nhau nên có thể lệch vài ulp so với tổng chính xác)
+UTILITY_EPSILON = 1e-6
+
+# Số cặp item tối đa sinh ra mỗi lần khi tính EUCS (giới hạn bộ nhớ)
+EUCS_CHUNK_PAIRS = 2_000_000
+
+
+class UtilityList:
+    """
+    Utility list của 1 itemset (HUI-Miner)
+
+    Mỗi phần tử ứng với 1 transaction chứa itemset:
+    - positions: vị trí (trong revised database) của item cuối cùng của itemset
+    - iutils: utility của itemset trong transaction đó
+    - rutils: tổng utility của các item đứng sau itemset (theo thứ tự TWU)
+    """
+
+    __slots__ = ("item", "rank", "positions", "iutils", "rutils", "sum_iutil", "sum_rutil")
+
+    def __init__(self, item, rank, positions, iutils, rutils):
+        self.item = item
+        self.rank = rank
+        self.positions = positions
+        self.iutils = iutils
+        self.rutils = rutils
+        self.sum_iutil = float(iutils.sum())
+        self.sum_rutil = float(rutils.sum())
+
+    def __len__(self):
+        return len(self.positions)
+
+
+class RevisedDatabase:
+    """
+    Transaction database đã "revise": chỉ giữ item tiềm năng, mỗi transaction
+    sắp theo rank (TWU tăng dần). Các mảng được căn theo entry.
+    """
+
+    def __init__(self, rank_to_item, tids, ranks, utils, tx_end=None, rutils=None):
+        self.rank_to_item = rank_to_item
+        self.num_ranks = len(rank_to_item)
+        self.tids = tids
+        self.ranks = ranks
+        self.utils = utils
+        if tx_end is None:
+            tx_end = transaction_end_positions(tids)
+        self.tx_end = tx_end
+
+        # rutil = tổng utility của các entry phía sau trong cùng transaction
+        if rutils is None:
+            csum = np.cumsum(utils)
+            rutils = np.maximum(csum[tx_end] - csum, 0.0)
+        self.rutils = rutils
+
+    def item_order(self):
+        """
+        Thứ tự entry theo (rank, tid) và biên của từng rank
+
+        Returns:
+            (order, bounds): entry của rank r là order[bounds[r]:bounds[r + 1]]
+        """
+        order = np.lexsort((self.tids, self.ranks))
+        bounds = np.searchsorted(self.ranks[order], np.arange(self.num_ranks + 1))
+        return order, bounds
+
+    def utility_list(self, rank, order, bounds):
+        """Utility list của 1-itemset có rank cho trước"""
+        positions = order[bounds[rank]:bounds[rank + 1]]
+        return UtilityList(
+            int(self.rank_to_item[rank]), rank, positions,
+            self.utils[positions], self.rutils[positions],
+        )
+
+    def __len__(self):
+        return len(self.tids)
+
+
+class MiningContext:
+    """Dữ liệu dùng chung trong quá trình duyệt: revised database, EUCS, ngưỡng"""
+
+    def __init__(self, db, eucs_keys, min_utility, max_size, stats=None):
+        self.db = db
+        self.eucs_keys = eucs_keys
+        self.min_utility = min_utility - UTILITY_EPSILON
+        self.max_size = max_size
+        # MinerStats (miner_stats.py) hoặc None = không đếm
+        self.stats = stats
+
+    def eucs_mask(self, rank):
+        """Mask các rank y thỏa EUCS(rank, y) >= min_utility (None = không lọc)"""
+        if self.eucs_keys is None:
+            return None
+        n = self.db.num_ranks
+        base = rank * n
+        lo, hi = np.searchsorted(self.eucs_keys, [base, base + n])
+        mask = np.zeros(n, dtype=bool)
+        mask[self.eucs_keys[lo:hi] - base] = True
+        return mask
+
+    def visit(self, prefix, ul, results):
+        """Duyệt cây con của itemset prefix (context con override để làm thêm việc trước / sau)"""
+        _search(prefix, ul, self, results)
+
+    def prune_extensions(self, prefix, ul, support):
+        """
+        True = bỏ toàn bộ mở rộng của prefix (gọi trước khi ghi các mở rộng đạt ngưỡng)
+
+        support: số transaction của từng mở rộng (mảng theo rank, 0 = không có)
+        """
+        return False
+
+
+class MiningIndex:
+    """
+    Phần không phụ thuộc ngưỡng, dùng chung cho nhiều lần mine
+
+    Gồm TWU của từng item và revised database của *mọi* item (sắp theo TWU
+    tăng dần). Với ngưỡng min_utility, các item tiềm năng chính là các rank
+    cuối (TWU >= min_utility), nên database cho từng ngưỡng chỉ là phép lọc
+    các entry có rank nhỏ, không cần sort lại.
+    """
+
+    def __init__(self, store):
+        self.tu = np.asarray(store.tu)
+        self.twu, self.item_utility, self.item_support = compute_twu(store)
+        self.full_db = build_revised_database(
+            store, np.flatnonzero(self.item_support), self.twu
+        )
+        self._rank_twu = self.twu[self.full_db.rank_to_item]
+        self._eucs = None
+
+    def min_rank(self, min_utility):
+        """Rank nhỏ nhất có TWU >= min_utility"""
+        return int(np.searchsorted(self._rank_twu, min_utility - UTILITY_EPSILON))
+
+    def database(self, min_utility):
+        """Revised database chỉ gồm các item tiềm năng với ngưỡng min_utility"""
+        full = self.full_db
+        keep = full.ranks >= self.min_rank(min_utility)
+        return RevisedDatabase(full.rank_to_item, full.tids[keep], full.ranks[keep], full.utils[keep])
+
+    def eucs_totals(self, min_utility):
+        """(keys, totals) của các cặp có EUCS >= min_utility (EUCS đầy đủ được tính 1 lần)"""
+        if self._eucs is None:
+            self._eucs = build_eucs_totals(self.full_db, self.tu)
+        keys, totals = self._eucs
+        keep = totals >= min_utility - UTILITY_EPSILON
+        return keys[keep], totals[keep]
+
+    def eucs_keys(self, min_utility):
+        """Các cặp (rank) có EUCS >= min_utility"""
+        return self.eucs_totals(min_utility)[0]
+
+
+def compute_twu(store):
+    """TWU, utility và support của từng item (mảng đánh index theo item ID)"""
+    items = np.asarray(store.items)
+    entry_tids = store.transaction_ids()
+    n_items = int(items.max()) + 1 if len(items) else 0
+    twu = np.bincount(items, weights=np.asarray(store.tu)[entry_tids], minlength=n_items)
+    utility = np.bincount(items, weights=store.utilities, minlength=n_items)
+    support = np.bincount(items, minlength=n_items)
+    return twu, utility, support
+
+
+def transaction_end_positions(tids):
+    """Vị trí entry cuối cùng của transaction chứa mỗi entry (tids đã sort)"""
+    is_last = np.ones(len(tids), dtype=bool)
+    is_last[:-1] = tids[1:] != tids[:-1]
+    last_pos = np.flatnonzero(is_last)
+    return np.repeat(last_pos, np.diff(np.concatenate(([-1], last_pos))))
+
+
+def build_revised_database(store, promising_items, twu):
+    """
+    Tạo revised database từ các item tiềm năng
+
+    Item được sắp theo TWU tăng dần (rank, hòa thì theo item ID). Mỗi
+    transaction chỉ giữ item tiềm năng, sắp theo rank.
+    """
+    promising_items = np.asarray(promising_items, dtype=np.int64)
+    order = np.lexsort((promising_items, twu[promising_items]))
+    rank_to_item = promising_items[order]
+
+    item_rank = np.full(len(twu), -1, dtype=np.int64)
+    item_rank[rank_to_item] = np.arange(len(rank_to_item))
+
+    items = np.asarray(store.items)
+    ranks = item_rank[items]
+    mask = ranks >= 0
+    tids = store.transaction_ids()[mask].astype(np.int64)
+    ranks = ranks[mask]
+    utils = np.asarray(store.utilities)[mask]
+
+    order = np.lexsort((ranks, tids))
+    return RevisedDatabase(rank_to_item, tids[order], ranks[order], utils[order])
+
+
+def build_utility_lists(db, min_rank=0):
+    """Utility list của từng item (1-itemset) có rank >= min_rank, theo thứ tự rank"""
+    order, bounds = db.item_order()
+    return [db.utility_list(r, order, bounds) for r in range(min_rank, db.num_ranks)]
+
+
+def _expand_ranges(starts, counts):
+    """
+    Trải các khoảng [starts[i], starts[i] + counts[i]) thành 1 mảng phẳng
+
+    Returns:
+        (src, values): src[k] là chỉ số khoảng chứa values[k]
+    """
+    total = int(counts.sum())
+    src = np.repeat(np.arange(len(counts)), counts)
+    if total == 0:
+        return src, src.copy()
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return src, starts[src] + offsets
+
+
+def build_eucs_totals(db, tu, chunk_pairs=EUCS_CHUNK_PAIRS):
+    """
+    Estimated Utility Co-occurrence Structure (FHM)
+
+    EUCS(x, y) = tổng TU của các transaction chứa cả x và y, với x < y theo
+    rank, mã hóa thành key x * n + y. Các cặp được sinh theo từng chunk để
+    giới hạn bộ nhớ.
+
+    Returns:
+        (keys, totals): mảng key đã sort và EUCS tương ứng
+    """
+    n_entries = len(db)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    if n_entries == 0:
+        return empty
+
+    tu = np.asarray(tu)
+    # Số cặp (entry, entry phía sau trong cùng transaction)
+    pair_counts = db.tx_end - np.arange(n_entries)
+    cum_pairs = np.cumsum(pair_counts)
+
+    part_keys = []
+    part_weights = []
+    start = 0
+    while start < n_entries:
+        done = cum_pairs[start - 1] if start > 0 else 0
+        end = int(np.searchsorted(cum_pairs, done + chunk_pairs, side="right"))
+        end = max(end, start + 1)
+
+        src, second = _expand_ranges(np.arange(start, end) + 1, pair_counts[start:end])
+        if len(second):
+            first = src + start
+            keys = db.ranks[first] * db.num_ranks + db.ranks[second]
+            uniq, inverse = np.unique(keys, return_inverse=True)
+            part_keys.append(uniq)
+            part_weights.append(np.bincount(inverse, weights=tu[db.tids[first]]))
+        start = end
+
+    if not part_keys:
+        return empty
+    uniq, inverse = np.unique(np.concatenate(part_keys), return_inverse=True)
+    return uniq, np.bincount(inverse, weights=np.concatenate(part_weights))
+
+
+def _search(prefix, ul, ctx, results):
+    """
+    Duyệt theo chiều sâu các mở rộng của itemset prefix (utility list ul)
+
+    Utility list của mọi mở rộng Py được tính trực tiếp từ phần còn lại của
+    các transaction chứa prefix (sau item cuối), trong 1 lần thao tác mảng
+    thay vì giao từng cặp utility list.
+    """
+    db = ctx.db
+    stats = ctx.stats
+    positions = ul.positions
+    src, ent = _expand_ranges(positions + 1, db.tx_end[positions] - positions)
+    if stats is not None:
+        stats.count("nodes_expanded")
+    if len(ent) == 0:
+        return
+
+    ranks = db.ranks[ent]
+    if stats is not None:
+        num_candidates = int(np.count_nonzero(np.bincount(ranks, minlength=db.num_ranks)))
+        stats.count("candidates_generated", num_candidates)
+    # EUCS pruning: bỏ các y mà cặp (x, y) không đạt ngưỡng
+    mask = ctx.eucs_mask(ul.rank)
+    if mask is not None:
+        keep = mask[ranks]
+        src, ent, ranks = src[keep], ent[keep], ranks[keep]
+        if len(ent) == 0:
+            if stats is not None:
+                stats.count("pruned_eucs", num_candidates)
+            return
+
+    iutils = ul.iutils[src] + db.utils[ent]
+    rutils = db.rutils[ent]
+    sum_iutil = np.bincount(ranks, weights=iutils, minlength=db.num_ranks)
+    sum_rutil = np.bincount(ranks, weights=rutils, minlength=db.num_ranks)
+    support = np.bincount(ranks, minlength=db.num_ranks)
+    if ctx.prune_extensions(prefix, ul, support):
+        return
+
+    found = np.flatnonzero((support > 0) & (sum_iutil >= ctx.min_utility))
+    for r in found:
+        results[prefix + (int(db.rank_to_item[r]),)] = {
+            'utility': float(sum_iutil[r]),
+            'support': int(support[r]),
+        }
+    if stats is not None:
+        checked = support[support > 0]
+        stats.count("pruned_eucs", num_candidates - len(checked))
+        stats.count("exact_utility_checks", len(checked))
+        stats.count("hui_found", len(found))
+        stats.count("pruned_exact_utility", len(checked) - len(found))
+        stats.observe("tidlist_length", checked)
+
+    if ctx.max_size is not None and len(prefix) + 1 >= ctx.max_size:
+        return
+
+    # Pruning: iutil + rutil < min_utility thì mọi mở rộng đều không đạt
+    expandable = np.flatnonzero((support > 0) & (sum_iutil + sum_rutil >= ctx.min_utility))
+    if stats is not None:
+        stats.count("pruned_upper_bound", len(checked) - len(expandable))
+    if len(expandable) == 0:
+        return
+
+    order = np.argsort(ranks, kind="stable")
+    lows = np.searchsorted(ranks[order], expandable)
+    highs = lows + support[expandable]
+    for r, lo, hi in zip(expandable.tolist(), lows.tolist(), highs.tolist()):
+        idx = order[lo:hi]
+        child = UtilityList(int(db.rank_to_item[r]), r, ent[idx], iutils[idx], rutils[idx])
+        ctx.visit(prefix + (child.item,), child, results)
+
+
+def prepare_search(index, min_utility, max_size, stats=None):
+    """
+    Chuẩn bị dữ liệu cho 1 lần mine
+
+    Returns:
+        (min_rank, db, eucs_keys)
+    """
+    min_rank = index.min_rank(min_utility)
+    db = index.database(min_utility)
+    print(f"    - Found {db.num_ranks - min_rank} promising items (TWU >= {min_utility}) out of {db.num_ranks} total.")
+    if stats is not None:
+        stats.count("items_total", db.num_ranks)
+        stats.count("items_pruned_twu", min_rank)
+        stats.count("items_promising", db.num_ranks - min_rank)
+
+    # EUCS chỉ có ích khi duyệt sâu hơn size 2 (size 2 đã được tính trực tiếp)
+    eucs_keys = None
+    if max_size is None or max_size > 2:
+        eucs_keys = index.eucs_keys(min_utility)
+        print(f"    - EUCS: {len(eucs_keys)} promising pairs")
+    return min_rank, db, eucs_keys
+
+
+def mine_high_utility_itemsets(store, min_utility, max_size=None, index=None, stats=None):
+    """
+    Khai phá High-Utility Itemsets bằng utility list (HUI-Miner/FHM)
+
+    Args:
+        store: TransactionStore
+        min_utility: Ngưỡng utility tối thiểu
+        max_size: Kích thước itemset tối đa (None = không giới hạn)
+        index: MiningIndex dùng chung giữa các lần mine (None = tạo mới)
+        stats: MinerStats để đếm candidate/pruning và đo thời gian từng phase
+
+    Returns:
+        Dict {itemset (tuple item ID tăng dần): {'utility', 'support'}}
+        sắp theo (kích thước, itemset)
+    """
+    phase = stats.phase if stats is not None else _no_phase
+    if index is None:
+        with phase("build_index"):
+            index = MiningIndex(store)
+    with phase("prepare_search"):
+        min_rank, db, eucs_keys = prepare_search(index, min_utility, max_size, stats)
+        utility_lists = build_utility_lists(db, min_rank)
+
+    ctx = MiningContext(db, eucs_keys, min_utility, max_size, stats)
+    raw_results = {}
+    with phase("search"):
+        for ul in utility_lists:
+            mine_item(ul, ctx, raw_results)
+    return finalize_results(raw_results)
+
+
+@contextlib.contextmanager
+def _no_phase(name):
+    yield
+
+
+def mine_item(ul, ctx, results):
+    """Mine toàn bộ itemset có item đầu tiên (theo rank) là ul.item"""
+    stats = ctx.stats
+    if ul.sum_iutil >= ctx.min_utility:
+        results[(ul.item,)] = {
+            'utility': ul.sum_iutil,
+            'support': len(ul),
+        }
+    if stats is not None:
+        found = int(ul.sum_iutil >= ctx.min_utility)
+        stats.count("exact_utility_checks")
+        stats.count("hui_found", found)
+        stats.count("pruned_exact_utility", 1 - found)
+        stats.observe("tidlist_length", [len(ul)])
+    if ctx.max_size == 1:
+        return
+    if ul.sum_iutil + ul.sum_rutil < ctx.min_utility:
+        if stats is not None:
+            stats.count("pruned_upper_bound")
+        return
+    ctx.visit((ul.item,), ul, results)
+
+
+def finalize_results(raw_results):
+    """Chuẩn hóa itemset thành tuple tăng dần, sắp theo (kích thước, itemset)"""
+    results = {tuple(sorted(itemset)): info for itemset, info in raw_results.items()}
+    return dict(sorted(results.items(), key=lambda kv: (len(kv[0]), kv[0])))
+
+
+def filter_itemsets(itemsets, min_utility):
+    """
+    Lọc kết quả theo ngưỡng cao hơn
+
+    HUI với ngưỡng cao là tập con của HUI với ngưỡng thấp (cùng max_size),
+    nên lọc lại kết quả của ngưỡng thấp cho kết quả y hệt mine lại.
+    """
+    threshold = min_utility - UTILITY_EPSILON
+    return {k: v for k, v in itemsets.items() if v['utility'] >= threshold}
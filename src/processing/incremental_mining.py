@@ -0,0 +1,512 @@
+import json
+import os
+from itertools import combinations
+
+import numpy as np
+
+try:
+    from .transaction_store import (
+        TransactionStore, concat_transaction_stores, load_transaction_store, save_transaction_store,
+        take_transactions,
+    )
+    from .hui_miner import (
+        UTILITY_EPSILON, MiningIndex, _expand_ranges, build_revised_database, compute_twu,
+        finalize_results, mine_high_utility_itemsets,
+    )
+except ImportError:
+    from transaction_store import (
+        TransactionStore, concat_transaction_stores, load_transaction_store, save_transaction_store,
+        take_transactions,
+    )
+    from hui_miner import (
+        UTILITY_EPSILON, MiningIndex, _expand_ranges, build_revised_database, compute_twu,
+        finalize_results, mine_high_utility_itemsets,
+    )
+
+
+STATE_VERSION = 1
+
+# Ngưỡng TWU "pre-large" = tỉ lệ này x min_utility. Thấp hơn: state lớn hơn
+# nhưng chịu được nhiều batch hơn trước khi phải mine lại toàn bộ.
+DEFAULT_LOWER_RATIO = 0.5
+
+# Khi tổng tid-list của các item cần sửa >= tỉ lệ này x số transaction thì
+# mine lại toàn bộ sẽ rẻ hơn sửa từng item
+FULL_REMINE_RATIO = 1.0
+
+TRANSACTION_STORE_DIR = 'data/processed/transaction_store'
+INCREMENTAL_STATE_DIR = 'data/processed/incremental_state'
+
+
+class IncrementalState:
+    """
+    Trạng thái của incremental miner
+
+    - store: toàn bộ transaction đã nhận (dùng khi phải quét lại dữ liệu cũ)
+    - itemsets: {itemset: {'utility', 'support', 'twu'}} với giá trị chính xác,
+      đóng với tập con (mọi tập con của 1 itemset trong state cũng nằm trong state)
+    - item_slack: bất biến "itemset X không có trong state thì
+      TWU(X) < min(item_slack[i], i thuộc X)". Lúc mine toàn bộ mọi slack bằng
+      lower_utility; mỗi batch cộng thêm TWU của item trên batch. Khi slack
+      của 1 item vượt min_utility thì bất biến không còn bao được HUI, item
+      đó được "sửa" (mine lại riêng các itemset chứa nó) và slack về lower_utility.
+    - batches: số batch đã áp dụng (batch thứ k có index k, bắt đầu từ 0)
+    - item_reset: index batch đầu tiên sau lần slack của item được đặt về
+      lower_utility gần nhất; batch có index >= item_reset[i] đã được cộng
+      vào slack của i (dùng khi bỏ batch, xem expire_batch)
+    """
+
+    def __init__(self, store, itemsets, min_utility, max_size, lower_utility, item_slack,
+                 item_reset=None, batches=0):
+        self.store = store
+        self.itemsets = itemsets
+        self.min_utility = min_utility
+        self.max_size = max_size
+        self.lower_utility = lower_utility
+        self.item_slack = item_slack
+        if item_reset is None:
+            item_reset = np.full(len(item_slack), batches, dtype=np.int64)
+        self.item_reset = item_reset
+        self.batches = batches
+
+    def slack_of(self, items):
+        """Slack của từng item (item chưa từng xuất hiện: TWU cũ = 0 < lower_utility)"""
+        items = np.asarray(items, dtype=np.int64)
+        slack = np.full(len(items), self.lower_utility)
+        known = items < len(self.item_slack)
+        slack[known] = self.item_slack[items[known]]
+        return slack
+
+    def high_utility_itemsets(self):
+        """HUI hiện tại (cùng định dạng với mine_high_utility_itemsets)"""
+        threshold = self.min_utility - UTILITY_EPSILON
+        return finalize_results({
+            itemset: {'utility': info['utility'], 'support': info['support']}
+            for itemset, info in self.itemsets.items()
+            if info['utility'] >= threshold
+        })
+
+
+def _enumerate_itemsets(db, tu, max_size, accept):
+    """
+    Duyệt mọi itemset (size <= max_size) trên revised database, tính utility,
+    support và TWU. accept(prefix, items, twu) trả về mask các mở rộng
+    prefix + (item,) được giữ lại (và duyệt tiếp); điều kiện phải
+    anti-monotone để việc prune là đúng.
+
+    Returns:
+        Dict {itemset (tuple tăng dần): {'utility', 'support', 'twu'}}
+    """
+    results = {}
+    entry_tu = tu[db.tids]
+    order, bounds = db.item_order()
+    items = np.asarray(db.rank_to_item)
+    twu = np.bincount(db.ranks, weights=entry_tu, minlength=db.num_ranks)
+    utility = np.bincount(db.ranks, weights=db.utils, minlength=db.num_ranks)
+
+    present = np.flatnonzero(np.diff(bounds))
+    keep = accept((), items[present], twu[present])
+    stack = []
+    for r in present[keep].tolist():
+        positions = order[bounds[r]:bounds[r + 1]]
+        itemset = (int(items[r]),)
+        results[itemset] = {
+            'utility': float(utility[r]),
+            'support': len(positions),
+            'twu': float(twu[r]),
+        }
+        stack.append((itemset, positions, db.utils[positions]))
+
+    while stack:
+        prefix, positions, iutils = stack.pop()
+        if len(prefix) >= max_size:
+            continue
+        src, ent = _expand_ranges(positions + 1, db.tx_end[positions] - positions)
+        if len(ent) == 0:
+            continue
+        ranks = db.ranks[ent]
+        child_iutils = iutils[src] + db.utils[ent]
+        sum_iutil = np.bincount(ranks, weights=child_iutils, minlength=db.num_ranks)
+        sum_twu = np.bincount(ranks, weights=entry_tu[ent], minlength=db.num_ranks)
+        support = np.bincount(ranks, minlength=db.num_ranks)
+
+        present = np.flatnonzero(support)
+        keep = accept(prefix, items[present], sum_twu[present])
+        children = present[keep]
+        if len(children) == 0:
+            continue
+
+        child_order = np.argsort(ranks, kind="stable")
+        lows = np.searchsorted(ranks[child_order], children)
+        for r, lo in zip(children.tolist(), lows.tolist()):
+            idx = child_order[lo:lo + support[r]]
+            itemset = tuple(sorted(prefix + (int(items[r]),)))
+            results[itemset] = {
+                'utility': float(sum_iutil[r]),
+                'support': int(support[r]),
+                'twu': float(sum_twu[r]),
+            }
+            stack.append((itemset, ent[idx], child_iutils[idx]))
+    return results
+
+
+def mine_twu_itemsets(store, min_twu, max_size, index=None):
+    """Mọi itemset (size <= max_size) có TWU >= min_twu, kèm utility/support/TWU"""
+    if index is None:
+        index = MiningIndex(store)
+    db = index.database(min_twu)
+    threshold = min_twu - UTILITY_EPSILON
+    return _enumerate_itemsets(
+        db, index.tu, max_size, lambda prefix, items, twu: twu >= threshold
+    )
+
+
+def build_incremental_state(store, min_utility, max_size=2, lower_ratio=DEFAULT_LOWER_RATIO, batches=0):
+    """
+    Mine toàn bộ store 1 lần và tạo state cho các lần cập nhật sau
+
+    Args:
+        store: TransactionStore
+        min_utility: Ngưỡng utility tối thiểu
+        max_size: Kích thước itemset tối đa (bắt buộc, số itemset có TWU cao
+            không giới hạn kích thước là quá lớn để lưu)
+        lower_ratio: Ngưỡng TWU pre-large = lower_ratio * min_utility
+        batches: Số batch đã áp dụng trước đó (khi mine lại toàn bộ giữa chừng)
+
+    Returns:
+        IncrementalState
+    """
+    if max_size is None:
+        raise ValueError("Incremental mining requires a bounded max_size")
+    lower_utility = lower_ratio * min_utility
+    itemsets = mine_twu_itemsets(store, lower_utility, max_size)
+    print(f"    - Incremental state: {len(itemsets):,} itemsets with TWU >= {lower_utility:,.2f}")
+    n_items = int(np.max(store.items)) + 1 if store.num_entries else 0
+    item_slack = np.full(n_items, lower_utility)
+    return IncrementalState(store, itemsets, min_utility, max_size, lower_utility, item_slack, batches=batches)
+
+
+def rescan_itemsets(store, itemsets):
+    """
+    Tính chính xác utility, support, TWU của các itemset trên store
+    (giao tid-list của từng item)
+    """
+    items = np.asarray(store.items)
+    order = np.argsort(items, kind="stable")
+    sorted_items = items[order]
+    entry_tids = store.transaction_ids()[order]
+    entry_utils = np.asarray(store.utilities)[order]
+    tu = np.asarray(store.tu)
+
+    # Entry của item i nằm trong [bounds[i], bounds[i + 1]) (tính 1 lần thay vì searchsorted mỗi item)
+    bounds = np.zeros(int(sorted_items[-1]) + 2 if len(sorted_items) else 1, dtype=np.int64)
+    np.cumsum(np.bincount(sorted_items), out=bounds[1:])
+
+    def item_range(item):
+        if item + 1 >= len(bounds):
+            return bounds[-1], bounds[-1]
+        return bounds[item], bounds[item + 1]
+
+    results = {}
+    for itemset in itemsets:
+        ranges = [item_range(item) for item in itemset]
+        common = entry_tids[ranges[0][0]:ranges[0][1]]
+        for lo, hi in ranges[1:]:
+            common = np.intersect1d(common, entry_tids[lo:hi], assume_unique=True)
+        utility = 0.0
+        for lo, hi in ranges:
+            pos = np.searchsorted(entry_tids[lo:hi], common)
+            utility += float(entry_utils[lo:hi][pos].sum())
+        results[itemset] = {
+            'utility': utility,
+            'support': len(common),
+            'twu': float(tu[common].sum()),
+        }
+    return results
+
+
+def apply_batch(state, batch, lower_ratio=DEFAULT_LOWER_RATIO):
+    """
+    Cập nhật HUI với 1 batch transaction mới
+
+    Batch được mine riêng (nhỏ) để lấy utility/support/TWU trên batch của:
+    - itemset đã có trong state: cộng dồn, không cần dữ liệu cũ
+    - itemset chưa có, với TWU trên batch + slack >= min_utility: có thể vượt
+      ngưỡng nên quét lại dữ liệu cũ cho đúng các itemset này
+    Item có slack vượt min_utility sau batch được sửa bằng repair_item
+    (giống safety bound của thuật toán pre-large, nhưng chỉ quét lại dữ
+    liệu của item đó thay vì toàn bộ). Nếu có quá nhiều item cần sửa thì
+    mine lại toàn bộ.
+
+    Args:
+        state: IncrementalState
+        batch: TransactionStore hoặc list transaction
+        lower_ratio: Dùng khi phải mine lại toàn bộ
+
+    Returns:
+        IncrementalState (state được cập nhật tại chỗ, trừ khi phải mine lại toàn bộ);
+        batch có index bằng state.batches trước khi gọi
+    """
+    if not isinstance(batch, TransactionStore):
+        batch = TransactionStore.from_transactions(batch)
+    combined = concat_transaction_stores(state.store, batch)
+
+    batch_twu, _, batch_support = compute_twu(batch)
+
+    # Mine batch: giữ itemset đã có trong state hoặc có thể vượt ngưỡng.
+    # X chưa có trong state => TWU cũ < min slack của các item trong X
+    known = state.itemsets
+    min_utility = state.min_utility - UTILITY_EPSILON
+
+    def accept(prefix, items, twu):
+        slack = state.slack_of(items)
+        if prefix:
+            slack = np.minimum(slack, state.slack_of(prefix).min())
+        keep = twu + slack >= min_utility
+        for k in np.flatnonzero(~keep).tolist():
+            keep[k] = tuple(sorted(prefix + (int(items[k]),))) in known
+        return keep
+
+    db = build_revised_database(batch, np.flatnonzero(batch_support), batch_twu)
+    batch_stats = _enumerate_itemsets(db, np.asarray(batch.tu), state.max_size, accept)
+
+    candidates = []
+    for itemset, info in batch_stats.items():
+        if itemset in known:
+            for key in ('utility', 'support', 'twu'):
+                known[itemset][key] += info[key]
+        else:
+            candidates.append(itemset)
+
+    # Thêm mọi candidate (giá trị đã chính xác) để state vẫn đóng với tập con
+    rescanned = rescan_itemsets(state.store, candidates)
+    for itemset in candidates:
+        old, new = rescanned[itemset], batch_stats[itemset]
+        known[itemset] = {key: old[key] + new[key] for key in ('utility', 'support', 'twu')}
+    print(f"    - Batch: {len(batch):,} transactions, {len(batch_stats) - len(candidates):,} itemsets updated, "
+          f"{len(candidates):,} rescanned on old data")
+
+    n_items = max(len(state.item_slack), len(batch_twu))
+    item_slack = state.slack_of(np.arange(n_items))
+    item_slack[:len(batch_twu)] += batch_twu
+    # Item mới: TWU cũ = 0, mọi batch trước đều "đã cộng" (đóng góp 0)
+    item_reset = np.zeros(n_items, dtype=np.int64)
+    item_reset[:len(state.item_reset)] = state.item_reset
+    state.store = combined
+    state.item_slack = item_slack
+    state.item_reset = item_reset
+    state.batches += 1
+    hot_items = np.flatnonzero(item_slack > state.min_utility)
+    if len(hot_items):
+        _, _, support = compute_twu(combined)
+        if support[hot_items].sum() >= FULL_REMINE_RATIO * len(combined):
+            print(f"    - {len(hot_items):,} item(s) exceeded the pre-large margin, re-mining everything")
+            return build_incremental_state(
+                combined, state.min_utility, state.max_size, lower_ratio, batches=state.batches
+            )
+    for item in hot_items.tolist():
+        repair_item(state, item)
+    if len(hot_items):
+        print(f"    - Repaired {len(hot_items):,} item(s) whose slack exceeded min_utility")
+    return state
+
+
+def expire_batch(state, expired, remaining, batch_index=None):
+    """
+    Bỏ 1 batch cũ khỏi state (dùng cho cửa sổ trượt)
+
+    TWU chỉ giảm nên bất biến slack vẫn đúng; chỉ cần trừ utility/support/TWU
+    trên batch bị bỏ của các itemset trong state. Itemset có TWU còn lại dưới
+    lower_utility bị xóa (tập con vẫn được giữ, state vẫn đóng với tập con).
+
+    Slack của item i được trừ TWU của i trên batch khi batch đã được cộng vào
+    slack (batch_index >= item_reset[i]): itemset X chứa i không có trong
+    state có TWU < lower_utility lúc reset, sau đó chỉ tăng tối đa bằng TWU
+    của i trên các batch đã cộng, nên bỏ 1 batch đó thì cận giảm đúng bằng
+    phần của batch. Batch có trước lần reset không được trừ.
+
+    Args:
+        state: IncrementalState
+        expired: TransactionStore của batch bị bỏ
+        remaining: TransactionStore của các transaction còn lại (state.store mới)
+        batch_index: Index của batch khi được áp dụng bằng apply_batch
+            (None = batch có từ lúc tạo state, không trừ slack)
+
+    Returns:
+        IncrementalState (cập nhật tại chỗ)
+    """
+    known = state.itemsets
+
+    def accept(prefix, items, twu):
+        return np.array(
+            [tuple(sorted(prefix + (int(item),))) in known for item in items.tolist()], dtype=bool
+        )
+
+    expired_twu, _, support = compute_twu(expired)
+    db = build_revised_database(expired, np.flatnonzero(support), expired_twu)
+    expired_stats = _enumerate_itemsets(db, np.asarray(expired.tu), state.max_size, accept)
+
+    for itemset, info in expired_stats.items():
+        for key in ('utility', 'support', 'twu'):
+            known[itemset][key] -= info[key]
+
+    threshold = state.lower_utility - UTILITY_EPSILON
+    dropped = [itemset for itemset, info in known.items()
+               if info['support'] == 0 or info['twu'] < threshold]
+    for itemset in dropped:
+        del known[itemset]
+    if batch_index is not None:
+        n = min(len(expired_twu), len(state.item_slack))
+        counted = state.item_reset[:n] <= batch_index
+        slack = state.item_slack[:n]
+        slack[counted] = np.maximum(slack[counted] - expired_twu[:n][counted], state.lower_utility)
+    state.store = remaining
+    print(f"    - Expired: {len(expired):,} transactions, {len(expired_stats):,} itemsets updated, "
+          f"{len(dropped):,} dropped")
+    return state
+
+
+def repair_item(state, item):
+    """
+    Khôi phục bất biến cho 1 item: thêm mọi itemset chứa item có
+    TWU >= lower_utility (mine trên các transaction chứa item), kèm các tập
+    con còn thiếu để state vẫn đóng với tập con, rồi đặt slack về lower_utility.
+    """
+    store = state.store
+    tids = store.transaction_ids()[np.asarray(store.items) == item]
+    sub_store = take_transactions(store, tids)
+
+    # Trong store con, TWU/utility/support của itemset chứa item là giá trị
+    # trên toàn bộ dữ liệu (mọi transaction chứa itemset đều chứa item).
+    # Prefix chưa chứa item chỉ được mở rộng khi vẫn còn chỗ để thêm item.
+    index = MiningIndex(sub_store)
+    threshold = state.lower_utility - UTILITY_EPSILON
+
+    def accept(prefix, items, twu):
+        keep = twu >= threshold
+        if item not in prefix and len(prefix) + 1 >= state.max_size:
+            keep &= items == item
+        return keep
+
+    found = {
+        itemset: info
+        for itemset, info in _enumerate_itemsets(
+            index.database(state.lower_utility), index.tu, state.max_size, accept
+        ).items()
+        if item in itemset
+    }
+    state.itemsets.update(found)
+
+    missing = set()
+    for itemset in found:
+        for size in range(1, len(itemset)):
+            for subset in combinations(itemset, size):
+                if subset not in state.itemsets:
+                    missing.add(subset)
+    state.itemsets.update(rescan_itemsets(store, sorted(missing)))
+    state.item_slack[item] = state.lower_utility
+    state.item_reset[item] = state.batches
+
+
+def save_incremental_state(state, state_dir=INCREMENTAL_STATE_DIR):
+    """Ghi state ra thư mục: transaction store + các mảng itemset (.npy) + meta.json"""
+    os.makedirs(state_dir, exist_ok=True)
+    save_transaction_store(state.store, os.path.join(state_dir, "transaction_store"))
+
+    keys = list(state.itemsets)
+    members = np.full((len(keys), state.max_size), -1, dtype=np.int64)
+    for row, itemset in enumerate(keys):
+        members[row, :len(itemset)] = itemset
+    np.save(os.path.join(state_dir, "itemsets.npy"), members)
+    np.save(os.path.join(state_dir, "item_slack.npy"), np.asarray(state.item_slack, dtype=np.float64))
+    np.save(os.path.join(state_dir, "item_reset.npy"), np.asarray(state.item_reset, dtype=np.int64))
+    for key, dtype in (('utility', np.float64), ('support', np.int64), ('twu', np.float64)):
+        values = np.array([state.itemsets[itemset][key] for itemset in keys], dtype=dtype)
+        np.save(os.path.join(state_dir, f"{key}.npy"), values)
+
+    meta = {
+        "version": STATE_VERSION,
+        "min_utility": state.min_utility,
+        "max_size": state.max_size,
+        "lower_utility": state.lower_utility,
+        "batches": state.batches,
+        "num_itemsets": len(keys),
+    }
+    with open(os.path.join(state_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_incremental_state(state_dir=INCREMENTAL_STATE_DIR):
+    with open(os.path.join(state_dir, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != STATE_VERSION:
+        raise ValueError(
+            f"Incremental state version {meta.get('version')} không được hỗ trợ "
+            f"(cần version {STATE_VERSION}): {state_dir}"
+        )
+
+    store = load_transaction_store(os.path.join(state_dir, "transaction_store"), mmap=False)
+    members = np.load(os.path.join(state_dir, "itemsets.npy"))
+    item_slack = np.load(os.path.join(state_dir, "item_slack.npy"))
+    # State ghi trước khi có item_reset: coi như mọi item vừa reset
+    reset_file = os.path.join(state_dir, "item_reset.npy")
+    item_reset = np.load(reset_file) if os.path.exists(reset_file) else None
+    values = {key: np.load(os.path.join(state_dir, f"{key}.npy")).tolist()
+              for key in ('utility', 'support', 'twu')}
+    itemsets = {}
+    for row, itemset in enumerate(members.tolist()):
+        itemsets[tuple(item for item in itemset if item >= 0)] = {
+            key: values[key][row] for key in values
+        }
+    return IncrementalState(
+        store, itemsets, meta["min_utility"], meta["max_size"], meta["lower_utility"], item_slack,
+        item_reset, meta.get("batches", 0),
+    )
+
+
+def compare_with_full_mine(state, tolerance=1e-6):
+    """
+    So sánh HUI của incremental state với kết quả mine lại toàn bộ dữ liệu
+
+    Returns:
+        List các itemset lệch (thiếu, thừa, hoặc khác utility/support)
+    """
+    incremental = state.high_utility_itemsets()
+    full = mine_high_utility_itemsets(state.store, state.min_utility, state.max_size)
+    mismatches = []
+    for itemset in set(incremental) | set(full):
+        a, b = incremental.get(itemset), full.get(itemset)
+        if a is None or b is None or a['support'] != b['support'] \
+                or abs(a['utility'] - b['utility']) > tolerance:
+            mismatches.append(itemset)
+    return sorted(mismatches, key=lambda itemset: (len(itemset), itemset))
+
+
+def init_incremental_state(min_utility, max_size=2, store_dir=TRANSACTION_STORE_DIR,
+                           state_dir=INCREMENTAL_STATE_DIR, lower_ratio=DEFAULT_LOWER_RATIO):
+    """Tạo state từ transaction store hiện có (output của clean_and_filter_data)"""
+    state = build_incremental_state(
+        load_transaction_store(store_dir, mmap=False), min_utility, max_size, lower_ratio
+    )
+    save_incremental_state(state, state_dir)
+    return state
+
+
+def update_with_batch(batch, state_dir=INCREMENTAL_STATE_DIR, verify=False):
+    """
+    Áp dụng 1 batch vào state đã lưu và ghi lại state
+
+    Args:
+        batch: TransactionStore hoặc list transaction (item ID theo item_mapping hiện tại)
+        state_dir: Thư mục state (tạo bằng build_incremental_state + save_incremental_state)
+        verify: True để so sánh với mine lại toàn bộ (chậm)
+
+    Returns:
+        Dict HUI sau khi cập nhật
+    """
+    state = apply_batch(load_incremental_state(state_dir), batch)
+    save_incremental_state(state, state_dir)
+    if verify:
+        mismatches = compare_with_full_mine(state)
+        print(f"    - Verify against full re-mine: {len(mismatches)} mismatches")
+    return state.high_utility_itemsets()
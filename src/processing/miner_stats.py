@@ -0,0 +1,181 @@
+import contextlib
+import cProfile
+import io
+import pstats
+import time
+
+import numpy as np
+
+
+# Thứ tự in các counter (counter khác được in sau, theo thứ tự xuất hiện)
+COUNTER_ORDER = [
+    "items_total",
+    "items_pruned_twu",
+    "items_promising",
+    "nodes_expanded",
+    "candidates_generated",
+    "pruned_no_common_tids",
+    "pruned_eucs",
+    "exact_utility_checks",
+    "pruned_exact_utility",
+    "hui_found",
+    "pruned_upper_bound",
+]
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class MinerStats:
+    """
+    Số liệu bên trong 1 lần mine: số candidate sinh ra / bị loại ở từng bước
+    pruning, thời gian từng phase và phân bố độ dài tid-list
+
+    Truyền vào find_high_utility_itemsets_optimized(..., stats=MinerStats());
+    mặc định stats=None và miner không đếm gì (không tốn thêm chi phí).
+
+    Ý nghĩa các counter:
+    - items_pruned_twu: item bị loại vì TWU < min_utility
+    - candidates_generated: mở rộng / cặp item cùng xuất hiện được xét
+    - pruned_no_common_tids: cặp không có transaction chung (engine pairwise)
+    - pruned_eucs: mở rộng bị loại bởi EUCS (engine utility_list)
+    - exact_utility_checks / pruned_exact_utility / hui_found: số lần tính
+      utility thật, số lần không đạt ngưỡng và số HUI
+    - pruned_upper_bound: cặp/itemset bị loại vì upper bound < min_utility
+      (pairwise: TWU của cặp; utility_list: iutil + rutil, không mở rộng tiếp)
+    - pruned_closed / pruned_maximal: cây con bị bỏ ở chế độ itemset_mode
+      'closed' / 'maximal' (condensed_miner.py)
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.phases = {}
+        self.histograms = {}
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Cộng dồn thời gian của 1 phase (gọi nhiều lần thì cộng lại)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def observe(self, name, values):
+        """Ghi các giá trị (>= 1) vào histogram theo bucket lũy thừa 2: [2^k, 2^(k+1))"""
+        values = np.asarray(values)
+        if values.size == 0:
+            return
+        self._add_buckets(name, np.bincount(np.log2(np.maximum(values, 1)).astype(np.int64)))
+
+    def _add_buckets(self, name, buckets):
+        current = self.histograms.get(name, np.zeros(0, dtype=np.int64))
+        merged = np.zeros(max(len(current), len(buckets)), dtype=np.int64)
+        merged[:len(current)] += current
+        merged[:len(buckets)] += buckets
+        self.histograms[name] = merged
+
+    def merge(self, other):
+        """Cộng số liệu của MinerStats khác (vd. từ worker process) vào đây"""
+        if isinstance(other, dict):
+            other = MinerStats.from_dict(other)
+        for name, n in other.counters.items():
+            self.count(name, n)
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        for name, buckets in other.histograms.items():
+            self._add_buckets(name, buckets)
+        return self
+
+    def to_dict(self):
+        return {
+            "counters": self.ordered_counters(),
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "histograms": {name: buckets.tolist() for name, buckets in self.histograms.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.counters = dict(data.get("counters", {}))
+        stats.phases = dict(data.get("phases", {}))
+        stats.histograms = {
+            name: np.asarray(buckets, dtype=np.int64) for name, buckets in data.get("histograms", {}).items()
+        }
+        return stats
+
+    def ordered_counters(self):
+        ordered = {name: self.counters[name] for name in COUNTER_ORDER if name in self.counters}
+        ordered.update({name: n for name, n in self.counters.items() if name not in ordered})
+        return ordered
+
+    def report(self):
+        lines = ["Counters:"]
+        for name, n in self.ordered_counters().items():
+            lines.append(f"  {name:<26} {n:>14,}")
+        if self.phases:
+            total = sum(self.phases.values())
+            lines.append("Phases:")
+            for name, seconds in self.phases.items():
+                share = seconds / total * 100 if total > 0 else 0.0
+                lines.append(f"  {name:<26} {seconds:>11.3f}s {share:>5.1f}%")
+        for name, buckets in self.histograms.items():
+            lines.append(f"Histogram {name}:")
+            total = int(buckets.sum())
+            for k, n in enumerate(buckets.tolist()):
+                if n == 0:
+                    continue
+                label = f"{2 ** k}" if k == 0 else f"{2 ** k}-{2 ** (k + 1) - 1}"
+                lines.append(f"  {label:>15} {n:>12,} {n / total * 100:>6.1f}%")
+        return "\n".join(lines)
+
+    def print_report(self):
+        print("\n  • Miner stats")
+        for line in self.report().splitlines():
+            print("    " + line)
+
+
+@contextlib.contextmanager
+def profiled(profiler="cprofile", output_file=None, sort="cumulative", limit=25):
+    """
+    Chạy đoạn code dưới profiler rồi in các hàm tốn thời gian nhất
+
+    Args:
+        profiler: 'cprofile' (có sẵn) hoặc 'pyinstrument' (sampling, cần cài thêm)
+        output_file: Lưu kết quả (.prof cho cProfile, .html cho pyinstrument)
+        sort: Cột sắp xếp của pstats (chỉ cProfile)
+        limit: Số dòng in ra
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profiler}', expected one of {PROFILERS}")
+
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("profiler='pyinstrument' requires `pip install pyinstrument`") from e
+        sampler = Profiler()
+        sampler.start()
+        try:
+            yield sampler
+        finally:
+            sampler.stop()
+            print(sampler.output_text(unicode=True, color=False))
+            if output_file:
+                with open(output_file, "w", encoding="utf-8") as f:
+                    f.write(sampler.output_html())
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        if output_file:
+            profile.dump_stats(output_file)
+        buffer = io.StringIO()
+        pstats.Stats(profile, stream=buffer).sort_stats(sort).print_stats(limit)
+        print(buffer.getvalue())
@@ -1,9 +1,44 @@
+import contextlib
 import json
 from collections import defaultdict
 from itertools import combinations
 import os
 import time
 
+import numpy as np
+
+try:
+    from .transaction_store import TransactionStore, load_transaction_store
+    from .spmf_reader import read_spmf_store
+    from .hui_miner import UTILITY_EPSILON, MiningIndex, compute_twu, filter_itemsets, mine_high_utility_itemsets
+    from .parallel_mining import mine_high_utility_itemsets_parallel
+    from .tidset_backends import TIDSET_BACKENDS, make_tidset_backend
+    from .topk_miner import mine_top_k_itemsets
+    from .condensed_miner import ITEMSET_MODES, mine_condensed_itemsets
+    from .pipeline_metrics import PipelineMetrics
+    from .miner_stats import MinerStats, profiled
+except ImportError:
+    from transaction_store import TransactionStore, load_transaction_store
+    from spmf_reader import read_spmf_store
+    from hui_miner import UTILITY_EPSILON, MiningIndex, compute_twu, filter_itemsets, mine_high_utility_itemsets
+    from parallel_mining import mine_high_utility_itemsets_parallel
+    from tidset_backends import TIDSET_BACKENDS, make_tidset_backend
+    from topk_miner import mine_top_k_itemsets
+    from condensed_miner import ITEMSET_MODES, mine_condensed_itemsets
+    from pipeline_metrics import PipelineMetrics
+    from miner_stats import MinerStats, profiled
+
+MINING_ENGINES = ('utility_list', 'pairwise')
+
+DEFAULT_THRESHOLDS = [
+    (1000, "Ngưỡng thấp"),
+    (5000, "Ngưỡng trung bình"),
+    (10000, "Ngưỡng cao")
+]
+
+TRANSACTION_STORE_DIR = 'data/processed/transaction_store'
+SPMF_FILE = 'data/processed/clean_transactions_spmf.txt'
+
 def load_item_mapping(mapping_file='data/processed/item_mapping.json'):
     with open(mapping_file, 'r', encoding='utf-8') as f:
         stockcode_mapping = json.load(f)
@@ -34,6 +69,18 @@ def parse_spmf_file(input_file):
                 transactions.append({'items': transaction, 'tu': tu})
     return transactions
 
+def load_transactions(store_dir=TRANSACTION_STORE_DIR, spmf_file=SPMF_FILE, workers=None):
+    # Ưu tiên transaction store (memory-map), fallback về file SPMF text
+    # (đọc song song theo chunk, workers như read_spmf_store)
+    if os.path.exists(os.path.join(store_dir, 'meta.json')):
+        return load_transaction_store(store_dir)
+    return read_spmf_store(spmf_file, workers=workers)
+
+def as_transaction_store(transactions):
+    if isinstance(transactions, TransactionStore):
+        return transactions
+    return TransactionStore.from_transactions(transactions)
+
 def calculate_utility(itemset, transaction_items):
     utility = 0
     for item_id in itemset:
@@ -42,30 +89,112 @@ def calculate_utility(itemset, transaction_items):
             utility += quantity * profit
     return utility
 
-def find_high_utility_itemsets_optimized(transactions, min_utility, max_size=3):
+def find_high_utility_itemsets_optimized(transactions, min_utility, max_size=2, engine='utility_list', index=None, workers=None, tidset_backend='dense_lookup', top_k=None, stats=None, profile=None, itemset_mode='all'):
+    # engine='utility_list': HUI-Miner/FHM (utility list + EUCS), mọi kích thước itemset
+    # engine='pairwise': vòng lặp giao tập tid cũ, chỉ size 1 và 2 (giữ lại để so sánh)
+    # max_size mặc định 2: kết quả như code cũ (trước đây chỉ tìm đến size 2) với cả 2 engine
+    # index: MiningIndex dùng chung khi mine nhiều lần trên cùng dữ liệu
+    # workers: số process khi mine song song (None/1 = 1 core, <= 0 = toàn bộ CPU)
+    # tidset_backend: cách giao tid-set của engine pairwise ('set', 'dense_lookup', 'bitmap')
+    # top_k: lấy K itemset có utility cao nhất, bỏ qua min_utility (chỉ engine utility_list, 1 core)
+    # stats: MinerStats (hoặc True) để đếm candidate/pruning, thời gian từng phase; in báo cáo khi xong
+    # profile: 'cprofile' / 'pyinstrument' hoặc (tên profiler, file output) để chạy dưới profiler
+    # itemset_mode: 'all', 'closed' (bỏ HUI có superset cùng support) hoặc 'maximal' (bỏ HUI có superset
+    #   cũng là HUI), loại ngay trong lúc duyệt (chỉ engine utility_list, 1 core)
+    if engine not in MINING_ENGINES:
+        raise ValueError(f"Unknown mining engine '{engine}', expected one of {MINING_ENGINES}")
+    if stats is True:
+        stats = MinerStats()
+
+    if profile:
+        profiler, output_file = (profile, None) if isinstance(profile, str) else profile
+        with profiled(profiler, output_file):
+            return find_high_utility_itemsets_optimized(
+                transactions, min_utility, max_size, engine, index, workers, tidset_backend, top_k, stats,
+                itemset_mode=itemset_mode,
+            )
+
+    high_utility_itemsets = _find_high_utility_itemsets(
+        transactions, min_utility, max_size, engine, index, workers, tidset_backend, top_k, stats, itemset_mode
+    )
+    if stats is not None:
+        stats.print_report()
+    return high_utility_itemsets
+
+def _find_high_utility_itemsets(transactions, min_utility, max_size, engine, index, workers, tidset_backend, top_k, stats, itemset_mode='all'):
+    store = as_transaction_store(transactions)
+    if itemset_mode not in ITEMSET_MODES:
+        raise ValueError(f"Unknown itemset mode '{itemset_mode}', expected one of {ITEMSET_MODES}")
+    if itemset_mode != 'all':
+        if engine != 'utility_list' or top_k is not None:
+            raise ValueError(f"Itemset mode '{itemset_mode}' requires engine='utility_list' without top_k")
+        print(f"  • [Utility List] Depth-first search for {itemset_mode} itemsets (max size: {max_size or 'unlimited'})...")
+        high_utility_itemsets = mine_condensed_itemsets(store, min_utility, itemset_mode, max_size, index=index, stats=stats)
+        print_size_counts(high_utility_itemsets)
+        return high_utility_itemsets
+
+    if top_k is not None:
+        if engine != 'utility_list':
+            raise ValueError("Top-K mode requires engine='utility_list'")
+        print(f"  • [Top-K] Depth-first search for top {top_k:,} itemsets (max size: {max_size or 'unlimited'})...")
+        high_utility_itemsets = mine_top_k_itemsets(store, top_k, max_size, index=index, stats=stats)
+        print_size_counts(high_utility_itemsets)
+        return high_utility_itemsets
+
+    if engine == 'pairwise':
+        return find_high_utility_itemsets_pairwise(store, min_utility, max_size, tidset_backend, stats)
+
+    print(f"  • [Utility List] Depth-first search (max size: {max_size or 'unlimited'})...")
+    if workers is not None and workers != 1:
+        high_utility_itemsets = mine_high_utility_itemsets_parallel(
+            store, min_utility, max_size, workers=workers, index=index, stats=stats
+        )
+    else:
+        high_utility_itemsets = mine_high_utility_itemsets(store, min_utility, max_size, index=index, stats=stats)
+
+    print_size_counts(high_utility_itemsets)
+    return high_utility_itemsets
+
+def print_size_counts(itemsets):
+    size_counts = defaultdict(int)
+    for itemset in itemsets:
+        size_counts[len(itemset)] += 1
+    for size in sorted(size_counts):
+        print(f"    - Found {size_counts[size]} High-Utility Itemsets (Size {size})")
+
+def find_high_utility_itemsets_pairwise(transactions, min_utility, max_size=2, tidset_backend='dense_lookup', stats=None):
+    # tidset_backend: 'set' (code cũ), 'dense_lookup' hoặc 'bitmap' (xem tidset_backends.py)
+    # stats: MinerStats để đếm candidate/pruning (None = không đếm)
+    phase = stats.phase if stats is not None else (lambda name: contextlib.nullcontext())
+    if max_size is None or max_size > 2:
+        raise ValueError("Pairwise engine only supports max_size <= 2, use engine='utility_list'")
     high_utility_itemsets = {}
     
     # --- PHASE 1: SIZE 1 ---
     print(f"  • [Pharse 1] Checking Size 1...")
     # Tính TWU cho từng item (Transaction-Weighted Utility)
     # TWU(item) = sum(TU of transactions containing item)
-    twu = defaultdict(float)
-    item_utility = defaultdict(float)
-    item_support = defaultdict(int)
-    
-    for t in transactions:
-        tu = t['tu']
-        t_items = t['items']
-        for item_id, (qty, profit) in t_items.items():
-            twu[item_id] += tu
-            item_utility[item_id] += (qty * profit)
-            item_support[item_id] += 1
+    store = as_transaction_store(transactions)
+    with phase("twu"):
+        entry_tids = store.transaction_ids()
+        items = np.asarray(store.items)
+        n_items = int(items.max()) + 1 if len(items) else 0
+        twu_arr, utility_arr, support_arr = compute_twu(store)
+
+    present = np.flatnonzero(support_arr)
+    twu = dict(zip(present.tolist(), twu_arr[present].tolist()))
+    item_utility = dict(zip(present.tolist(), utility_arr[present].tolist()))
+    item_support = dict(zip(present.tolist(), support_arr[present].tolist()))
             
     # Lọc các item có TWU >= min_utility (Pruning property: nếu TWU < min_util thì itemset chứa nó cũng < min_util)
     promising_items = [item for item, val in twu.items() if val >= min_utility]
     promising_items.sort() # Sắp xếp để duyệt hiệu quả
     
     print(f"    - Found {len(promising_items)} promising items (TWU >= {min_utility}) out of {len(twu)} total.")
+    if stats is not None:
+        stats.count("items_total", len(twu))
+        stats.count("items_pruned_twu", len(twu) - len(promising_items))
+        stats.count("items_promising", len(promising_items))
     
     # Lưu kết quả size 1
     count_size1 = 0
@@ -77,6 +206,10 @@ def find_high_utility_itemsets_optimized(transactions, min_utility, max_size=3):
             }
             count_size1 += 1
     print(f"    - Found {count_size1} High-Utility Itemsets (Size 1)")
+    if stats is not None:
+        stats.count("exact_utility_checks", len(promising_items))
+        stats.count("hui_found", count_size1)
+        stats.count("pruned_exact_utility", len(promising_items) - count_size1)
 
     if max_size == 1:
         return high_utility_itemsets
@@ -89,65 +222,86 @@ def find_high_utility_itemsets_optimized(transactions, min_utility, max_size=3):
     # Để tối ưu hơn: chỉ xét các cặp (a, b) cùng xuất hiện trong transaction nào đó
     
     # Xây dựng index ngược: item -> list of transaction indices
-    item_to_tids = defaultdict(list)
-    for idx, t in enumerate(transactions):
-        for item in t['items']:
-            if item in promising_items: # Chỉ index các item tiềm năng
-                item_to_tids[item].append(idx)
+    # (lấy thẳng từ mảng CSR, sort ổn định theo item để tid tăng dần)
+    with phase("build_tidsets"):
+        promising_mask = np.zeros(n_items, dtype=bool)
+        promising_mask[promising_items] = True
+        mask = promising_mask[items]
+        p_items = items[mask]
+        p_tids = entry_tids[mask]
+        p_utils = np.asarray(store.utilities)[mask]
+        order = np.argsort(p_items, kind='stable')
+        p_items, p_tids, p_utils = p_items[order], p_tids[order], p_utils[order]
+        bounds = np.flatnonzero(np.diff(p_items)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(p_items)]))
+
+        backend = make_tidset_backend(tidset_backend, p_tids, p_utils, starts, ends, store.tu)
+    if stats is not None:
+        stats.observe("tidlist_length", ends - starts)
+    print(f"    - Tid-set backend: {backend.name}")
+    pair_threshold = min_utility - UTILITY_EPSILON
     
     # Duyệt đôi một các promising items
-    # Cách tối ưu: duyệt a, sau đó duyệt b > a
-    processed_pairs = 0
-    total_pairs_estimate = len(promising_items) * (len(promising_items)-1) / 2
-    
-    for i in range(len(promising_items)):
-        item_a = promising_items[i]
-        tids_a = set(item_to_tids[item_a])
+    # Cách tối ưu: duyệt a, sau đó giao tid-list của a với mọi b > a cùng lúc
+    with phase("pair_search"):
+        for i in range(len(promising_items)):
+            item_a = promising_items[i]
         
-        # Chỉ check b > item_a
-        for j in range(i + 1, len(promising_items)):
-            item_b = promising_items[j]
-            
-            # Intersection của transaction IDs: tìm các đơn hàng có cả A và B
-            # (Thực tế intersection list đã sort sẽ nhanh hơn set, nhưng set code ngắn gọn cho demo)
-            common_tids = tids_a.intersection(item_to_tids[item_b])
-            
-            if not common_tids:
-                continue
-                
-            # Tính Upper Bound Utility cho cặp (A, B) trên các transaction chung
-            # UB = Sum(TU of common transactions)
-            ub_utility = 0
-            for tid in common_tids:
-                ub_utility += transactions[tid]['tu']
-            
-            # Pruning
-            if ub_utility < min_utility:
-                continue
-            
-            # Nếu qua được pruning, tính utility thật
-            real_utility = 0
-            for tid in common_tids:
-                t = transactions[tid]['items']
-                # Utility của cặp = util(A) + util(B) trong trans đó
-                u_a = t[item_a][0] * t[item_a][1]
-                u_b = t[item_b][0] * t[item_b][1]
-                real_utility += (u_a + u_b)
-            
-            if real_utility >= min_utility:
-                high_utility_itemsets[(item_a, item_b)] = {
+            # Upper Bound Utility cho cặp (A, B) trên các transaction chung
+            # UB = Sum(TU of common transactions), utility thật = util(A) + util(B)
+            # (tổng vector hóa có thể lệch thứ tự cộng so với vòng lặp -> so với ngưỡng có epsilon)
+            js, supports, ub_utilities, utilities = backend.pair_stats(i, pair_threshold)
+        
+            # Pruning theo UB, sau đó lọc theo utility thật
+            keep = (ub_utilities >= pair_threshold) & (utilities >= pair_threshold)
+            if stats is not None:
+                passed_ub = int(np.count_nonzero(ub_utilities >= pair_threshold))
+                stats.count("candidates_generated", len(promising_items) - i - 1)
+                stats.count("pruned_no_common_tids", len(promising_items) - i - 1 - len(js))
+                stats.count("pruned_upper_bound", len(js) - passed_ub)
+                stats.count("exact_utility_checks", passed_ub)
+                stats.count("pruned_exact_utility", passed_ub - int(np.count_nonzero(keep)))
+                stats.count("hui_found", int(np.count_nonzero(keep)))
+            for j, support, real_utility in zip(js[keep].tolist(), supports[keep].tolist(), utilities[keep].tolist()):
+                high_utility_itemsets[(item_a, promising_items[j])] = {
                     'utility': real_utility,
-                    'support': len(common_tids)
+                    'support': support
                 }
                 count_size2 += 1
                 
-        if i % 100 == 0:
-            print(f"\r    - Processed {i}/{len(promising_items)} primary items...", end="")
+            if i % 100 == 0:
+                print(f"\r    - Processed {i}/{len(promising_items)} primary items...", end="")
             
     print(f"\n    - Found {count_size2} High-Utility Itemsets (Size 2)")
     
     return high_utility_itemsets
 
+def benchmark_tidset_backends(transactions, min_utility, backends=tuple(TIDSET_BACKENDS)):
+    """
+    So sánh thời gian chạy engine pairwise giữa các tid-set backend
+
+    Returns:
+        Dict {backend: {'duration', 'num_itemsets', 'matches_first'}}
+    """
+    store = as_transaction_store(transactions)
+    report = {}
+    reference = None
+    for name in backends:
+        print(f"\n>>> Tid-set backend: {name}")
+        start_time = time.time()
+        itemsets = find_high_utility_itemsets_pairwise(store, min_utility, max_size=2, tidset_backend=name)
+        duration = time.time() - start_time
+        if reference is None:
+            reference = itemsets
+        report[name] = {
+            'duration': duration,
+            'num_itemsets': len(itemsets),
+            'matches_first': set(itemsets) == set(reference),
+        }
+        print(f"    Done in {duration:.2f}s")
+    return report
+
 def save_results(itemsets, output_file, id_to_stockcode):
     sorted_itemsets = sorted(itemsets.items(), key=lambda x: x[1]['utility'], reverse=True)
     
@@ -166,39 +320,132 @@ def save_results(itemsets, output_file, id_to_stockcode):
     
     return len(sorted_itemsets)
 
-def run_experiments():
+def mine_thresholds(transactions, thresholds, max_size=2, engine='utility_list', sweep=True, workers=None, itemset_mode='all'):
+    """
+    Mine nhiều ngưỡng trên cùng dữ liệu
+
+    sweep=True: mine 1 lần ở ngưỡng thấp nhất, các ngưỡng cao hơn lấy bằng cách
+    lọc kết quả (HUI của ngưỡng cao là tập con của ngưỡng thấp).
+    sweep=False: mine riêng từng ngưỡng nhưng dùng chung MiningIndex
+    (TWU + revised database chỉ xây 1 lần).
+    itemset_mode='maximal' luôn mine riêng từng ngưỡng: HUI maximal ở ngưỡng
+    cao có thể không maximal ở ngưỡng thấp (closed thì lọc được).
+
+    Returns:
+        Dict {min_utility: {'itemsets', 'duration', 'derived_from'}}
+    """
+    store = as_transaction_store(transactions)
+    values = sorted({t for t in thresholds})
+    runs = {}
+    sweep = sweep and itemset_mode != 'maximal'
+
+    if sweep and values:
+        lowest = values[0]
+        print(f"\n>>> Sweep: mining once at £{lowest:,}, deriving {len(values) - 1} higher threshold(s)")
+        start_time = time.time()
+        base = find_high_utility_itemsets_optimized(
+            store, lowest, max_size=max_size, engine=engine, workers=workers, itemset_mode=itemset_mode
+        )
+        duration = time.time() - start_time
+        print(f"    Done in {duration:.2f}s")
+        for min_util in values:
+            runs[min_util] = {
+                'itemsets': base if min_util == lowest else filter_itemsets(base, min_util),
+                'duration': duration if min_util == lowest else 0.0,
+                'derived_from': None if min_util == lowest else lowest,
+            }
+        return runs
+
+    index = MiningIndex(store) if engine == 'utility_list' else None
+    for min_util in values:
+        print(f"\n>>> Running Min Utility: £{min_util:,}")
+        start_time = time.time()
+        itemsets = find_high_utility_itemsets_optimized(
+            store, min_util, max_size=max_size, engine=engine, index=index, workers=workers,
+            itemset_mode=itemset_mode,
+        )
+        duration = time.time() - start_time
+        print(f"    Done in {duration:.2f}s")
+        runs[min_util] = {'itemsets': itemsets, 'duration': duration, 'derived_from': None}
+    return runs
+
+def run_top_k(transactions, top_k, id_to_stockcode, max_size=2, metrics=None):
+    # 1 lần mine thay cho việc thử nhiều ngưỡng min_utility
+    metrics = metrics or PipelineMetrics('run_top_k', jsonl_file=None)
+    print(f"\n>>> Running Top-{top_k:,}")
+    start_time = time.time()
+    with metrics.stage(f'mine_top_k[{top_k}]', transactions_in=len(transactions)) as s:
+        itemsets = find_high_utility_itemsets_optimized(transactions, None, max_size=max_size, top_k=top_k)
+        s.set(itemsets_out=len(itemsets))
+    print(f"    Done in {time.time() - start_time:.2f}s")
+
+    output_file = f'output/patterns/high_utility_itemsets_top{top_k}.txt'
+    with metrics.stage(f'save_results[top{top_k}]') as s:
+        num = save_results(itemsets, output_file, id_to_stockcode)
+        s.set(rows_out=num).wrote_file(output_file, output_file.replace('.txt', '_readable.txt'))
+    min_found = min((info['utility'] for info in itemsets.values()), default=0)
+    return {'top_k': top_k, 'num': num, 'file': output_file, 'min_utility': min_found}
+
+def run_experiments(max_size=2, engine='utility_list', thresholds=DEFAULT_THRESHOLDS, sweep=True, workers=None, top_k=None, metrics=None, itemset_mode='all'):
+    # metrics: PipelineMetrics để đo từng stage (mặc định ghi output/metrics/pipeline_metrics.jsonl)
+    # top_k: 1 lần mine top-K (engine utility_list, 1 core, mọi HUI) thay cho các ngưỡng
+    if top_k is not None:
+        conflicts = [
+            name for name, ignored in (
+                ('engine', engine != 'utility_list'),
+                ('workers', workers is not None and workers != 1),
+                ('sweep', not sweep),
+                ('itemset_mode', itemset_mode != 'all'),
+            ) if ignored
+        ]
+        if conflicts:
+            raise ValueError(f"Top-K mode does not support {', '.join(conflicts)} (got top_k={top_k})")
+    metrics = metrics or PipelineMetrics('run_experiments')
     print("\n" + "="*60)
-    print("  MINING: FAST OPTIMIZED VERSION (Max Size 2)")
+    print(f"  MINING: FAST OPTIMIZED VERSION (Max Size {max_size or 'unlimited'}, engine: {engine})")
     print("="*60)
     
-    id_to_stockcode = load_item_mapping()
+    with metrics.stage('load_item_mapping') as s:
+        id_to_stockcode = load_item_mapping()
+        s.set(rows_out=len(id_to_stockcode)).read_file('data/processed/item_mapping.json')
     print(f"✓ Loaded mapping ({len(id_to_stockcode)} items)")
     
-    transactions = parse_spmf_file('data/processed/clean_transactions_spmf.txt')
+    with metrics.stage('load_transactions') as s:
+        transactions = load_transactions()
+        s.set(transactions_out=len(transactions))
+        s.read_file(TRANSACTION_STORE_DIR if os.path.exists(os.path.join(TRANSACTION_STORE_DIR, 'meta.json')) else SPMF_FILE)
     print(f"✓ Loaded data ({len(transactions)} transactions)")
     
+    if top_k is not None:
+        r = run_top_k(transactions, top_k, id_to_stockcode, max_size=max_size, metrics=metrics)
+        with open('output/mining_results_summary.txt', 'w', encoding='utf-8') as f:
+            f.write("BÁO CÁO KẾT QUẢ MINING (OPTIMIZED)\n==================================\n\n")
+            f.write(f"Top-{r['top_k']:,}: {r['num']} patterns (min utility £{r['min_utility']:,.2f}) -> {r['file']}\n")
+        print("\n✓ ALL DONE! Summary saved.")
+        metrics.print_summary()
+        return
+    
     # Chạy thử nghiệm
-    thresholds = [
-        (1000, "Ngưỡng thấp"),
-        (5000, "Ngưỡng trung bình"),
-        (10000, "Ngưỡng cao")
-    ]
+    with metrics.stage('mine_thresholds', transactions_in=len(transactions)) as s:
+        runs = mine_thresholds(
+            transactions, [min_util for min_util, _ in thresholds],
+            max_size=max_size, engine=engine, sweep=sweep, workers=workers, itemset_mode=itemset_mode
+        )
+        s.set(itemsets_out=max((len(run['itemsets']) for run in runs.values()), default=0))
     
     results = []
     
     for min_util, desc in thresholds:
-        print(f"\n>>> Running Min Utility: £{min_util:,} ({desc})")
-        start_time = time.time()
-        
-        # Max size = 2 để đảm bảo tốc độ
-        itemsets = find_high_utility_itemsets_optimized(transactions, min_util, max_size=2)
-        
-        duration = time.time() - start_time
-        print(f"    Done in {duration:.2f}s")
+        run = runs[min_util]
+        if run['derived_from'] is not None:
+            print(f"\n>>> Min Utility: £{min_util:,} ({desc}) - filtered from £{run['derived_from']:,} run")
+            print_size_counts(run['itemsets'])
         
         # Lưu vào folder patterns
         output_file = f'output/patterns/high_utility_itemsets_{min_util}.txt'
-        num = save_results(itemsets, output_file, id_to_stockcode)
+        with metrics.stage(f'save_results[{min_util}]') as s:
+            num = save_results(run['itemsets'], output_file, id_to_stockcode)
+            s.set(rows_out=num).wrote_file(output_file, output_file.replace('.txt', '_readable.txt'))
         
         results.append({'threshold': min_util, 'num': num, 'file': output_file})
 
@@ -211,6 +458,7 @@ def run_experiments():
             f.write(f"Min Utility £{r['threshold']:,}: {r['num']} patterns -> {new_path}\n")
             
     print("\n✓ ALL DONE! Summary saved.")
+    metrics.print_summary()
 
 if __name__ == "__main__":
     run_experiments()
@@ -0,0 +1,195 @@
+import heapq
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from .hui_miner import (
+        MiningContext, MiningIndex, RevisedDatabase,
+        finalize_results, mine_item, prepare_search,
+    )
+    from .miner_stats import MinerStats
+except ImportError:
+    from hui_miner import (
+        MiningContext, MiningIndex, RevisedDatabase,
+        finalize_results, mine_item, prepare_search,
+    )
+    from miner_stats import MinerStats
+
+
+# Số task trên mỗi worker (nhiều task nhỏ giúp cân bằng tải tốt hơn)
+TASKS_PER_WORKER = 8
+
+# Trạng thái của mỗi worker process (gắn vào shared memory trong initializer)
+_worker = {}
+
+
+def resolve_workers(workers):
+    """workers <= 0 hoặc None nghĩa là dùng toàn bộ CPU"""
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def estimate_costs(db, min_rank):
+    """
+    Ước lượng chi phí mine cho từng item đầu tiên (rank)
+
+    Chi phí ~ tổng số entry phía sau item trong các transaction chứa nó,
+    tức kích thước phần dữ liệu được chiếu ở mức mở rộng đầu tiên. Item
+    phổ biến có tid-list dài nên chi phí lệch rất nhiều giữa các item.
+    """
+    remaining = db.tx_end - np.arange(len(db)) + 1
+    costs = np.bincount(db.ranks, weights=remaining, minlength=db.num_ranks)
+    costs[:min_rank] = 0
+    return costs
+
+
+def partition_ranks(costs, min_rank, num_tasks):
+    """
+    Chia các rank thành num_tasks nhóm có tổng chi phí gần bằng nhau
+    (greedy LPT: item nặng nhất vào nhóm đang nhẹ nhất)
+
+    Returns:
+        List các list rank, nhóm nặng nhất trước
+    """
+    ranks = np.arange(min_rank, len(costs))
+    if len(ranks) == 0:
+        return []
+    num_tasks = max(1, min(num_tasks, len(ranks)))
+    ranks = ranks[np.argsort(-costs[ranks], kind="stable")]
+
+    heap = [(0.0, i) for i in range(num_tasks)]
+    groups = [[] for _ in range(num_tasks)]
+    totals = [0.0] * num_tasks
+    for r in ranks.tolist():
+        total, i = heapq.heappop(heap)
+        groups[i].append(r)
+        totals[i] = total + float(costs[r])
+        heapq.heappush(heap, (totals[i], i))
+
+    order = sorted(range(num_tasks), key=lambda i: -totals[i])
+    return [groups[i] for i in order if groups[i]]
+
+
+def _share_arrays(arrays):
+    """Copy các mảng vào shared memory, trả về (handles, specs)"""
+    handles = []
+    specs = {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        handles.append(shm)
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        view[...] = arr
+        specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    return handles, specs
+
+
+def _init_worker(specs, min_utility, max_size, collect_stats=False):
+    handles = []
+    arrays = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        handles.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+    db = RevisedDatabase(
+        arrays["rank_to_item"], arrays["tids"], arrays["ranks"], arrays["utils"],
+        tx_end=arrays["tx_end"], rutils=arrays["rutils"],
+    )
+    eucs_keys = arrays.get("eucs_keys")
+    _worker["handles"] = handles
+    _worker["db"] = db
+    _worker["order"] = arrays["order"]
+    _worker["bounds"] = arrays["bounds"]
+    _worker["ctx"] = MiningContext(db, eucs_keys, min_utility, max_size)
+    _worker["collect_stats"] = collect_stats
+
+
+def _mine_ranks(ranks):
+    """
+    Returns:
+        (results, stats) với stats là MinerStats.to_dict() của task
+        (None nếu không thu thập)
+    """
+    db = _worker["db"]
+    ctx = _worker["ctx"]
+    # Mỗi task 1 MinerStats riêng, process cha gộp lại
+    ctx.stats = MinerStats() if _worker["collect_stats"] else None
+    results = {}
+    if ctx.stats is None:
+        for r in ranks:
+            mine_item(db.utility_list(r, _worker["order"], _worker["bounds"]), ctx, results)
+        return results, None
+    with ctx.stats.phase("search"):
+        for r in ranks:
+            mine_item(db.utility_list(r, _worker["order"], _worker["bounds"]), ctx, results)
+    return results, ctx.stats.to_dict()
+
+
+def mine_high_utility_itemsets_parallel(store, min_utility, max_size=None, workers=None,
+                                        index=None, tasks_per_worker=TASKS_PER_WORKER, stats=None):
+    """
+    Mine HUI song song trên nhiều process, chia không gian tìm kiếm theo item đầu
+
+    Mỗi item đầu tiên (theo thứ tự TWU) là 1 nhánh độc lập của cây tìm kiếm.
+    Các nhánh được gom thành nhiều task có chi phí ước lượng gần bằng nhau và
+    phát cho worker theo thứ tự nặng trước. Revised database được đặt trong
+    shared memory nên worker không phải nhận bản pickle của dữ liệu. Kết quả
+    được gộp và sắp xếp lại nên không phụ thuộc thứ tự worker hoàn thành.
+
+    Args:
+        store: TransactionStore
+        min_utility: Ngưỡng utility tối thiểu
+        max_size: Kích thước itemset tối đa (None = không giới hạn)
+        workers: Số process (None hoặc <= 0 = toàn bộ CPU)
+        index: MiningIndex dùng chung (None = tạo mới)
+        tasks_per_worker: Số task trên mỗi worker
+        stats: MinerStats; counter của các worker được cộng vào đây (phase
+            'search' là tổng thời gian của các worker, không phải wall time)
+
+    Returns:
+        Dict giống mine_high_utility_itemsets
+    """
+    workers = resolve_workers(workers)
+    if index is None:
+        index = MiningIndex(store)
+    min_rank, db, eucs_keys = prepare_search(index, min_utility, max_size, stats)
+
+    tasks = partition_ranks(estimate_costs(db, min_rank), min_rank, workers * tasks_per_worker)
+    print(f"    - Parallel: {len(tasks)} tasks on {workers} workers")
+    if not tasks:
+        return {}
+
+    order, bounds = db.item_order()
+    arrays = {
+        "rank_to_item": db.rank_to_item,
+        "tids": db.tids,
+        "ranks": db.ranks,
+        "utils": db.utils,
+        "tx_end": db.tx_end,
+        "rutils": db.rutils,
+        "order": order,
+        "bounds": bounds,
+    }
+    if eucs_keys is not None:
+        arrays["eucs_keys"] = eucs_keys
+
+    handles, specs = _share_arrays(arrays)
+    raw_results = {}
+    try:
+        with mp.Pool(workers, initializer=_init_worker,
+                     initargs=(specs, min_utility, max_size, stats is not None)) as pool:
+            for partial, partial_stats in pool.imap_unordered(_mine_ranks, tasks):
+                raw_results.update(partial)
+                if partial_stats is not None:
+                    stats.merge(partial_stats)
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+    return finalize_results(raw_results)
@@ -0,0 +1,352 @@
+import json
+import multiprocessing as mp
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .data_cleaning import CLEAN_COLUMNS, iter_invoice_blocks, load_special_ids, sorted_transaction_columns
+    from .mining_implementation import find_high_utility_itemsets_optimized, load_item_mapping, save_results
+    from .pipeline_metrics import METRICS_FILE, PipelineMetrics
+    from .product_table import load_product_table
+    from .result_evaluation import generate_rules
+    from .transaction_store import (
+        build_transaction_store, concat_transaction_stores, load_transaction_store,
+        save_transaction_store, take_transactions,
+    )
+except ImportError:
+    from data_cleaning import CLEAN_COLUMNS, iter_invoice_blocks, load_special_ids, sorted_transaction_columns
+    from mining_implementation import find_high_utility_itemsets_optimized, load_item_mapping, save_results
+    from pipeline_metrics import METRICS_FILE, PipelineMetrics
+    from product_table import load_product_table
+    from result_evaluation import generate_rules
+    from transaction_store import (
+        build_transaction_store, concat_transaction_stores, load_transaction_store,
+        save_transaction_store, take_transactions,
+    )
+
+
+PARTITIONS_DIR = 'data/processed/partitions'
+PARTITION_OUTPUT_DIR = 'output/partitions'
+MANIFEST_FILE = 'manifest.json'
+
+# Số dòng mapped_data.csv đọc mỗi lần khi chia partition
+PARTITION_CHUNK_ROWS = 500_000
+
+# Giá trị key bị thiếu (vd. CustomerID trống) và partition gom các partition nhỏ
+UNKNOWN_PARTITION = "Unknown"
+OTHER_PARTITION = "Other"
+
+
+def partition_slug(name):
+    """Tên thư mục an toàn cho 1 giá trị partition ('United Kingdom' -> 'United_Kingdom')"""
+    return re.sub(r"[^0-9A-Za-z._-]+", "_", str(name)).strip("_.") or "partition"
+
+
+def partition_key_values(df, key):
+    """
+    Giá trị partition (chuỗi) của từng dòng
+
+    Args:
+        key: Tên cột (vd. 'Country', 'CustomerID') hoặc hàm df -> Series
+            (vd. phân khúc khách hàng tự định nghĩa)
+    """
+    values = key(df) if callable(key) else df[key]
+    values = pd.Series(values, index=df.index)
+    # CustomerID được pandas đọc thành float (17850.0)
+    if pd.api.types.is_float_dtype(values) and np.all(np.mod(values.dropna(), 1) == 0):
+        values = values.astype("Int64")
+    return values.astype("string").fillna(UNKNOWN_PARTITION)
+
+
+def _transaction_keys(df, key):
+    """Giá trị partition của từng transaction, cùng thứ tự với sorted_transaction_columns"""
+    invoice_nos = df["InvoiceNo"].to_numpy(dtype=str)
+    order = np.argsort(invoice_nos, kind="stable")
+    invoice_nos = invoice_nos[order]
+    new_tx = np.ones(len(invoice_nos), dtype=bool)
+    new_tx[1:] = invoice_nos[1:] != invoice_nos[:-1]
+    # Invoice thuộc partition của dòng đầu tiên (Country/CustomerID không đổi trong 1 invoice)
+    return partition_key_values(df, key).to_numpy(dtype=object)[order][new_tx]
+
+
+def split_transactions(input_file, mapping_file, key="Country", out_dir=PARTITIONS_DIR,
+                       min_transactions=0, chunk_rows=PARTITION_CHUNK_ROWS):
+    """
+    Chia dữ liệu đã clean thành các partition theo Country (hoặc key khác)
+    trong 1 lần đọc mapped_data.csv
+
+    Mỗi chunk được lọc như clean_and_filter_data và chuyển thành transaction
+    store kèm giá trị key của từng transaction; cuối cùng mỗi partition được
+    ghi thành 1 transaction store riêng. Item ID giữ nguyên theo
+    item_mapping.json chung nên mọi partition dùng cùng 1 mapping và product
+    table.
+
+    Args:
+        input_file: mapped_data.csv (cần cột key nếu key là tên cột)
+        mapping_file: item_mapping.json (để lọc mã hàng đặc biệt)
+        key: Tên cột hoặc hàm df -> Series (xem partition_key_values)
+        out_dir: Thư mục chứa các store (out_dir/<slug>/) và manifest.json
+        min_transactions: Partition ít transaction hơn được gom vào 'Other'
+        chunk_rows: Số dòng đọc mỗi lần
+
+    Returns:
+        Manifest {'key', 'partitions': [{'name', 'dir', 'transactions', 'entries'}]},
+        partition lớn nhất trước
+    """
+    columns = CLEAN_COLUMNS + [key] if isinstance(key, str) else None
+    key_name = key if isinstance(key, str) else getattr(key, "__name__", "custom")
+    special_ids = load_special_ids(mapping_file)
+
+    parts, part_keys = [], []
+    for block, _, rows_in in iter_invoice_blocks(input_file, columns, special_ids, chunk_rows):
+        if len(block) == 0:
+            continue
+        invoice_nos, item_ids, quantities, profits, invoice_dates = sorted_transaction_columns(block)
+        parts.append(build_transaction_store(invoice_nos, item_ids, quantities, profits, invoice_dates))
+        part_keys.append(_transaction_keys(block, key))
+        print(f"\r    - {rows_in:,} dòng → {sum(len(p) for p in parts):,} transactions", end="")
+    print()
+
+    store = concat_transaction_stores(*parts)
+    keys = np.concatenate(part_keys) if part_keys else np.array([], dtype=object)
+    del parts, part_keys
+
+    names, inverse, counts = np.unique(keys.astype(str), return_inverse=True, return_counts=True)
+    # tids của mỗi partition tăng dần (argsort stable): giữ thứ tự transaction
+    order = np.argsort(inverse, kind="stable")
+    groups = dict(zip(names.tolist(), np.split(order, np.cumsum(counts)[:-1])))
+    small = [name for name in groups if len(groups[name]) < min_transactions]
+    if len(small) > 1:
+        groups[OTHER_PARTITION] = np.sort(np.concatenate(
+            [groups.pop(name) for name in small] + [groups.pop(OTHER_PARTITION, np.zeros(0, dtype=np.int64))]
+        ))
+
+    # Xóa partition của lần chạy trước (có thể theo key khác)
+    if os.path.exists(os.path.join(out_dir, MANIFEST_FILE)):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    partitions = []
+    used_dirs = set()
+    for name, tids in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])):
+        slug = partition_slug(name)
+        while slug.lower() in used_dirs:
+            slug += "_"
+        used_dirs.add(slug.lower())
+        part = take_transactions(store, tids)
+        save_transaction_store(part, os.path.join(out_dir, slug))
+        partitions.append({
+            "name": name,
+            "dir": slug,
+            "transactions": len(part),
+            "entries": part.num_entries,
+        })
+
+    manifest = {"key": key_name, "partitions": partitions}
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"✓ {len(store):,} transactions → {len(partitions)} partition theo {key_name} → {out_dir}")
+    if len(small) > 1:
+        print(f"    - {len(small)} partition < {min_transactions} transactions được gom vào '{OTHER_PARTITION}'")
+    return manifest
+
+
+def load_manifest(partitions_dir=PARTITIONS_DIR):
+    with open(os.path.join(partitions_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def resolve_threshold(name, store, min_utility=None, min_utility_ratio=None, thresholds=None):
+    """
+    Ngưỡng min_utility của 1 partition
+
+    Thứ tự ưu tiên: thresholds[name] → min_utility_ratio * tổng TU của
+    partition (làm tròn) → min_utility. Ngưỡng tỉ lệ giúp partition nhỏ
+    (vd. các nước ngoài UK) vẫn có itemset thay vì dùng chung ngưỡng của UK.
+    """
+    if thresholds and name in thresholds:
+        return thresholds[name]
+    if min_utility_ratio is not None:
+        return max(1, int(round(float(np.sum(store.tu)) * min_utility_ratio)))
+    if min_utility is None:
+        raise ValueError(f"No threshold for partition '{name}': set min_utility, min_utility_ratio or thresholds")
+    return min_utility
+
+
+def _mine_partition(task):
+    """Mine + sinh luật cho 1 partition (chạy trong process con), trả về record metrics"""
+    metrics = PipelineMetrics("partitions", task["metrics_file"])
+    metrics.run_id = task["run_id"]
+    out_dir = task["output_dir"]
+    # Output cũ của partition (vd. file itemset theo ngưỡng trước đó)
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with metrics.stage(f"partition[{task['name']}]") as record:
+        store = load_transaction_store(task["store_dir"])
+        threshold = resolve_threshold(
+            task["name"], store, task["min_utility"], task["min_utility_ratio"], task["thresholds"]
+        )
+        patterns_file = os.path.join(out_dir, f"high_utility_itemsets_{threshold}.txt")
+        start = time.perf_counter()
+        itemsets = find_high_utility_itemsets_optimized(
+            store, threshold, max_size=task["max_size"], engine=task["engine"],
+            itemset_mode=task["itemset_mode"],
+        )
+        mine_seconds = time.perf_counter() - start
+        save_results(itemsets, patterns_file, load_item_mapping(task["mapping_file"]))
+
+        start = time.perf_counter()
+        rules_file = os.path.join(out_dir, "recommendation_rules.json")
+        products_file = os.path.join(out_dir, "products_with_price.csv")
+        num_rules = generate_rules(
+            patterns_file, rules_file, products_file, top_k=task["rules_top_k"],
+            artifacts_output=None, products=load_product_table(task["product_table_file"]),
+        )
+        rules_seconds = time.perf_counter() - start
+
+        record.set(
+            transactions_in=len(store),
+            min_utility=threshold,
+            itemsets=len(itemsets),
+            rules=num_rules,
+            mine_seconds=round(mine_seconds, 4),
+            rules_seconds=round(rules_seconds, 4),
+        )
+        record.read_file(task["store_dir"]).wrote_file(patterns_file, rules_file, products_file)
+
+    entry = dict(metrics.records[-1])
+    entry["partition"] = task["name"]
+    entry["patterns_file"] = patterns_file
+    entry["rules_file"] = rules_file
+    return entry
+
+
+def mine_partitions(partitions_dir=PARTITIONS_DIR, mapping_file='data/processed/item_mapping.json',
+                    product_table_file='data/processed/product_table.csv',
+                    output_dir=PARTITION_OUTPUT_DIR, min_utility=None, min_utility_ratio=None,
+                    thresholds=None, max_size=2, engine="utility_list", rules_top_k=None,
+                    workers=None, metrics_file=METRICS_FILE, itemset_mode="all"):
+    """
+    Mine HUI và sinh luật cho từng partition, các partition chạy song song
+
+    Mỗi partition có ngưỡng riêng (xem resolve_threshold) và output riêng:
+        output_dir/<slug>/high_utility_itemsets_<ngưỡng>.txt (+ _readable.txt)
+        output_dir/<slug>/recommendation_rules.json
+        output_dir/<slug>/products_with_price.csv
+    Item ID của mọi partition dùng chung item_mapping.json / product table.
+    Output của lần chạy trước trong output_dir bị xóa trước khi ghi.
+    output_dir/summary.json ghi ngưỡng, số itemset/luật và thời gian của
+    từng partition; thời gian cũng được ghi vào metrics_file (run 'partitions').
+
+    Args:
+        thresholds: Dict {tên partition: min_utility} (ghi đè ngưỡng chung)
+        itemset_mode: 'all', 'closed' hoặc 'maximal' (xem condensed_miner.py)
+        workers: Số partition mine cùng lúc (None = số CPU, 1 = tuần tự);
+            mỗi partition được mine trong 1 process
+
+    Returns:
+        List record của từng partition (theo thứ tự trong manifest)
+    """
+    manifest = load_manifest(partitions_dir)
+    partitions = manifest["partitions"]
+    metrics = PipelineMetrics("partitions", metrics_file)
+    # Manifest xếp partition lớn trước: partition lâu nhất được bắt đầu sớm nhất
+    tasks = [
+        {
+            "name": p["name"],
+            "store_dir": os.path.join(partitions_dir, p["dir"]),
+            "output_dir": os.path.join(output_dir, p["dir"]),
+            "mapping_file": mapping_file,
+            "product_table_file": product_table_file,
+            "min_utility": min_utility,
+            "min_utility_ratio": min_utility_ratio,
+            "thresholds": thresholds,
+            "max_size": max_size,
+            "engine": engine,
+            "itemset_mode": itemset_mode,
+            "rules_top_k": rules_top_k,
+            "metrics_file": metrics_file,
+            "run_id": metrics.run_id,
+        }
+        for p in partitions
+    ]
+    # Xóa output của lần chạy trước (có thể theo key khác, partition không còn)
+    if os.path.exists(os.path.join(output_dir, "summary.json")):
+        shutil.rmtree(output_dir)
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+    print(f"\n⛏ Mining {len(tasks)} partition theo {manifest['key']} ({workers} process)")
+
+    results = {}
+
+    def done(entry):
+        results[entry["partition"]] = entry
+        print(f"  ✓ {entry['partition']}: {entry['itemsets']:,} itemsets, {entry['rules']:,} luật "
+              f"({entry['wall_seconds']:.2f}s)")
+
+    if workers == 1:
+        for task in tasks:
+            done(_mine_partition(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as executor:
+            for future in as_completed([executor.submit(_mine_partition, task) for task in tasks]):
+                done(future.result())
+
+    # Record đã được process con ghi vào metrics_file, ở đây chỉ in tổng hợp
+    records = [results[task["name"]] for task in tasks]
+    metrics.records = records
+    metrics.print_summary()
+    print_partition_summary(records)
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary = {
+        "key": manifest["key"],
+        "partitions": [
+            {field: r.get(field) for field in (
+                "partition", "transactions_in", "min_utility", "itemsets", "rules",
+                "mine_seconds", "rules_seconds", "wall_seconds", "patterns_file", "rules_file",
+            )}
+            for r in records
+        ],
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"✓ Summary: {os.path.join(output_dir, 'summary.json')}")
+    return records
+
+
+def print_partition_summary(records):
+    header = f"{'Partition':<24} {'Tx':>9} {'Ngưỡng':>10} {'Itemsets':>9} {'Luật':>7} {'Mine s':>8} {'Rules s':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in records:
+        print(f"{r['partition'][:24]:<24} {r['transactions_in']:>9,} {r['min_utility']:>10,} "
+              f"{r['itemsets']:>9,} {r['rules']:>7,} {r['mine_seconds']:>8.3f} {r['rules_seconds']:>8.3f}")
+
+
+def run_partitioned(input_file='data/processed/mapped_data.csv',
+                    mapping_file='data/processed/item_mapping.json',
+                    product_table_file='data/processed/product_table.csv',
+                    key="Country", min_utility=None, min_utility_ratio=None, thresholds=None,
+                    min_transactions=0, max_size=2, engine="utility_list", workers=None,
+                    partitions_dir=PARTITIONS_DIR, output_dir=PARTITION_OUTPUT_DIR):
+    """Chia partition rồi mine từng partition (xem split_transactions, mine_partitions)"""
+    split_transactions(input_file, mapping_file, key, partitions_dir, min_transactions)
+    return mine_partitions(
+        partitions_dir, mapping_file, product_table_file, output_dir,
+        min_utility=min_utility, min_utility_ratio=min_utility_ratio, thresholds=thresholds,
+        max_size=max_size, engine=engine, workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    # Chạy từ thư mục gốc của repo (sau ingestion + cleaning)
+    run_partitioned(key="Country", min_utility_ratio=0.001, min_transactions=100)
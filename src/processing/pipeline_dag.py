@@ -0,0 +1,519 @@
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+try:
+    from .dataset_cache import file_sha256
+    from .pipeline_metrics import METRICS_FILE, PipelineMetrics
+except ImportError:
+    from dataset_cache import file_sha256
+    from pipeline_metrics import METRICS_FILE, PipelineMetrics
+
+
+CACHE_DIR = '.pipeline_cache'
+# Tăng version khi đổi cách tính key để cache cũ tự bị bỏ qua
+CACHE_VERSION = 1
+
+# Trạng thái của stage sau 1 lần chạy
+STATUS_RAN = "ran"
+STATUS_UP_TO_DATE = "up-to-date"
+STATUS_RESTORED = "restored"
+STATUS_FAILED = "failed"
+STATUS_BLOCKED = "blocked"
+
+
+class Stage:
+    """
+    1 bước của pipeline: func(**params, **options) đọc `inputs` và ghi `outputs`
+
+    Key của stage là hash của tên, version, params và nội dung các file
+    input (kể cả output của stage khác và file source code liệt kê trong
+    inputs). options không nằm trong key (vd. số worker: không làm đổi kết quả).
+    Stage phụ thuộc stage khác khi đọc output của nó, hoặc khai báo trong deps.
+
+    Args:
+        name: Tên duy nhất trong pipeline
+        func: Hàm cấp module (chạy được trong process con)
+        inputs: File/thư mục được đọc
+        outputs: File/thư mục được ghi
+        params: Tham số (JSON được) truyền cho func, nằm trong key
+        options: Tham số truyền cho func, không nằm trong key
+        deps: Tên stage phải chạy trước (ngoài các stage suy ra từ inputs)
+        version: Tăng khi đổi logic mà không đổi file input nào
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, options=None, deps=(), version=1):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = dict(params or {})
+        self.options = dict(options or {})
+        self.deps = list(deps)
+        self.version = version
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+class ArtifactCache:
+    """
+    Cache nội dung output của stage, đánh địa chỉ theo hash
+
+    - objects/<hash[:2]>/<hash>: nội dung từng file output (mỗi nội dung lưu 1 lần)
+    - keys/<stage key>.json: output của stage với key đó -> hash từng file
+    - hashes.json: hash đã tính theo (size, mtime) để không hash lại file không đổi
+
+    Output được copy vào cache (không hardlink: các stage ghi đè file tại
+    chỗ sẽ làm hỏng bản trong cache). Khi quay lại 1 cấu hình cũ, output
+    được khôi phục từ cache thay vì chạy lại stage.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.keys_dir = os.path.join(cache_dir, "keys")
+        self.hash_index_file = os.path.join(cache_dir, "hashes.json")
+        self._hash_index = None
+
+    # --- Hash nội dung ---
+
+    def _load_hash_index(self):
+        if self._hash_index is None:
+            try:
+                with open(self.hash_index_file, "r", encoding="utf-8") as f:
+                    self._hash_index = json.load(f)
+            except (OSError, ValueError):
+                self._hash_index = {}
+        return self._hash_index
+
+    def save_hash_index(self):
+        if self._hash_index is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.hash_index_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._hash_index, f)
+        os.replace(tmp_path, self.hash_index_file)
+
+    def file_hash(self, path):
+        """Hash nội dung file, dùng lại kết quả cũ nếu size và mtime không đổi"""
+        st = os.stat(path)
+        index = self._load_hash_index()
+        key = os.path.abspath(path)
+        cached = index.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = file_sha256(path)
+        index[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def path_hashes(self, path):
+        """
+        Returns:
+            Hash (file), dict {đường dẫn tương đối: hash} (thư mục), None nếu không tồn tại
+        """
+        if os.path.isdir(path):
+            hashes = {}
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    full = os.path.join(root, name)
+                    hashes[os.path.relpath(full, path).replace(os.sep, "/")] = self.file_hash(full)
+            return hashes
+        if os.path.exists(path):
+            return self.file_hash(path)
+        return None
+
+    def path_digest(self, path):
+        """1 hash cho file hoặc cả thư mục (None nếu không tồn tại)"""
+        hashes = self.path_hashes(path)
+        if hashes is None or isinstance(hashes, str):
+            return hashes
+        digest = hashlib.sha256()
+        for rel_path, file_digest in hashes.items():
+            digest.update(f"{rel_path}\0{file_digest}\n".encode("utf-8"))
+        return "dir:" + digest.hexdigest()
+
+    def stage_key(self, stage):
+        """Key của stage; None nếu còn thiếu file input"""
+        inputs = {}
+        for path in stage.inputs:
+            digest = self.path_digest(path)
+            if digest is None:
+                return None
+            inputs[path] = digest
+        payload = {
+            "cache_version": CACHE_VERSION,
+            "stage": stage.name,
+            "version": stage.version,
+            "params": stage.params,
+            "inputs": inputs,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    # --- Lưu / khôi phục output ---
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _key_path(self, key):
+        return os.path.join(self.keys_dir, key + ".json")
+
+    def lookup(self, key):
+        """Output đã lưu của key ({path: hash hoặc dict}), None nếu chưa có"""
+        try:
+            with open(self._key_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["outputs"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def outputs_match(self, outputs):
+        """Output trên đĩa có đúng nội dung đã lưu không"""
+        return all(self.path_hashes(path) == expected for path, expected in outputs.items())
+
+    def can_restore(self, outputs):
+        for expected in outputs.values():
+            digests = expected.values() if isinstance(expected, dict) else [expected]
+            if not all(os.path.exists(self._object_path(d)) for d in digests):
+                return False
+        return True
+
+    def _put_object(self, path, digest):
+        target = self._object_path(digest)
+        if os.path.exists(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+
+    def _get_object(self, digest, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".restore.tmp"
+        shutil.copyfile(self._object_path(digest), tmp_path)
+        os.replace(tmp_path, path)
+        # Ghi nhận luôn hash của file vừa khôi phục
+        st = os.stat(path)
+        self._load_hash_index()[os.path.abspath(path)] = [st.st_size, st.st_mtime_ns, digest]
+
+    def store(self, key, stage):
+        """Lưu output của stage vừa chạy xong vào cache"""
+        outputs = {}
+        for path in stage.outputs:
+            hashes = self.path_hashes(path)
+            if hashes is None:
+                raise FileNotFoundError(f"Stage '{stage.name}' did not write declared output {path}")
+            if isinstance(hashes, dict):
+                for rel_path, digest in hashes.items():
+                    self._put_object(os.path.join(path, rel_path), digest)
+            else:
+                self._put_object(path, hashes)
+            outputs[path] = hashes
+
+        os.makedirs(self.keys_dir, exist_ok=True)
+        tmp_path = self._key_path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stage": stage.name, "created": time.time(), "outputs": outputs}, f, indent=1)
+        os.replace(tmp_path, self._key_path(key))
+        return outputs
+
+    def restore(self, outputs):
+        """Ghi lại output từ cache (thư mục được thay toàn bộ)"""
+        for path, expected in outputs.items():
+            if isinstance(expected, dict):
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                for rel_path, digest in expected.items():
+                    self._get_object(digest, os.path.join(path, rel_path))
+                os.makedirs(path, exist_ok=True)
+            else:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                self._get_object(expected, path)
+
+
+def stage_dependencies(stages):
+    """
+    {tên stage: set tên stage phụ thuộc}, suy ra từ inputs/outputs và deps
+
+    Raises:
+        ValueError: trùng tên/output, deps không tồn tại hoặc có chu trình
+    """
+    by_name = {}
+    producers = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage name '{stage.name}'")
+        by_name[stage.name] = stage
+        for path in stage.outputs:
+            path = os.path.normpath(path)
+            if path in producers:
+                raise ValueError(f"Output {path} is written by both '{producers[path]}' and '{stage.name}'")
+            producers[path] = stage.name
+
+    deps = {}
+    for stage in stages:
+        found = set()
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+            found.add(dep)
+        for path in stage.inputs:
+            path = os.path.normpath(path)
+            for out_path, producer in producers.items():
+                # Input là output của stage khác, hoặc nằm trong thư mục output của nó
+                if path == out_path or path.startswith(out_path + os.sep):
+                    found.add(producer)
+        found.discard(stage.name)
+        deps[stage.name] = found
+
+    topological_order(deps)
+    return deps
+
+
+def topological_order(deps):
+    """Thứ tự chạy (giữ thứ tự khai báo khi có thể); ValueError nếu có chu trình"""
+    order = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError("Pipeline has a cycle: " + " -> ".join(path + [name]))
+        state[name] = "visiting"
+        for dep in sorted(deps[name]):
+            visit(dep, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in deps:
+        visit(name, [])
+    return order
+
+
+def select_stages(deps, targets):
+    """Các stage cần cho targets (targets + toàn bộ tổ tiên)"""
+    selected = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in deps:
+            raise ValueError(f"Unknown stage '{name}', expected one of {sorted(deps)}")
+        if name not in selected:
+            selected.add(name)
+            stack.extend(deps[name])
+    return selected
+
+
+def _describe(error):
+    return f"{type(error).__name__}: {error}"
+
+
+def _execute_stage(stage, run_id, metrics_file):
+    """Chạy 1 stage (trong process con hoặc process hiện tại), trả về record metrics"""
+    metrics = PipelineMetrics("pipeline", metrics_file)
+    metrics.run_id = run_id
+    with metrics.stage(stage.name) as record:
+        record.read_file(*stage.inputs)
+        stage.func(**stage.params, **stage.options)
+        record.wrote_file(*stage.outputs)
+    return metrics.records[-1]
+
+
+class PipelineRunner:
+    """
+    Chạy pipeline theo DAG, bỏ qua stage đã cập nhật
+
+    Với mỗi stage (khi mọi stage phụ thuộc đã xong): tính key từ params và
+    nội dung input.
+    - Output trên đĩa khớp với lần chạy trước cùng key: bỏ qua (up-to-date)
+    - Key đã từng chạy và cache còn nội dung: khôi phục output (restored)
+    - Ngược lại: chạy stage rồi lưu output vào cache
+    Vì key tính theo nội dung, stage chạy lại mà ghi ra output y hệt thì
+    các stage phía sau vẫn được bỏ qua.
+
+    Các stage độc lập (vd. EDA và mining) chạy song song trên tối đa `jobs`
+    process. Stage lỗi không dừng các nhánh khác; các stage phụ thuộc nó bị
+    đánh dấu blocked.
+    """
+
+    def __init__(self, stages, cache=None, jobs=1, metrics_file=METRICS_FILE):
+        self.stages = {stage.name: stage for stage in stages}
+        self.deps = stage_dependencies(stages)
+        self.order = topological_order(self.deps)
+        self.cache = cache or ArtifactCache()
+        self.jobs = max(1, jobs or 1)
+        # Record do process chạy stage ghi vào jsonl, ở đây chỉ gom lại để in tổng hợp
+        self.metrics = PipelineMetrics("pipeline", metrics_file)
+        self.metrics_file = metrics_file
+
+    def _check(self, stage, force):
+        """(status nếu không cần chạy hoặc None, key)"""
+        key = self.cache.stage_key(stage)
+        if key is None:
+            missing = [p for p in stage.inputs if not os.path.exists(p)]
+            raise FileNotFoundError(f"Stage '{stage.name}' is missing inputs: {missing}")
+        if force:
+            return None, key
+        outputs = self.cache.lookup(key)
+        if outputs is None:
+            return None, key
+        if self.cache.outputs_match(outputs):
+            return STATUS_UP_TO_DATE, key
+        if self.cache.can_restore(outputs):
+            self.cache.restore(outputs)
+            return STATUS_RESTORED, key
+        return None, key
+
+    def plan(self, targets=None, force=()):
+        """
+        Dự kiến stage nào sẽ chạy mà không chạy gì
+
+        Returns:
+            List (tên stage, 'run' | 'up-to-date' | 'restore' | 'run (upstream)')
+        """
+        selected = select_stages(self.deps, targets or self.order)
+        force = set(force)
+        changed = set()
+        plan = []
+        for name in self.order:
+            if name not in selected:
+                continue
+            stage = self.stages[name]
+            if name in force or "all" in force:
+                action = "run"
+            elif self.deps[name] & changed:
+                # Key phụ thuộc nội dung output upstream chưa được tạo lại
+                action = "run (upstream)"
+            else:
+                key = self.cache.stage_key(stage)
+                outputs = self.cache.lookup(key) if key is not None else None
+                if outputs is None:
+                    action = "run"
+                elif self.cache.outputs_match(outputs):
+                    action = STATUS_UP_TO_DATE
+                elif self.cache.can_restore(outputs):
+                    action = "restore"
+                else:
+                    action = "run"
+            if action != STATUS_UP_TO_DATE:
+                changed.add(name)
+            plan.append((name, action))
+        return plan
+
+    def run(self, targets=None, force=()):
+        """
+        Args:
+            targets: Tên các stage cần (None = tất cả); tự thêm các stage phụ thuộc
+            force: Tên stage luôn chạy lại ('all' = mọi stage)
+
+        Returns:
+            Dict {tên stage: {'status', 'key', 'seconds', 'error'}}
+        """
+        selected = select_stages(self.deps, targets or self.order)
+        force = set(force)
+        pending = [name for name in self.order if name in selected]
+        results = {}
+        running = {}
+        start = time.perf_counter()
+
+        executor = None
+        if self.jobs > 1:
+            executor = ProcessPoolExecutor(max_workers=self.jobs, mp_context=mp.get_context("spawn"))
+        try:
+            while pending or running:
+                # Stage có dependency lỗi -> blocked
+                for name in list(pending):
+                    failed = [d for d in self.deps[name]
+                              if results.get(d, {}).get("status") in (STATUS_FAILED, STATUS_BLOCKED)]
+                    if failed:
+                        pending.remove(name)
+                        results[name] = {"status": STATUS_BLOCKED, "key": None, "seconds": 0.0,
+                                         "error": f"upstream failed: {', '.join(sorted(failed))}"}
+                        print(f"✗ [{name}] blocked ({results[name]['error']})")
+
+                ready = [name for name in pending if all(d in results for d in self.deps[name])]
+                for name in ready:
+                    if len(running) >= self.jobs:
+                        break
+                    pending.remove(name)
+                    stage = self.stages[name]
+                    try:
+                        status, key = self._check(stage, name in force or "all" in force)
+                    except Exception as e:
+                        results[name] = {"status": STATUS_FAILED, "key": None, "seconds": 0.0, "error": _describe(e)}
+                        print(f"✗ [{name}] {_describe(e)}")
+                        continue
+                    if status is not None:
+                        results[name] = {"status": status, "key": key, "seconds": 0.0, "error": None}
+                        print(f"✓ [{name}] {status} ({key[:12]})")
+                        continue
+
+                    print(f"\n>>> [{name}] running ({key[:12]})")
+                    args = (stage, self.metrics.run_id, self.metrics_file)
+                    if executor is None:
+                        running[name] = (key, _run_inline(*args))
+                    else:
+                        running[name] = (key, executor.submit(_execute_stage, *args))
+
+                if not running:
+                    if pending and not ready:
+                        raise RuntimeError(f"Pipeline is stuck with pending stages {pending}")
+                    continue
+
+                done, _ = wait([future for _, future in running.values()], return_when=FIRST_COMPLETED)
+                for name in [n for n, (_, future) in running.items() if future in done]:
+                    key, future = running.pop(name)
+                    results[name] = self._finish(name, key, future)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self.cache.save_hash_index()
+
+        self.print_summary(results, time.perf_counter() - start)
+        return results
+
+    def _finish(self, name, key, future):
+        stage = self.stages[name]
+        try:
+            record = future.result()
+            self.metrics.records.append(record)
+            self.cache.store(key, stage)
+        except Exception as e:
+            traceback.print_exception(type(e), e, e.__traceback__)
+            print(f"✗ [{name}] failed: {_describe(e)}")
+            return {"status": STATUS_FAILED, "key": key, "seconds": 0.0, "error": _describe(e)}
+        print(f"✓ [{name}] done in {record['wall_seconds']:.2f}s")
+        return {"status": STATUS_RAN, "key": key, "seconds": record["wall_seconds"], "error": None}
+
+    def print_summary(self, results, seconds):
+        print("\n" + "=" * 60)
+        print(f"  PIPELINE ({seconds:.2f}s, {self.jobs} job(s))")
+        print("=" * 60)
+        for name in self.order:
+            if name in results:
+                r = results[name]
+                detail = f"{r['seconds']:.2f}s" if r["status"] == STATUS_RAN else (r["error"] or "")
+                print(f"  {name:<28} {r['status']:<11} {detail}")
+        if self.metrics.records:
+            self.metrics.print_summary()
+
+
+def _run_inline(*args):
+    """Chạy stage ngay trong process hiện tại, trả về Future đã xong"""
+    future = Future()
+    try:
+        future.set_result(_execute_stage(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
@@ -0,0 +1,282 @@
+import contextlib
+import datetime
+import functools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+METRICS_FILE = 'output/metrics/pipeline_metrics.jsonl'
+
+# Stage bị coi là chậm khi wall time > median các lần chạy trước * (1 + tolerance)
+SLOW_STAGE_TOLERANCE = 0.5
+SLOW_STAGE_MIN_SECONDS = 0.5
+SLOW_STAGE_HISTORY = 5
+
+COUNT_FIELDS = ("rows_in", "rows_out", "transactions_in", "transactions_out")
+
+# Số stage đang mở trong process (mọi PipelineMetrics, mọi thread): chỉ stage
+# ngoài cùng được reset peak RSS, nếu không stage trong xóa mất peak của stage ngoài
+_open_stages = {"pid": None, "depth": 0}
+_open_stages_lock = threading.Lock()
+
+
+def _read_proc(path):
+    """Đọc file dạng 'key: value' trong /proc (None nếu không có, vd. Windows/macOS)"""
+    try:
+        with open(path, "r") as f:
+            return dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+
+
+def reset_peak_rss():
+    """Reset peak RSS của process (Linux); True nếu reset được"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _enter_stage():
+    """Đánh dấu 1 stage mở; True nếu peak RSS đã được reset cho riêng stage này"""
+    with _open_stages_lock:
+        if _open_stages["pid"] != os.getpid():
+            # Process con (fork) không kế thừa stage đang mở của process cha
+            _open_stages.update(pid=os.getpid(), depth=0)
+        _open_stages["depth"] += 1
+        return _open_stages["depth"] == 1 and reset_peak_rss()
+
+
+def _exit_stage():
+    with _open_stages_lock:
+        if _open_stages["pid"] == os.getpid():
+            _open_stages["depth"] = max(_open_stages["depth"] - 1, 0)
+
+
+def peak_rss_mb():
+    """Peak RSS (MB): VmHWM trên Linux, ru_maxrss ở nơi khác, None nếu không đo được"""
+    status = _read_proc("/proc/self/status")
+    if status and "VmHWM" in status:
+        return int(status["VmHWM"].split()[0]) / 1024
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux trả KB, macOS trả byte
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return None
+
+
+def io_counters():
+    """(byte đã đọc, byte đã ghi) qua syscall của process, None nếu không có /proc/self/io"""
+    io = _read_proc("/proc/self/io")
+    if not io:
+        return None
+    return int(io["rchar"]), int(io["wchar"])
+
+
+def cpu_seconds():
+    """CPU time của process + các process con đã kết thúc (vd. worker mining)"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def path_size(path):
+    """Kích thước file, hoặc tổng các file trong thư mục"""
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(path) for name in names
+        )
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class StageRecord:
+    """Số liệu của 1 stage; code trong stage ghi thêm số dòng / file đọc ghi"""
+
+    def __init__(self, stage, **fields):
+        self.stage = stage
+        self.fields = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.set(**fields)
+
+    def set(self, **fields):
+        """Ghi số liệu: rows_in, rows_out, transactions_in, transactions_out, hoặc key tùy ý"""
+        self.fields.update({k: v for k, v in fields.items() if v is not None})
+        return self
+
+    def read_file(self, *paths):
+        self.bytes_read += sum(path_size(p) for p in paths)
+        return self
+
+    def wrote_file(self, *paths):
+        self.bytes_written += sum(path_size(p) for p in paths)
+        return self
+
+
+class PipelineMetrics:
+    """
+    Đo từng stage của pipeline: wall/CPU time, peak RSS, số dòng/transaction
+    vào-ra, số byte đọc-ghi
+
+    Mỗi stage kết thúc được ghi thành 1 dòng JSON (jsonl_file) để các lần chạy
+    sau so sánh được; print_summary() in bảng tổng hợp và cảnh báo stage chậm
+    hơn các lần chạy trước.
+
+        metrics = PipelineMetrics("main")
+        with metrics.stage("process_data") as s:
+            df = process_data(...)
+            s.set(rows_out=len(df)).read_file(input_file)
+        metrics.print_summary()
+    """
+
+    def __init__(self, run_name, jsonl_file=METRICS_FILE):
+        self.run_name = run_name
+        self.run_id = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self.jsonl_file = jsonl_file
+        self.records = []
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        record = StageRecord(name, **fields)
+        peak_is_stage = _enter_stage()
+        io_before = io_counters()
+        started_at = datetime.datetime.now().isoformat(timespec="seconds")
+        cpu_start = cpu_seconds()
+        wall_start = time.perf_counter()
+        status = "ok"
+        try:
+            yield record
+        except BaseException as e:
+            status = f"error: {type(e).__name__}"
+            raise
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = cpu_seconds() - cpu_start
+            io_after = io_counters()
+            peak = peak_rss_mb()
+            _exit_stage()
+            entry = {
+                "run": self.run_name,
+                "run_id": self.run_id,
+                "stage": name,
+                "status": status,
+                "started_at": started_at,
+                "wall_seconds": round(wall, 4),
+                "cpu_seconds": round(cpu, 4),
+                "peak_rss_mb": round(peak, 1) if peak is not None else None,
+                # False: peak của cả process (không reset được, hoặc stage lồng
+                # trong stage khác nên peak tính từ đầu stage ngoài)
+                "peak_rss_per_stage": peak_is_stage,
+                "bytes_read": record.bytes_read,
+                "bytes_written": record.bytes_written,
+            }
+            if io_before and io_after:
+                entry["io_read_bytes"] = io_after[0] - io_before[0]
+                entry["io_write_bytes"] = io_after[1] - io_before[1]
+            entry.update(record.fields)
+            self.records.append(entry)
+            self._append_jsonl(entry)
+
+    def wrap(self, name=None):
+        """Decorator: mỗi lần gọi hàm là 1 stage (mặc định tên hàm)"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _append_jsonl(self, entry):
+        if not self.jsonl_file:
+            return
+        os.makedirs(os.path.dirname(self.jsonl_file) or ".", exist_ok=True)
+        with open(self.jsonl_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def summary_table(self):
+        def fmt(value, spec):
+            return "-" if value is None else format(value, spec)
+
+        header = (f"{'Stage':<28} {'Wall s':>9} {'CPU s':>9} {'Peak MB':>9} "
+                  f"{'Rows in':>11} {'Rows out':>11} {'Tx':>9} {'MB read':>9} {'MB written':>10}")
+        lines = [header, "-" * len(header)]
+        for r in self.records:
+            tx = r.get("transactions_out", r.get("transactions_in"))
+            lines.append(
+                f"{r['stage'][:28]:<28} {r['wall_seconds']:>9.3f} {r['cpu_seconds']:>9.3f} "
+                f"{fmt(r['peak_rss_mb'], '.1f'):>9} {fmt(r.get('rows_in'), ','):>11} "
+                f"{fmt(r.get('rows_out'), ','):>11} {fmt(tx, ','):>9} "
+                f"{r['bytes_read'] / 1e6:>9.1f} {r['bytes_written'] / 1e6:>10.1f}"
+                + ("" if r["status"] == "ok" else f"  [{r['status']}]")
+            )
+        total = sum(r["wall_seconds"] for r in self.records)
+        lines.append(f"{'TOTAL':<28} {total:>9.3f}")
+        return "\n".join(lines)
+
+    def print_summary(self):
+        print("\n" + "=" * 60)
+        print(f"  PIPELINE METRICS ({self.run_name}, run {self.run_id})")
+        print("=" * 60)
+        print(self.summary_table())
+        if self.jsonl_file:
+            print(f"✓ Metrics: {self.jsonl_file}")
+            for slow in find_slow_stages(self.jsonl_file, self.run_id):
+                print(f"⚠ Stage '{slow['stage']}' chậm: {slow['wall_seconds']:.2f}s "
+                      f"(median {slow['median_seconds']:.2f}s của {slow['history']} lần trước)")
+
+
+def load_metrics(jsonl_file=METRICS_FILE):
+    """Các record đã ghi (bỏ qua dòng hỏng)"""
+    records = []
+    if not os.path.exists(jsonl_file):
+        return records
+    with open(jsonl_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def find_slow_stages(jsonl_file, run_id, tolerance=SLOW_STAGE_TOLERANCE,
+                     min_seconds=SLOW_STAGE_MIN_SECONDS, history=SLOW_STAGE_HISTORY):
+    """
+    Stage của run_id chậm hơn median `history` lần chạy thành công gần nhất
+    (cùng run name + stage) quá tolerance
+
+    Returns:
+        List dict {'stage', 'wall_seconds', 'median_seconds', 'history'}
+    """
+    records = load_metrics(jsonl_file)
+    current = [r for r in records if r.get("run_id") == run_id and r.get("status") == "ok"]
+    slow = []
+    for r in current:
+        previous = [
+            p["wall_seconds"] for p in records
+            if p.get("run") == r["run"] and p.get("stage") == r["stage"]
+            and p.get("run_id") != run_id and p.get("status") == "ok"
+        ][-history:]
+        if not previous:
+            continue
+        median = statistics.median(previous)
+        if r["wall_seconds"] > median * (1 + tolerance) and r["wall_seconds"] - median > min_seconds:
+            slow.append({
+                "stage": r["stage"],
+                "wall_seconds": r["wall_seconds"],
+                "median_seconds": median,
+                "history": len(previous),
+            })
+    return slow
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+PRODUCT_TABLE_FILE = '../../data/processed/product_table.csv'
+PRODUCT_COLUMNS = ["StockCode", "Description", "UnitPrice"]
+
+# Số dòng đọc mỗi lần khi dựng bảng từ cleaned_dataset.csv
+CSV_CHUNK_ROWS = 200_000
+
+
+def build_product_table(df):
+    """
+    Các bộ (StockCode, Description, UnitPrice) khác nhau, theo thứ tự xuất hiện
+
+    Args:
+        df: DataFrame transaction đã clean (StockCode là ID số)
+
+    Returns:
+        DataFrame product table (vài chục nghìn dòng thay vì cả dataset)
+    """
+    table = df[PRODUCT_COLUMNS].dropna(subset=["Description"]).drop_duplicates()
+    table = table.astype({"StockCode": np.int64, "Description": str, "UnitPrice": np.float64})
+    return table.reset_index(drop=True)
+
+
+def build_product_table_from_csv(csv_file, chunk_rows=CSV_CHUNK_ROWS):
+    """Dựng product table từ CSV transaction lớn, đọc theo từng chunk"""
+    parts = [
+        build_product_table(chunk)
+        for chunk in pd.read_csv(csv_file, usecols=PRODUCT_COLUMNS, chunksize=chunk_rows)
+    ]
+    if not parts:
+        return pd.DataFrame(columns=PRODUCT_COLUMNS)
+    return pd.concat(parts, ignore_index=True).drop_duplicates().reset_index(drop=True)
+
+
+def save_product_table(table, path=PRODUCT_TABLE_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table.to_csv(path, index=False, encoding="utf-8")
+
+
+class ProductTable:
+    """
+    Tra cứu item ID -> tên sản phẩm và tên -> các mức giá
+
+    Tên của 1 ID giống cách result_evaluation cũ dựng code_to_name: trong các
+    cặp (StockCode, Description) khác nhau, lấy cặp xuất hiện sau cùng.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        names = (
+            table.drop_duplicates(["StockCode", "Description"])
+            .drop_duplicates("StockCode", keep="last")
+        )
+        ids = names["StockCode"].to_numpy(dtype=np.int64)
+        size = int(ids.max()) + 1 if len(ids) else 0
+        # Mảng tra cứu theo ID; None = ID không có trong bảng
+        self._names = np.full(size, None, dtype=object)
+        self._names[ids] = names["Description"].to_numpy(dtype=object)
+
+    def names_for(self, item_ids):
+        """
+        Tên sản phẩm cho mảng item ID (mọi shape), ID lạ -> 'Unknown_<id>'
+
+        Returns:
+            Mảng object cùng shape với item_ids
+        """
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        known = (item_ids >= 0) & (item_ids < len(self._names))
+        names = np.full(item_ids.shape, None, dtype=object)
+        names[known] = self._names[item_ids[known]]
+        missing = np.frompyfunc(lambda name: name is None, 1, 1)(names).astype(bool)
+        for pos in zip(*np.nonzero(missing)):
+            names[pos] = f"Unknown_{item_ids[pos]}"
+        return names
+
+    def prices_for(self, product_names):
+        """Các cặp (Description, UnitPrice) khác nhau của các sản phẩm, theo thứ tự trong bảng"""
+        rows = self.table[self.table["Description"].isin(product_names)]
+        return rows.drop_duplicates(["Description", "UnitPrice"])[["Description", "UnitPrice"]]
+
+
+def load_product_table(path=PRODUCT_TABLE_FILE, fallback_csv=None):
+    """
+    Load product table; nếu chưa có file thì dựng từ fallback_csv
+    (cleaned_dataset.csv) và lưu lại cho lần sau
+
+    Returns:
+        ProductTable
+    """
+    if os.path.exists(path):
+        table = pd.read_csv(path, dtype={"Description": str})
+    elif fallback_csv is not None:
+        print(f"Chưa có {path}, dựng product table từ {fallback_csv}...")
+        table = build_product_table_from_csv(fallback_csv)
+        save_product_table(table, path)
+    else:
+        raise FileNotFoundError(f"Product table not found: {path}")
+    return ProductTable(table)
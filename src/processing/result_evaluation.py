@@ -1,75 +1,201 @@
-import pandas as pd
+import heapq
 import json
+from itertools import islice
 
-# LOAD DỮ LIỆU
-cleaned_df = pd.read_csv("../data/cleaned_dataset.csv")
-code_name_df = cleaned_df[["StockCode", "Description"]].drop_duplicates()
-code_to_name = code_name_df.set_index("StockCode")["Description"].to_dict()
+import numpy as np
+import pandas as pd
 
+try:
+    from .product_table import PRODUCT_TABLE_FILE, load_product_table
+    from .rule_artifacts import RULE_ARTIFACTS_DIR, write_rule_artifacts
+    from .rule_index import load_prices
+except ImportError:
+    from product_table import PRODUCT_TABLE_FILE, load_product_table
+    from rule_artifacts import RULE_ARTIFACTS_DIR, write_rule_artifacts
+    from rule_index import load_prices
 
-# Load kết quả mining
-def parse_spmf_output(filepath):
-    results = []
-    with open(filepath, "r") as f:
-        for line in f:
-            if not "#UTIL:" in line:
-                continue
 
-            # Format giả định: 1 5 12 #UTIL: 5000
-            parts = line.strip().split("#UTIL:")
-            items_str = parts[0].strip().split(" ")
-            utility = round(float(parts[1].strip().split(" #SUP: ")[0]))
+CLEANED_DATASET_FILE = "../data/cleaned_dataset.csv"
 
-            # Chuyển ID sang Tên
-            item_names = [code_to_name.get(int(i), f"Unknown_{i}") for i in items_str]
-            results.append({"items": item_names, "utility": utility})
-    return pd.DataFrame(results)
+# Số pattern xử lý mỗi lần khi sinh luật (giới hạn bộ nhớ với file pattern lớn)
+PATTERN_CHUNK_SIZE = 50_000
 
 
-def generate_rules(filepath, rules_output, products_with_price_output):
+# Load kết quả mining
+def iter_spmf_patterns(filepath):
+    """
+    Đọc file kết quả SPMF từng dòng
 
-    df_hui = parse_spmf_output(filepath)
-    # TẠO LUẬT
-    # Logic: Với tập {A, B, C}, nếu user mua {A, B} -> Gợi ý C
-    rules = []
-    product_names = set()
-    for index, row in df_hui.iterrows():
-        items = row["items"]
-        util = row["utility"]
+    Format giả định: 1 5 12 #UTIL: 5000 (có thể kèm #SUP: ...)
 
+    Yields:
+        (mảng item ID int64, utility đã làm tròn)
+    """
+    with open(filepath, "r") as f:
+        for line in f:
+            if "#UTIL:" not in line:
+                continue
+            parts = line.strip().split("#UTIL:")
+            items = np.array(parts[0].split(), dtype=np.int64)
+            utility = round(float(parts[1].strip().split(" #SUP: ")[0]))
+            yield items, utility
+
+
+def parse_spmf_output(filepath, products):
+    """
+    Toàn bộ file kết quả dạng DataFrame {'items': [tên], 'utility'}
+    (tiện để xem nhanh; sinh luật thì dùng iter_spmf_patterns)
+    """
+    results = [
+        {"items": list(products.names_for(items)), "utility": utility}
+        for items, utility in iter_spmf_patterns(filepath)
+    ]
+    return pd.DataFrame(results, columns=["items", "utility"])
+
+
+def expand_rules(patterns, products):
+    """
+    Sinh luật cho 1 nhóm pattern, xử lý theo mảng item ID
+
+    Logic: Với tập {A, B, C}, nếu user mua {A, B} -> Gợi ý C. Các pattern cùng
+    độ dài n được xếp thành ma trận (m x n); luật thứ i bỏ cột i làm món gợi ý,
+    n - 1 cột còn lại là antecedent (sort theo tên để dễ so khớp).
+
+    Args:
+        patterns: List (mảng item ID, utility)
+        products: ProductTable
+
+    Returns:
+        List dict {'input', 'suggest', 'expected_utility'} theo thứ tự pattern,
+        trong mỗi pattern theo thứ tự item
+    """
+    by_length = {}
+    for pos, (items, utility) in enumerate(patterns):
         # Chỉ xét các tập có từ 2 sản phẩm trở lên
         if len(items) >= 2:
-            # Tạo luật: Bỏ 1 phần tử ra làm phần tử gợi ý
-            for i in range(len(items)):
-                target = items[i]  # Món sẽ gợi ý
-                antecedent = items[:i] + items[i + 1 :]  # Những món khách đã chọn
+            by_length.setdefault(len(items), []).append((pos, items, utility))
+
+    keyed_rules = []
+    for n, group in by_length.items():
+        positions = np.array([pos for pos, _, _ in group], dtype=np.int64)
+        matrix = np.stack([items for _, items, _ in group])
+        utilities = [utility for _, _, utility in group]
+
+        # drop[i] = các cột còn lại khi bỏ cột i
+        drop = np.array([[j for j in range(n) if j != i] for i in range(n)])
+        suggest_names = products.names_for(matrix.reshape(-1))
+        antecedent_names = products.names_for(matrix[:, drop].reshape(-1, n - 1))
+        # Sort antecedent theo tên: đổi tên thành thứ hạng rồi argsort từng dòng
+        _, ranks = np.unique(antecedent_names.astype(str), return_inverse=True)
+        ranks = ranks.reshape(antecedent_names.shape)
+        antecedent_names = np.take_along_axis(antecedent_names, np.argsort(ranks, axis=1, kind="stable"), axis=1)
+
+        for row in range(len(suggest_names)):
+            pattern, i = divmod(row, n)
+            keyed_rules.append((
+                positions[pattern], i,
+                {
+                    "input": antecedent_names[row].tolist(),
+                    "suggest": suggest_names[row],
+                    "expected_utility": utilities[pattern],
+                },
+            ))
+
+    keyed_rules.sort(key=lambda entry: (entry[0], entry[1]))
+    return [rule for _, _, rule in keyed_rules]
+
+
+def iter_rules(filepath, products, top_k=None, chunk_size=PATTERN_CHUNK_SIZE):
+    """
+    Sinh luật từ file pattern, đọc và xử lý từng chunk pattern
+
+    Args:
+        top_k: chỉ sinh luật từ K itemset có utility cao nhất trong file
+            (chỉ giữ heap K pattern, không load cả file)
+
+    Yields:
+        Dict luật
+    """
+    patterns = iter_spmf_patterns(filepath)
+    if top_k is not None:
+        patterns = iter(heapq.nlargest(top_k, patterns, key=lambda pattern: pattern[1]))
+    while True:
+        chunk = list(islice(patterns, chunk_size))
+        if not chunk:
+            return
+        yield from expand_rules(chunk, products)
+
+
+def _format_rule(rule):
+    """
+    1 luật dạng text giống json.dump(rules, indent=4)
+
+    Encoder JSON có indent chạy bằng Python thuần (chậm), nên tự ghép text
+    và chỉ dùng json.dumps (bản C) cho từng giá trị.
+    """
+    inputs = ",\n".join("            " + json.dumps(name) for name in rule["input"])
+    inputs = "[\n" + inputs + "\n        ]" if inputs else "[]"
+    return (
+        "    {\n"
+        f'        "input": {inputs},\n'
+        f'        "suggest": {json.dumps(rule["suggest"])},\n'
+        f'        "expected_utility": {json.dumps(rule["expected_utility"])}\n'
+        "    }"
+    )
+
+
+def write_rules_json(rules, rules_output):
+    """
+    Ghi luật ra JSON (indent=4, giống json.dump cả list) theo kiểu streaming
+
+    Returns:
+        Số luật đã ghi
+    """
+    count = 0
+    with open(rules_output, "w") as f:
+        for rule in rules:
+            f.write(("[\n" if count == 0 else ",\n") + _format_rule(rule))
+            count += 1
+        f.write("\n]" if count else "[]")
+    return count
+
+
+def generate_rules(filepath, rules_output, products_with_price_output, top_k=None,
+                   artifacts_output=RULE_ARTIFACTS_DIR, products=None):
+    # top_k: chỉ sinh luật từ K itemset có utility cao nhất trong file
+    # (file từ run_experiments(top_k=...) đã là top-K nên không cần)
+    # artifacts_output: thư mục shard luật theo ID cho web (None = không ghi)
+    # products: ProductTable (mặc định load product_table.csv)
+    if products is None:
+        products = load_product_table(PRODUCT_TABLE_FILE, fallback_csv=CLEANED_DATASET_FILE)
 
-                product_names.add(target)
+    product_names = set()
+    collected = [] if artifacts_output is not None else None
+
+    def track(rules):
+        for rule in rules:
+            product_names.add(rule["suggest"])
+            if collected is not None:
+                collected.append(rule)
+            yield rule
 
-                # Lưu luật
-                rule = {
-                    "input": sorted(antecedent),  # Sort để dễ so khớp
-                    "suggest": target,
-                    "expected_utility": util,
-                }
-                rules.append(rule)
+    # Xuất file JSON cho Web App
+    num_rules = write_rules_json(track(iter_rules(filepath, products, top_k)), rules_output)
 
     # Xuất danh sách sản phẩm kèm giá
-    products_with_price = cleaned_df[
-        cleaned_df["Description"].isin(product_names)
-    ].drop_duplicates()[["Description", "UnitPrice"]]
-    products_with_price.to_csv(products_with_price_output, index=None)
+    products.prices_for(product_names).to_csv(products_with_price_output, index=None)
 
     print(len(product_names))
-    # Xuất file JSON cho Web App
-    with open(rules_output, "w") as f:
-        json.dump(rules, f, indent=4)
+    print(f"Đã tạo {num_rules} luật.")
 
-    print(f"Đã tạo {len(rules)} luật.")
+    if artifacts_output is not None:
+        write_rule_artifacts(collected, artifacts_output, load_prices(products_with_price_output))
+    return num_rules
 
 
-generate_rules(
-    filepath="../../output/patterns/high_utility_itemsets_10000.txt",
-    rules_output="../../output/recommendation_rules.json",
-    products_with_price_output="../../output/products_with_price.csv",
-)
+if __name__ == "__main__":
+    generate_rules(
+        filepath="../../output/patterns/high_utility_itemsets_10000.txt",
+        rules_output="../../output/recommendation_rules.json",
+        products_with_price_output="../../output/products_with_price.csv",
+    )
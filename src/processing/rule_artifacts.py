@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+try:
+    from .rule_index import load_prices, normalize_name
+except ImportError:
+    from rule_index import load_prices, normalize_name
+
+
+ARTIFACTS_VERSION = 1
+RULE_ARTIFACTS_DIR = '../../output/rule_artifacts'
+SHARDS_SUBDIR = 'shards'
+MANIFEST_FILE = 'manifest.json'
+HASH_LENGTH = 12
+
+
+def _encode(payload):
+    """JSON gọn (không indent, không khoảng trắng), giữ nguyên tiếng Việt/Unicode"""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_hashed(out_dir, rel_dir, stem, payload):
+    """
+    Ghi payload thành <stem>.<hash>.json và bản nén sẵn <stem>.<hash>.json.gz
+    (để static server trả thẳng khi client gửi Accept-Encoding: gzip)
+
+    Tên file chứa hash nội dung nên trình duyệt có thể cache vĩnh viễn:
+    nội dung đổi thì tên file đổi.
+
+    Returns:
+        Đường dẫn tương đối (so với out_dir) của file .json
+    """
+    data = _encode(payload)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    rel_path = f"{rel_dir}/{stem}.{digest}.json" if rel_dir else f"{stem}.{digest}.json"
+    path = os.path.join(out_dir, rel_path)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(data)
+        # mtime=0: cùng nội dung thì file .gz giống hệt nhau giữa các lần build
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        # Shard rất nhỏ nén xong còn lớn hơn: server trả thẳng file .json
+        if len(compressed) < len(data):
+            with open(path + ".gz", "wb") as f:
+                f.write(compressed)
+    return rel_path
+
+
+def build_rule_artifacts(rules, prices=None):
+    """
+    Chuyển list luật (format recommendation_rules.json) sang dạng theo ID
+
+    - products: {'names': [...], 'prices': [...]}, item ID = vị trí trong list
+    - shards: {item ID: [[utility, suggest ID, [antecedent IDs]], ...]}
+      mỗi luật nằm trong shard của item có ID nhỏ nhất trong antecedent, nên
+      web chỉ cần tải shard của các sản phẩm trong giỏ là thấy mọi luật khớp;
+      mỗi shard sắp theo expected_utility giảm dần
+
+    Args:
+        rules: List dict {'input', 'suggest', 'expected_utility'}
+        prices: Dict {tên đã normalize: giá} (xem rule_index.load_prices)
+
+    Returns:
+        (products, shards)
+    """
+    prices = prices or {}
+    names = {}
+    for rule in rules:
+        for name in list(rule["input"]) + [rule["suggest"]]:
+            names.setdefault(normalize_name(name), name)
+    ordered = sorted(names)
+    item_id = {key: i for i, key in enumerate(ordered)}
+    products = {
+        "names": [names[key] for key in ordered],
+        "prices": [prices.get(key) for key in ordered],
+    }
+
+    shards = {}
+    for rule in rules:
+        antecedent = sorted({item_id[normalize_name(name)] for name in rule["input"]})
+        if not antecedent:
+            continue
+        shards.setdefault(antecedent[0], []).append(
+            [rule["expected_utility"], item_id[normalize_name(rule["suggest"])], antecedent]
+        )
+    for entries in shards.values():
+        entries.sort(key=lambda entry: (-entry[0], entry[1], entry[2]))
+    return products, shards
+
+
+def write_rule_artifacts(rules, out_dir=RULE_ARTIFACTS_DIR, prices=None):
+    """
+    Ghi artifacts cho web: bảng sản phẩm, các shard và manifest.json
+
+    manifest.json (tên cố định, không cache lâu) được ghi sau cùng và thay thế
+    nguyên tử, nên client không bao giờ thấy manifest trỏ tới shard chưa ghi
+    xong. File của các lần build cũ không còn được tham chiếu sẽ bị xóa.
+
+    Returns:
+        Dict manifest
+    """
+    products, shards = build_rule_artifacts(rules, prices)
+    os.makedirs(os.path.join(out_dir, SHARDS_SUBDIR), exist_ok=True)
+
+    manifest = {
+        "version": ARTIFACTS_VERSION,
+        "num_rules": len(rules),
+        "products": _write_hashed(out_dir, "", "products", products),
+        "shards": {
+            str(item): _write_hashed(out_dir, SHARDS_SUBDIR, str(item), entries)
+            for item, entries in sorted(shards.items())
+        },
+    }
+
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, manifest_path)
+
+    referenced = {manifest["products"]} | set(manifest["shards"].values())
+    referenced |= {path + ".gz" for path in referenced}
+    for rel_dir in ("", SHARDS_SUBDIR):
+        for name in os.listdir(os.path.join(out_dir, rel_dir) if rel_dir else out_dir):
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if name.endswith((".json", ".json.gz")) and name != MANIFEST_FILE and rel_path not in referenced:
+                os.remove(os.path.join(out_dir, rel_path))
+
+    raw_size = gz_size = 0
+    for path in referenced:
+        if not path.endswith(".gz"):
+            raw_size += os.path.getsize(os.path.join(out_dir, path))
+            gz_path = os.path.join(out_dir, path + ".gz")
+            gz_size += os.path.getsize(gz_path if os.path.exists(gz_path) else os.path.join(out_dir, path))
+    print(f"✓ Rule artifacts: {len(shards)} shards, {len(products['names'])} products, "
+          f"{raw_size / 1024:.1f} KB ({gz_size / 1024:.1f} KB gzip) -> {out_dir}")
+    return manifest
+
+
+def build_from_files(rules_file, products_file, out_dir=RULE_ARTIFACTS_DIR):
+    """Build artifacts từ recommendation_rules.json và products_with_price.csv có sẵn"""
+    with open(rules_file, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    return write_rule_artifacts(rules, out_dir, load_prices(products_file))
+
+
+if __name__ == "__main__":
+    # python rule_artifacts.py [rules.json] [products.csv] [out_dir]
+    args = sys.argv[1:]
+    build_from_files(
+        args[0] if len(args) > 0 else "../../output/recommendation_rules.json",
+        args[1] if len(args) > 1 else "../../output/products_with_price.csv",
+        args[2] if len(args) > 2 else RULE_ARTIFACTS_DIR,
+    )
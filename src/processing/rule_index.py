@@ -0,0 +1,170 @@
+import csv
+import heapq
+import json
+import os
+import threading
+import time
+
+
+def normalize_name(name):
+    """Tên sản phẩm dùng làm key (giống cart.js: so sánh không phân biệt hoa thường)"""
+    return str(name).strip().upper()
+
+
+class RuleIndex:
+    """
+    Inverted index từ antecedent (tập sản phẩm trong giỏ) đến các luật
+
+    - rules_by_antecedent: {antecedent (tuple tên đã sort): [(utility, suggest), ...]}
+      mỗi list đã sắp theo expected_utility giảm dần
+    - anchors: {tên sản phẩm: [antecedent, ...]} mỗi antecedent chỉ được gắn
+      vào sản phẩm nhỏ nhất của nó, nên mỗi antecedent khớp giỏ hàng được
+      tìm thấy đúng 1 lần khi duyệt các sản phẩm trong giỏ
+    """
+
+    def __init__(self, rules, prices=None, version=None):
+        grouped = {}
+        display_names = {}
+        for rule in rules:
+            antecedent = tuple(sorted({normalize_name(name) for name in rule["input"]}))
+            suggest = normalize_name(rule["suggest"])
+            display_names.setdefault(suggest, rule["suggest"])
+            grouped.setdefault(antecedent, []).append((float(rule["expected_utility"]), suggest))
+
+        self.rules_by_antecedent = {}
+        self.anchors = {}
+        for antecedent, entries in grouped.items():
+            # Cùng antecedent + suggest: giữ luật có utility cao nhất
+            best = {}
+            for utility, suggest in entries:
+                if best.get(suggest, float("-inf")) < utility:
+                    best[suggest] = utility
+            self.rules_by_antecedent[antecedent] = sorted(
+                ((utility, suggest) for suggest, utility in best.items()),
+                key=lambda entry: (-entry[0], entry[1]),
+            )
+            if antecedent:
+                self.anchors.setdefault(antecedent[0], []).append(antecedent)
+
+        self.display_names = display_names
+        self.prices = prices or {}
+        self.version = version
+        self.num_rules = len(rules)
+
+    def matching_antecedents(self, cart):
+        """Các antecedent là tập con của giỏ hàng (cart: set tên đã normalize)"""
+        matches = []
+        for name in cart:
+            for antecedent in self.anchors.get(name, ()):
+                if len(antecedent) == 1 or all(item in cart for item in antecedent[1:]):
+                    matches.append(antecedent)
+        return matches
+
+    def recommend(self, cart_names, limit=6):
+        """
+        Top-N sản phẩm gợi ý cho giỏ hàng
+
+        Gộp các list luật (đã sort) của mọi antecedent khớp bằng k-way merge
+        và dừng ngay khi đủ limit sản phẩm khác nhau (không nằm trong giỏ).
+        Mỗi sản phẩm lấy luật có expected_utility cao nhất, giống cart.js.
+
+        Returns:
+            List dict {'name', 'price', 'expected_utility', 'based_on'}
+        """
+        if limit <= 0:
+            return []
+        cart = {normalize_name(name) for name in cart_names}
+        antecedents = self.matching_antecedents(cart)
+        streams = [
+            ((-utility, suggest, antecedent) for utility, suggest in self.rules_by_antecedent[antecedent])
+            for antecedent in antecedents
+        ]
+
+        results = []
+        seen = set(cart)
+        for neg_utility, suggest, antecedent in heapq.merge(*streams):
+            if suggest in seen:
+                continue
+            seen.add(suggest)
+            name = self.display_names.get(suggest, suggest)
+            results.append({
+                "name": name,
+                "price": self.prices.get(suggest),
+                "expected_utility": -neg_utility,
+                "based_on": list(antecedent),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+def load_prices(products_file):
+    """Giá sản phẩm từ products_with_price.csv ({tên đã normalize: giá})"""
+    prices = {}
+    if not products_file or not os.path.exists(products_file):
+        return prices
+    with open(products_file, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                prices.setdefault(normalize_name(row["Description"]), float(row["UnitPrice"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return prices
+
+
+def file_version(path):
+    """(mtime_ns, size) của file, None nếu không tồn tại"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_rule_index(rules_file, products_file=None):
+    with open(rules_file, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    return RuleIndex(rules, load_prices(products_file), version=file_version(rules_file))
+
+
+class ReloadingRuleIndex:
+    """
+    RuleIndex tự load lại khi file luật được publish bản mới
+
+    Mỗi lần gọi current() kiểm tra stat của file tối đa 1 lần mỗi
+    check_interval giây. Index mới được build xong rồi mới thay tham chiếu,
+    nên các request đang chạy vẫn dùng index cũ nhất quán. Nếu file mới lỗi
+    (đang ghi dở, JSON hỏng) thì giữ index cũ và thử lại lần sau.
+    """
+
+    def __init__(self, rules_file, products_file=None, check_interval=1.0):
+        self.rules_file = rules_file
+        self.products_file = products_file
+        self.check_interval = check_interval
+        self._index = load_rule_index(rules_file, products_file)
+        self._last_check = time.monotonic()
+        self._failed_version = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._last_check = now
+                version = file_version(self.rules_file)
+                if version not in (None, self._index.version, self._failed_version):
+                    self._reload(version)
+            finally:
+                self._lock.release()
+        return self._index
+
+    def _reload(self, version):
+        try:
+            index = load_rule_index(self.rules_file, self.products_file)
+        except (OSError, ValueError, KeyError) as e:
+            # Chỉ thử lại khi file thay đổi tiếp (tránh log lặp lại mỗi giây)
+            self._failed_version = version
+            print(f"⚠ Không load được {self.rules_file}, giữ bản cũ: {e}")
+            return
+        self._index = index
+        print(f"✓ Reloaded {index.num_rules:,} rules from {self.rules_file}")
@@ -0,0 +1,254 @@
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+try:
+    from .hui_miner import UTILITY_EPSILON, finalize_results, mine_high_utility_itemsets
+    from .incremental_mining import rescan_itemsets
+    from .mining_implementation import as_transaction_store, find_high_utility_itemsets_optimized, print_size_counts
+    from .transaction_store import TransactionStore, take_transactions
+except ImportError:
+    from hui_miner import UTILITY_EPSILON, finalize_results, mine_high_utility_itemsets
+    from incremental_mining import rescan_itemsets
+    from mining_implementation import as_transaction_store, find_high_utility_itemsets_optimized, print_size_counts
+    from transaction_store import TransactionStore, take_transactions
+
+
+DEFAULT_SAMPLE_FRACTION = 0.1
+DEFAULT_CONFIDENCE = 0.95
+
+# Mẫu được mine ở min_utility * LOWER_RATIO để giảm số HUI bị bỏ sót do sai số lấy mẫu
+DEFAULT_LOWER_RATIO = 0.8
+
+# Số stratum theo phân vị TU khi stratify='tu'
+TU_STRATA = 10
+MIN_STRATUM_SAMPLE = 2
+
+
+class TransactionSample:
+    """
+    Mẫu transaction (không hoàn lại, phân tầng) cùng trọng số Horvitz-Thompson
+
+    Stratum h có N_h transaction, được lấy n_h transaction; mỗi transaction
+    trong mẫu có trọng số N_h / n_h. Tổng utility có trọng số của 1 itemset
+    trên mẫu là ước lượng không chệch của utility trên toàn bộ database.
+    """
+
+    def __init__(self, store, tids, strata, population_sizes, sample_sizes):
+        self.store = store
+        self.tids = tids
+        self.strata = strata
+        self.population_sizes = population_sizes
+        self.sample_sizes = sample_sizes
+        self.weights = (population_sizes / np.maximum(sample_sizes, 1))[strata]
+
+    def __len__(self):
+        return len(self.tids)
+
+    def scaled_store(self):
+        """Store của mẫu với utilities và TU đã nhân trọng số (mine trực tiếp ra ước lượng)"""
+        store = self.store
+        entry_weights = np.repeat(self.weights, np.diff(store.offsets))
+        return TransactionStore(
+            store.offsets, store.items, store.quantities, store.profits,
+            np.asarray(store.utilities) * entry_weights, np.asarray(store.tu) * self.weights, store.dates,
+        )
+
+
+def stratify_by_tu(tu, num_strata=TU_STRATA):
+    """Nhãn stratum theo phân vị TU (transaction lớn và nhỏ đều có mặt trong mẫu)"""
+    ranks = np.empty(len(tu), dtype=np.int64)
+    ranks[np.argsort(np.asarray(tu), kind="stable")] = np.arange(len(tu))
+    return ranks * num_strata // max(len(tu), 1)
+
+
+def sample_transactions(store, sample_size, strata=None, seed=0):
+    """
+    Lấy mẫu sample_size transaction, phân bổ theo tỉ lệ kích thước stratum
+
+    Args:
+        store: TransactionStore
+        strata: Nhãn stratum của từng transaction (None = lấy mẫu ngẫu nhiên đơn giản)
+        seed: Seed (int hoặc np.random.Generator)
+
+    Returns:
+        TransactionSample
+    """
+    rng = np.random.default_rng(seed)
+    if strata is None:
+        strata = np.zeros(len(store), dtype=np.int64)
+    _, labels = np.unique(np.asarray(strata), return_inverse=True)
+    labels = labels.reshape(-1)
+    population_sizes = np.bincount(labels).astype(np.float64)
+
+    # Phân bổ theo tỉ lệ, mỗi stratum ít nhất MIN_STRATUM_SAMPLE (để ước lượng được phương sai)
+    sample_sizes = np.maximum(np.round(sample_size * population_sizes / len(store)), MIN_STRATUM_SAMPLE)
+    sample_sizes = np.minimum(sample_sizes, population_sizes)
+
+    order = np.argsort(labels, kind="stable")
+    groups = np.split(order, np.cumsum(population_sizes.astype(np.int64))[:-1])
+    tids = np.sort(np.concatenate([
+        rng.choice(group, int(n), replace=False) for group, n in zip(groups, sample_sizes)
+    ]))
+    return TransactionSample(
+        take_transactions(store, tids), tids, labels[tids], population_sizes, sample_sizes
+    )
+
+
+def estimate_utilities(sample, itemsets, confidence=DEFAULT_CONFIDENCE):
+    """
+    Ước lượng utility / support của các itemset trên toàn database kèm khoảng tin cậy
+
+    Phương sai của ước lượng phân tầng:
+        Var = Σ_h N_h² (1 - n_h/N_h) s_h² / n_h
+    với s_h² là phương sai mẫu của utility itemset trên từng transaction
+    (transaction không chứa itemset có utility 0) trong stratum h.
+
+    Returns:
+        Dict {itemset: {'utility', 'support', 'sample_support', 'std_error', 'ci_low', 'ci_high'}}
+    """
+    store = sample.store
+    items = np.asarray(store.items)
+    order = np.argsort(items, kind="stable")
+    sorted_items = items[order]
+    entry_tids = store.transaction_ids()[order]
+    entry_utils = np.asarray(store.utilities)[order]
+    # Entry của item i nằm trong [bounds[i], bounds[i + 1])
+    bounds = np.zeros(int(sorted_items[-1]) + 2 if len(sorted_items) else 1, dtype=np.int64)
+    np.cumsum(np.bincount(sorted_items), out=bounds[1:])
+
+    num_strata = len(sample.population_sizes)
+    big_n, small_n = sample.population_sizes, sample.sample_sizes
+    scale = big_n / np.maximum(small_n, 1)
+    variance_factor = np.where(
+        small_n > 1, big_n ** 2 * (1 - small_n / big_n) / (small_n * np.maximum(small_n - 1, 1)), 0.0
+    )
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    results = {}
+    for itemset in itemsets:
+        ranges = [(bounds[item], bounds[item + 1]) for item in itemset]
+        common = entry_tids[ranges[0][0]:ranges[0][1]]
+        for lo, hi in ranges[1:]:
+            common = np.intersect1d(common, entry_tids[lo:hi], assume_unique=True)
+        tx_utility = np.zeros(len(common))
+        for lo, hi in ranges:
+            tx_utility += entry_utils[lo:hi][np.searchsorted(entry_tids[lo:hi], common)]
+
+        common_strata = sample.strata[common]
+        count_h = np.bincount(common_strata, minlength=num_strata)
+        sum_h = np.bincount(common_strata, weights=tx_utility, minlength=num_strata)
+        sum_sq_h = np.bincount(common_strata, weights=tx_utility ** 2, minlength=num_strata)
+
+        estimate = float(np.dot(scale, sum_h))
+        # (n_h - 1) s_h² = Σy² - (Σy)²/n_h
+        spread_h = np.maximum(sum_sq_h - sum_h ** 2 / np.maximum(small_n, 1), 0.0)
+        std_error = float(np.sqrt(np.dot(variance_factor, spread_h)))
+        results[itemset] = {
+            'utility': estimate,
+            'support': int(round(float(np.dot(scale, count_h)))),
+            'sample_support': len(common),
+            'std_error': std_error,
+            'ci_low': max(estimate - z * std_error, 0.0),
+            'ci_high': estimate + z * std_error,
+        }
+    return results
+
+
+def find_high_utility_itemsets_approximate(transactions, min_utility, max_size=2,
+                                           sample_fraction=DEFAULT_SAMPLE_FRACTION, sample_size=None,
+                                           stratify='tu', confidence=DEFAULT_CONFIDENCE,
+                                           lower_ratio=DEFAULT_LOWER_RATIO, verify=False, exact=False,
+                                           seed=0):
+    """
+    Mine HUI gần đúng trên 1 mẫu transaction (để chọn ngưỡng nhanh)
+
+    Mẫu (ngẫu nhiên hoặc phân tầng) được mine với utility đã nhân trọng số
+    N_h / n_h ở ngưỡng min_utility * lower_ratio; mỗi itemset tìm được có
+    utility ước lượng và khoảng tin cậy (xem estimate_utilities).
+
+    Args:
+        transactions: Kết quả của parse_spmf_file hoặc TransactionStore
+        sample_fraction / sample_size: Kích thước mẫu (sample_size ưu tiên hơn)
+        stratify: 'tu' (phân tầng theo phân vị TU), None (ngẫu nhiên đơn giản)
+            hoặc mảng nhãn stratum của từng transaction (vd. Country)
+        confidence: Mức tin cậy của ci_low / ci_high
+        verify: Kiểm tra lại các candidate (ci_high >= min_utility) bằng 1 lượt
+            tính chính xác trên toàn database; kết quả là utility/support thật
+        exact: Bỏ qua lấy mẫu, gọi find_high_utility_itemsets_optimized
+
+    Returns:
+        Dict {itemset: info} như find_high_utility_itemsets_optimized. Không
+        verify: itemset có utility ước lượng >= min_utility, info gồm thêm
+        'sample_support', 'std_error', 'ci_low', 'ci_high'. Có verify: itemset
+        có utility thật >= min_utility, thêm 'estimated_utility' và 'verified'.
+        HUI không xuất hiện trong mẫu có thể bị bỏ sót (chỉ exact=True là đầy đủ).
+    """
+    if exact:
+        return find_high_utility_itemsets_optimized(transactions, min_utility, max_size=max_size)
+
+    store = as_transaction_store(transactions)
+    n = sample_size or max(1, int(round(len(store) * sample_fraction)))
+    if n >= len(store):
+        print("  • [Sample] Mẫu >= database, mine chính xác")
+        return find_high_utility_itemsets_optimized(store, min_utility, max_size=max_size)
+
+    start = time.perf_counter()
+    strata = stratify_by_tu(store.tu) if isinstance(stratify, str) and stratify == 'tu' else stratify
+    sample = sample_transactions(store, n, strata, seed)
+    print(f"  • [Sample] {len(sample):,} / {len(store):,} transactions "
+          f"({len(sample.population_sizes)} strata), mining at £{min_utility * lower_ratio:,.0f}...")
+
+    candidates = mine_high_utility_itemsets(sample.scaled_store(), min_utility * lower_ratio, max_size)
+    estimates = estimate_utilities(sample, candidates, confidence)
+    threshold = min_utility - UTILITY_EPSILON
+
+    if not verify:
+        results = {k: v for k, v in estimates.items() if v['utility'] >= threshold}
+        print(f"    - {len(results):,} itemsets ước lượng >= £{min_utility:,} "
+              f"({len(candidates):,} candidates, {time.perf_counter() - start:.2f}s)")
+    else:
+        to_check = [k for k, v in estimates.items() if v['ci_high'] >= threshold]
+        exact_values = rescan_itemsets(store, to_check)
+        results = {}
+        for itemset in to_check:
+            if exact_values[itemset]['utility'] >= threshold:
+                results[itemset] = dict(
+                    estimates[itemset],
+                    estimated_utility=estimates[itemset]['utility'],
+                    utility=exact_values[itemset]['utility'],
+                    support=exact_values[itemset]['support'],
+                    verified=True,
+                )
+        print(f"    - Verified {len(to_check):,} candidates on full database: {len(results):,} HUIs "
+              f"({time.perf_counter() - start:.2f}s)")
+
+    print_size_counts(results)
+    return finalize_results(results)
+
+
+def evaluate_approximation(approximate, exact):
+    """
+    So sánh kết quả gần đúng với kết quả chính xác
+
+    Returns:
+        Dict {'recall', 'precision', 'ci_coverage', 'mean_relative_error'}
+        (ci_coverage: tỉ lệ itemset chung có utility thật nằm trong [ci_low, ci_high])
+    """
+    common = [k for k in approximate if k in exact]
+    covered = [
+        k for k in common
+        if 'ci_low' in approximate[k] and approximate[k]['ci_low'] <= exact[k]['utility'] <= approximate[k]['ci_high']
+    ]
+    errors = [
+        abs(approximate[k].get('estimated_utility', approximate[k]['utility']) - exact[k]['utility'])
+        / exact[k]['utility']
+        for k in common if exact[k]['utility'] > 0
+    ]
+    return {
+        'recall': len(common) / len(exact) if exact else 1.0,
+        'precision': len(common) / len(approximate) if approximate else 1.0,
+        'ci_coverage': len(covered) / len(common) if common else None,
+        'mean_relative_error': float(np.mean(errors)) if errors else None,
+    }
@@ -0,0 +1,262 @@
+import mmap
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .parallel_mining import resolve_workers
+    from .transaction_store import TransactionStore, concat_transaction_stores, store_from_rows
+except ImportError:
+    from parallel_mining import resolve_workers
+    from transaction_store import TransactionStore, concat_transaction_stores, store_from_rows
+
+
+# Các format được hỗ trợ:
+# - 'quantity_profit': "item:quantity:unit_profit item:quantity:unit_profit ..." (do clean_and_filter_data ghi)
+# - 'utility': format utility chuẩn của SPMF "item item ...:TU:utility utility ..."
+SPMF_FORMATS = ('auto', 'quantity_profit', 'utility')
+
+# Kích thước mỗi chunk giao cho 1 worker (cắt tại ranh giới dòng)
+CHUNK_BYTES = 32 << 20
+
+# Số byte đầu file dùng để đoán format
+DETECT_BYTES = 1 << 16
+
+# Dòng bắt đầu bằng các ký tự này là comment / metadata của SPMF
+COMMENT_CHARS = b'#%@'
+
+_SPACE, _NEWLINE, _COLON = ord(' '), ord('\n'), ord(':')
+
+
+def detect_spmf_format(input_file, sample_bytes=DETECT_BYTES):
+    """
+    Đoán format từ các dòng đầu file
+
+    Dòng có hơn 2 dấu ':' chỉ có thể là 'quantity_profit'; dòng có đúng 2 dấu
+    ':' và có khoảng trắng trước dấu ':' đầu tiên (nhiều item) là 'utility'.
+    Dòng 1 item ('5:2:3.5') hợp lệ ở cả 2 format nên không dùng để đoán.
+    """
+    with open(input_file, 'rb') as f:
+        head = f.read(sample_bytes)
+    lines = head.split(b'\n')
+    if len(head) == sample_bytes:
+        lines = lines[:-1]  # dòng cuối có thể bị cắt
+    for line in lines:
+        line = line.strip()
+        if not line or line[:1] in COMMENT_CHARS:
+            continue
+        colons = line.count(b':')
+        if colons > 2:
+            return 'quantity_profit'
+        if colons == 2 and b' ' in line.split(b':', 1)[0].strip():
+            return 'utility'
+    return 'quantity_profit'
+
+
+def chunk_boundaries(input_file, chunk_bytes=CHUNK_BYTES):
+    """Chia file thành các đoạn [start, end) khoảng chunk_bytes, mỗi đoạn kết thúc sau 1 '\\n'"""
+    size = os.path.getsize(input_file)
+    if size == 0:
+        return []
+    bounds = []
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = start + chunk_bytes
+            if end >= size:
+                end = size
+            else:
+                newline = mm.find(b'\n', end)
+                end = size if newline == -1 else newline + 1
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def _parse_numbers(buf, expected):
+    """Đọc mọi số trong buf (phân cách bởi khoảng trắng); None nếu có token không phải số"""
+    if expected == 0:
+        return np.empty(0, dtype=np.float64)
+    with warnings.catch_warnings():
+        # Token lỗi: fromstring dừng sớm kèm DeprecationWarning, kiểm tra bằng số lượng
+        warnings.simplefilter('ignore', DeprecationWarning)
+        values = np.fromstring(buf.tobytes(), dtype=np.float64, sep=' ')
+    return values if len(values) == expected else None
+
+
+def _line_layout(buf):
+    """
+    Chỉ số dòng của từng byte và số token (cụm không phải khoảng trắng) của từng dòng
+
+    Dòng comment được xóa trắng (buf bị sửa tại chỗ).
+    """
+    is_newline = buf == _NEWLINE
+    line_of_byte = np.cumsum(is_newline) - is_newline
+    line_starts = np.concatenate(([0], np.flatnonzero(is_newline) + 1))
+    num_lines = int(line_of_byte[-1]) + 1 if len(buf) else 0
+    line_starts = line_starts[:num_lines]
+
+    comment = np.isin(buf[line_starts], np.frombuffer(COMMENT_CHARS, dtype=np.uint8))
+    if comment.any():
+        buf[np.isin(line_of_byte, np.flatnonzero(comment)) & ~is_newline] = _SPACE
+    return line_of_byte, num_lines
+
+
+def _token_counts(buf, line_of_byte, num_lines):
+    is_space = (buf == _SPACE) | (buf == _NEWLINE) | (buf == ord('\t')) | (buf == ord('\r'))
+    starts = ~is_space
+    starts[1:] &= is_space[:-1]
+    return np.bincount(line_of_byte[starts], minlength=num_lines)
+
+
+def _parse_quantity_profit(buf):
+    line_of_byte, num_lines = _line_layout(buf)
+    is_colon = buf == _COLON
+    colons = np.bincount(line_of_byte[is_colon], minlength=num_lines)
+    buf[is_colon] = _SPACE
+    numbers = _token_counts(buf, line_of_byte, num_lines)
+    # Mỗi entry "item:quantity:profit" = 2 dấu ':' và 3 số
+    if np.any(colons * 3 != numbers * 2):
+        return None
+    values = _parse_numbers(buf, int(numbers.sum()))
+    if values is None:
+        return None
+    values = values.reshape(-1, 3)
+    entries = numbers // 3
+    lengths = entries[entries > 0]
+    row_tids = np.repeat(np.arange(len(lengths)), lengths)
+    return store_from_rows(
+        row_tids, len(lengths), values[:, 0].astype(np.int64), values[:, 1].astype(np.int64), values[:, 2]
+    )
+
+
+def _parse_utility(buf):
+    line_of_byte, num_lines = _line_layout(buf)
+    is_colon = buf == _COLON
+    colons = np.bincount(line_of_byte[is_colon], minlength=num_lines)
+    # Dòng trống: 0 dấu ':'; dòng dữ liệu: đúng 2 (items : TU : utilities)
+    if np.any((colons != 0) & (colons != 2)):
+        return None
+    # Phần của từng byte trong dòng: 0 = items, 1 = TU, 2 = utilities
+    lines_before = np.concatenate(([0], np.cumsum(colons)[:-1]))
+    part = np.cumsum(is_colon) - lines_before[line_of_byte]
+    buf[is_colon] = _SPACE
+
+    tu_buf = np.where(part == 1, buf, _SPACE).astype(np.uint8)
+    tu_buf[buf == _NEWLINE] = _NEWLINE
+    buf[part == 1] = _SPACE
+
+    tu_counts = _token_counts(tu_buf, line_of_byte, num_lines)
+    numbers = _token_counts(buf, line_of_byte, num_lines)
+    data = colons == 2
+    # Mỗi dòng: k item và k utility, đúng 1 TU
+    if np.any(tu_counts[data] != 1) or np.any(numbers % 2) or np.any(numbers[~data]):
+        return None
+    tu = _parse_numbers(tu_buf, int(data.sum()))
+    values = _parse_numbers(buf, int(numbers.sum()))
+    if tu is None or values is None:
+        return None
+
+    lengths = numbers[data] // 2
+    nonempty = lengths > 0
+    tu, lengths = tu[nonempty], lengths[nonempty]
+    # Trong mỗi dòng: k số đầu là item, k số sau là utility
+    line_starts = np.concatenate(([0], np.cumsum(2 * lengths)[:-1]))
+    pos_in_line = np.arange(len(values)) - np.repeat(line_starts, 2 * lengths)
+    is_item = pos_in_line < np.repeat(lengths, 2 * lengths)
+    row_tids = np.repeat(np.arange(len(lengths)), lengths)
+    items = values[is_item].astype(np.int64)
+    # Không có quantity: quantity = 1, profit = utility của item
+    return store_from_rows(
+        row_tids, len(lengths), items, np.ones(len(items), dtype=np.int64), values[~is_item], tu=tu
+    )
+
+
+def _parse_lines_slow(text, spmf_format):
+    """
+    Đọc từng dòng (dùng khi chunk không đọc nhanh được)
+
+    Giống parse_spmf_file: token không đủ 3 phần bị bỏ qua, token có giá trị
+    không phải số gây ValueError. Format 'utility': dòng sai cấu trúc gây ValueError.
+    """
+    lengths, items, quantities, profits, tus = [], [], [], [], []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[:1] in '#%@':
+            continue
+        row = []
+        if spmf_format == 'utility':
+            parts = line.split(':')
+            line_items, line_utils = (parts[0].split(), parts[2].split()) if len(parts) == 3 else ([], [None])
+            if len(line_items) != len(line_utils):
+                raise ValueError(f"Invalid SPMF utility line: '{line}'")
+            row = [(int(i), 1, float(u)) for i, u in zip(line_items, line_utils)]
+            tu = float(parts[1])
+        else:
+            tu = 0
+            for token in line.split():
+                parts = token.split(':')
+                if len(parts) == 3:
+                    row.append((int(parts[0]), int(parts[1]), float(parts[2])))
+                    tu += int(parts[1]) * float(parts[2])
+        if row:
+            lengths.append(len(row))
+            items += [r[0] for r in row]
+            quantities += [r[1] for r in row]
+            profits += [r[2] for r in row]
+            tus.append(tu)
+    row_tids = np.repeat(np.arange(len(lengths)), lengths)
+    tu = tus if spmf_format == 'utility' else None
+    return store_from_rows(row_tids, len(lengths), items, quantities, profits, tu=tu)
+
+
+def _parse_chunk(task):
+    """Đọc đoạn [start, end) của file (chạy trong worker process)"""
+    input_file, start, end, spmf_format = task
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        buf = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start).copy()
+        parse = _parse_utility if spmf_format == 'utility' else _parse_quantity_profit
+        store = parse(buf)
+        if store is None:
+            store = _parse_lines_slow(mm[start:end].decode('utf-8'), spmf_format)
+    return store
+
+
+def read_spmf_store(input_file, spmf_format='auto', workers=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Đọc file SPMF thẳng thành TransactionStore, song song theo chunk
+
+    File được memory-map và cắt thành các chunk tại ranh giới dòng; mỗi
+    worker chuyển cả chunk sang số bằng numpy (không split/int/float từng
+    token) rồi gom thành mảng CSR. Kết quả giống
+    TransactionStore.from_transactions(parse_spmf_file(...)) với format
+    'quantity_profit'. Chunk không đọc nhanh được (token thiếu phần, số lỗi)
+    được đọc lại từng dòng với cùng quy tắc như parse_spmf_file.
+
+    Args:
+        spmf_format: 'auto' (đoán từ đầu file), 'quantity_profit' hoặc 'utility'
+            (format chuẩn "items:TU:utilities", quantity = 1, profit = utility)
+        workers: Số process (None/1 = đọc tuần tự, <= 0 = toàn bộ CPU)
+        chunk_bytes: Kích thước mỗi chunk
+
+    Returns:
+        TransactionStore
+    """
+    if spmf_format not in SPMF_FORMATS:
+        raise ValueError(f"Unknown SPMF format '{spmf_format}', expected one of {SPMF_FORMATS}")
+    if spmf_format == 'auto':
+        spmf_format = detect_spmf_format(input_file)
+
+    tasks = [(input_file, start, end, spmf_format) for start, end in chunk_boundaries(input_file, chunk_bytes)]
+    workers = 1 if workers is None else min(resolve_workers(workers), len(tasks))
+    if workers <= 1:
+        stores = [_parse_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            stores = list(executor.map(_parse_chunk, tasks))
+
+    if not stores:
+        return TransactionStore.from_transactions([])
+    return stores[0] if len(stores) == 1 else concat_transaction_stores(*stores)
@@ -0,0 +1,212 @@
+import numpy as np
+
+
+# Số dòng bitmap xử lý mỗi lần khi giao bitmap (giới hạn bộ nhớ khi unpack)
+BITMAP_BLOCK_ROWS = 512
+
+# Số bit 1 của từng giá trị byte
+_POPCOUNT = np.array([bin(v).count("1") for v in range(256)], dtype=np.uint8)
+
+
+class TidsetBackend:
+    """
+    Backend giao tid-set cho engine pairwise
+
+    Dữ liệu đầu vào là các entry của item tiềm năng, sắp theo (item, tid):
+    tid-list của item thứ i là tids[starts[i]:ends[i]], utility tương ứng
+    nằm ở utils[starts[i]:ends[i]].
+
+    Lớp con cài đặt pair_stats(i, min_utility), trả về thống kê của mọi cặp (i, j) với j > i
+    có giao khác rỗng: (js, supports, ub_utilities, utilities). Utility thật
+    chỉ bắt buộc đúng với các cặp có ub_utility >= min_utility.
+    """
+
+    name = None
+
+    def __init__(self, tids, utils, starts, ends, tu):
+        self.tids = np.asarray(tids, dtype=np.int64)
+        self.utils = np.asarray(utils, dtype=np.float64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.tu = np.asarray(tu, dtype=np.float64)
+        self.num_items = len(self.starts)
+
+
+class SetTidsetBackend(TidsetBackend):
+    """Python set + vòng lặp Python (cách làm ban đầu, giữ lại để so sánh)"""
+
+    name = "set"
+
+    def __init__(self, tids, utils, starts, ends, tu):
+        super().__init__(tids, utils, starts, ends, tu)
+        self.item_to_tids = []
+        self.item_tid_utility = []
+        for start, end in zip(self.starts.tolist(), self.ends.tolist()):
+            tid_list = self.tids[start:end].tolist()
+            self.item_to_tids.append(tid_list)
+            self.item_tid_utility.append(dict(zip(tid_list, self.utils[start:end].tolist())))
+        self.tu_list = self.tu.tolist()
+
+    def pair_stats(self, i, min_utility):
+        tids_a = set(self.item_to_tids[i])
+        util_a = self.item_tid_utility[i]
+        js, supports, ubs, utilities = [], [], [], []
+        for j in range(i + 1, self.num_items):
+            common_tids = tids_a.intersection(self.item_to_tids[j])
+            if not common_tids:
+                continue
+
+            ub_utility = 0
+            for tid in common_tids:
+                ub_utility += self.tu_list[tid]
+
+            real_utility = float("nan")
+            if ub_utility >= min_utility:
+                real_utility = 0
+                util_b = self.item_tid_utility[j]
+                for tid in common_tids:
+                    real_utility += (util_a[tid] + util_b[tid])
+
+            js.append(j)
+            supports.append(len(common_tids))
+            ubs.append(ub_utility)
+            utilities.append(real_utility)
+        return (
+            np.asarray(js, dtype=np.int64), np.asarray(supports, dtype=np.int64),
+            np.asarray(ubs, dtype=np.float64), np.asarray(utilities, dtype=np.float64),
+        )
+
+
+class DenseLookupTidsetBackend(TidsetBackend):
+    """
+    Tid-list là mảng NumPy, giao qua bảng tra cứu dày theo tid
+
+    Giao item a với mọi item b > a trong 1 lần: đánh dấu tid của a vào bảng
+    tra cứu dày (tid -> vị trí trong tid-list của a), rồi tra toàn bộ entry
+    của các item phía sau. TU và utility được cộng bằng bincount trên mảng
+    utility đã tính sẵn của từng item.
+    """
+
+    name = "dense_lookup"
+
+    def __init__(self, tids, utils, starts, ends, tu):
+        super().__init__(tids, utils, starts, ends, tu)
+        self.item_index = np.repeat(np.arange(self.num_items), self.ends - self.starts)
+        self.lookup = np.full(len(self.tu), -1, dtype=np.int64)
+
+    def pair_stats(self, i, min_utility):
+        start, end = self.starts[i], self.ends[i]
+        tids_a = self.tids[start:end]
+        self.lookup[tids_a] = np.arange(end - start)
+        try:
+            rest = slice(end, len(self.tids))
+            pos_a = self.lookup[self.tids[rest]]
+            hit = pos_a >= 0
+            js = self.item_index[rest][hit] - (i + 1)
+            common = self.tids[rest][hit]
+            width = self.num_items - i - 1
+            supports = np.bincount(js, minlength=width)
+            ubs = np.bincount(js, weights=self.tu[common], minlength=width)
+            utilities = np.bincount(
+                js, weights=self.utils[start:end][pos_a[hit]] + self.utils[rest][hit],
+                minlength=width,
+            )
+        finally:
+            self.lookup[tids_a] = -1
+
+        nz = np.flatnonzero(supports)
+        return nz + i + 1, supports[nz], ubs[nz], utilities[nz]
+
+
+class BitmapTidsetBackend(TidsetBackend):
+    """
+    Tid-list là bitmap (packbits, 1 bit / transaction)
+
+    Bitmap của a được AND với bitmap của cả khối item phía sau, đếm bit bằng
+    bảng popcount. Tổng TU và utility của a trên phần giao được tra theo từng
+    byte: bảng [vị trí byte, giá trị byte] -> tổng trọng số các bit 1 của byte
+    đó, nên không phải unpack bitmap. Utility của b lấy bằng cách thử bit của
+    a tại tid của từng entry phía sau rồi cộng bằng bincount.
+    Bitmap dày (không nén): bộ nhớ = số item x số transaction / 8 byte.
+    """
+
+    name = "bitmap"
+
+    def __init__(self, tids, utils, starts, ends, tu, block_rows=BITMAP_BLOCK_ROWS):
+        super().__init__(tids, utils, starts, ends, tu)
+        self.block_rows = block_rows
+        self.num_tx = len(self.tu)
+        self.n_bytes = (self.num_tx + 7) // 8
+        self.item_index = np.repeat(np.arange(self.num_items), self.ends - self.starts)
+        self.entry_bytes = self.tids >> 3
+        self.entry_shift = (7 - (self.tids & 7)).astype(np.uint8)
+
+        flat = np.zeros(self.num_items * self.n_bytes, dtype=np.uint8)
+        bits = (np.uint8(1) << self.entry_shift).astype(np.uint8)
+        np.bitwise_or.at(flat, self.item_index * self.n_bytes + self.entry_bytes, bits)
+        self.bitmaps = flat.reshape(self.num_items, self.n_bytes)
+
+        # byte_bits[v] = 8 bit của giá trị byte v (MSB trước, giống packbits)
+        self.byte_bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float64)
+        self.tu_table = self._byte_table(self.tu)
+        self.byte_offsets = np.arange(self.n_bytes) * 256
+
+    def _byte_table(self, weights):
+        """Bảng (n_bytes, 256): tổng weights của các transaction ứng với bit 1"""
+        padded = np.zeros(self.n_bytes * 8, dtype=np.float64)
+        padded[:len(weights)] = weights
+        return (padded.reshape(self.n_bytes, 8) @ self.byte_bits.T).ravel()
+
+    def _table_sum(self, table, rows):
+        return table[self.byte_offsets + rows].sum(axis=1)
+
+    def pair_stats(self, i, min_utility):
+        start, end = self.starts[i], self.ends[i]
+        bitmap_a = self.bitmaps[i]
+        dense_a = np.zeros(self.num_tx, dtype=np.float64)
+        dense_a[self.tids[start:end]] = self.utils[start:end]
+        util_a_table = self._byte_table(dense_a)
+
+        js, supports, ubs, utils_a = [], [], [], []
+        for block_start in range(i + 1, self.num_items, self.block_rows):
+            block = self.bitmaps[block_start:block_start + self.block_rows] & bitmap_a
+            counts = _POPCOUNT[block].sum(axis=1, dtype=np.int64)
+            nz = np.flatnonzero(counts)
+            if len(nz) == 0:
+                continue
+            rows = block[nz]
+            js.append(nz + block_start)
+            supports.append(counts[nz])
+            ubs.append(self._table_sum(self.tu_table, rows))
+            utils_a.append(self._table_sum(util_a_table, rows))
+        if not js:
+            empty = np.zeros(0, dtype=np.float64)
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), empty, empty
+
+        # Phần utility của b: entry phía sau có tid nằm trong bitmap của a
+        rest = slice(end, len(self.tids))
+        hit = (bitmap_a[self.entry_bytes[rest]] >> self.entry_shift[rest]) & 1
+        hit = hit.astype(bool)
+        width = self.num_items - i - 1
+        utils_b = np.bincount(
+            self.item_index[rest][hit] - (i + 1), weights=self.utils[rest][hit], minlength=width
+        )
+
+        js = np.concatenate(js)
+        utilities = np.concatenate(utils_a) + utils_b[js - (i + 1)]
+        return js, np.concatenate(supports), np.concatenate(ubs), utilities
+
+
+TIDSET_BACKENDS = {
+    backend.name: backend
+    for backend in (SetTidsetBackend, DenseLookupTidsetBackend, BitmapTidsetBackend)
+}
+
+
+def make_tidset_backend(name, tids, utils, starts, ends, tu):
+    """Tạo backend theo tên ('set', 'dense_lookup', 'bitmap')"""
+    if name not in TIDSET_BACKENDS:
+        raise ValueError(
+            f"Unknown tid-set backend '{name}', expected one of {tuple(TIDSET_BACKENDS)}"
+        )
+    return TIDSET_BACKENDS[name](tids, utils, starts, ends, tu)
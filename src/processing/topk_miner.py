@@ -0,0 +1,145 @@
+import heapq
+
+import numpy as np
+
+try:
+    from .hui_miner import UTILITY_EPSILON, MiningContext, MiningIndex, finalize_results, mine_item
+except ImportError:
+    from hui_miner import UTILITY_EPSILON, MiningContext, MiningIndex, finalize_results, mine_item
+
+
+class TopKContext(MiningContext):
+    """
+    MiningContext có ngưỡng tăng dần trong lúc duyệt
+
+    EUCS được lưu kèm tổng (không chỉ key) để lọc theo ngưỡng hiện tại,
+    nên pruning EUCS cũng chặt dần khi ngưỡng tăng.
+    """
+
+    def __init__(self, db, eucs, min_utility, max_size):
+        eucs_keys, eucs_totals = eucs if eucs is not None else (None, None)
+        super().__init__(db, eucs_keys, min_utility, max_size)
+        self.eucs_totals = eucs_totals
+
+    def raise_threshold(self, min_utility):
+        self.min_utility = max(self.min_utility, min_utility - UTILITY_EPSILON)
+
+    def eucs_mask(self, rank):
+        if self.eucs_keys is None:
+            return None
+        n = self.db.num_ranks
+        base = rank * n
+        lo, hi = np.searchsorted(self.eucs_keys, [base, base + n])
+        keep = self.eucs_totals[lo:hi] >= self.min_utility
+        mask = np.zeros(n, dtype=bool)
+        mask[self.eucs_keys[lo:hi][keep] - base] = True
+        return mask
+
+
+class TopKCollector:
+    """
+    Giữ K itemset có utility cao nhất bằng min-heap kích thước K
+
+    Dùng thay cho dict kết quả trong quá trình duyệt (results[itemset] = info).
+    Khi heap đủ K phần tử, utility nhỏ nhất trong heap là ngưỡng mới: mọi
+    itemset thấp hơn không thể vào top-K nên được prune luôn.
+    """
+
+    def __init__(self, k, ctx):
+        self.k = k
+        self.ctx = ctx
+        self.heap = []
+        self._seq = 0
+
+    def __setitem__(self, itemset, info):
+        # Itemset không có trong transaction nào (ngưỡng 0 khi K > số item)
+        if info['support'] == 0:
+            return
+        utility = info['utility']
+        entry = (utility, self._seq, itemset, info)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif utility > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+        else:
+            return
+        self._seq += 1
+        if len(self.heap) == self.k:
+            self.ctx.raise_threshold(self.heap[0][0])
+
+    def __len__(self):
+        return len(self.heap)
+
+    def threshold(self):
+        """Utility của itemset thứ K (None nếu chưa đủ K itemset)"""
+        return self.heap[0][0] if len(self.heap) == self.k else None
+
+    def to_dict(self):
+        return {itemset: info for _, _, itemset, info in self.heap}
+
+
+def initial_threshold(index, k):
+    """
+    Ngưỡng khởi đầu (RIU - real item utilities của TKO)
+
+    Utility thứ K lớn nhất của các item đơn: đã có K itemset đạt mức này nên
+    itemset thứ K trong kết quả cuối không thể thấp hơn.
+    """
+    item_utilities = index.item_utility[index.item_support > 0]
+    if len(item_utilities) < k:
+        return 0.0
+    return float(np.partition(item_utilities, len(item_utilities) - k)[len(item_utilities) - k])
+
+
+def mine_top_k_itemsets(store, k, max_size=None, index=None, stats=None):
+    """
+    Khai phá K High-Utility Itemsets có utility cao nhất (TKU/TKO)
+
+    Không cần min_utility: ngưỡng bắt đầu từ utility thứ K của các item đơn và
+    được nâng dần lên utility thứ K trong heap kết quả trong lúc duyệt. Các
+    item được duyệt theo TWU giảm dần để ngưỡng tăng sớm; item có TWU dưới
+    ngưỡng hiện tại bị bỏ qua.
+
+    Args:
+        store: TransactionStore
+        k: Số itemset cần lấy
+        max_size: Kích thước itemset tối đa (None = không giới hạn)
+        index: MiningIndex dùng chung (None = tạo mới)
+        stats: MinerStats (hui_found đếm cả các itemset sau đó bị đẩy khỏi heap)
+
+    Returns:
+        Dict giống mine_high_utility_itemsets, gồm đúng K itemset
+        (ít hơn nếu dữ liệu không có đủ K itemset)
+    """
+    if k <= 0:
+        raise ValueError(f"k must be positive, got {k}")
+    if index is None:
+        index = MiningIndex(store)
+
+    threshold = initial_threshold(index, k)
+    min_rank = index.min_rank(threshold)
+    db = index.database(threshold)
+    print(f"    - Top-{k}: initial threshold {threshold:,.2f}, {db.num_ranks - min_rank} promising items")
+
+    eucs = None
+    if max_size is None or max_size > 2:
+        eucs = index.eucs_totals(threshold)
+    ctx = TopKContext(db, eucs, threshold, max_size)
+    ctx.stats = stats
+    if stats is not None:
+        stats.count("items_total", db.num_ranks)
+        stats.count("items_pruned_twu", min_rank)
+    collector = TopKCollector(k, ctx)
+
+    order, bounds = db.item_order()
+    rank_twu = index.twu[db.rank_to_item]
+    for r in range(db.num_ranks - 1, min_rank - 1, -1):
+        # TWU giảm dần: từ đây trở đi không item nào đạt ngưỡng hiện tại
+        if rank_twu[r] < ctx.min_utility:
+            break
+        mine_item(db.utility_list(r, order, bounds), ctx, collector)
+
+    final = collector.threshold()
+    if final is not None:
+        print(f"    - Top-{k}: final threshold {final:,.2f}")
+    return finalize_results(collector.to_dict())
@@ -0,0 +1,404 @@
+import json
+import os
+
+import numpy as np
+
+
+STORE_VERSION = 1
+
+# Các mảng được lưu trong thư mục store (mỗi mảng là 1 file .npy)
+STORE_ARRAYS = {
+    "offsets": np.int64,     # offsets[t]..offsets[t+1] là các entry của transaction t
+    "items": np.int32,       # ID sản phẩm
+    "quantities": np.int32,  # Số lượng
+    "profits": np.float64,   # Unit_Profit (đã làm tròn 2 chữ số như file SPMF)
+    "utilities": np.float64, # quantity * profit của từng entry
+    "tu": np.float64,        # Transaction Utility của từng transaction
+}
+
+# Mảng tùy chọn (chỉ được ghi nếu store có)
+OPTIONAL_STORE_ARRAYS = {
+    "dates": "datetime64[s]",  # InvoiceDate của từng transaction
+}
+
+
+class TransactionStore:
+    """
+    Transaction database dạng CSR (Compressed Sparse Row)
+
+    Thay vì 1 dict cho mỗi transaction, toàn bộ dữ liệu được giữ trong các
+    mảng phẳng có kiểu cố định. Entry của transaction t nằm trong khoảng
+    [offsets[t], offsets[t+1]) của các mảng items/quantities/profits/utilities.
+
+    Mỗi item chỉ xuất hiện 1 lần trong 1 transaction (giữ giá trị cuối cùng,
+    giống parse_spmf_file), còn TU được tính trên toàn bộ dòng gốc.
+    dates (tùy chọn) là InvoiceDate của từng transaction.
+    """
+
+    def __init__(self, offsets, items, quantities, profits, utilities, tu, dates=None):
+        self.offsets = offsets
+        self.items = items
+        self.quantities = quantities
+        self.profits = profits
+        self.utilities = utilities
+        self.tu = tu
+        self.dates = dates
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_entries(self):
+        return len(self.items)
+
+    def transaction_ids(self):
+        """Mảng transaction ID tương ứng với từng entry"""
+        return np.repeat(
+            np.arange(len(self), dtype=np.int32), np.diff(self.offsets)
+        )
+
+    def transaction_items(self, tid):
+        """Trả về dict {item_id: (quantity, profit)} của 1 transaction"""
+        start, end = self.offsets[tid], self.offsets[tid + 1]
+        return {
+            int(item): (int(qty), float(profit))
+            for item, qty, profit in zip(
+                self.items[start:end],
+                self.quantities[start:end],
+                self.profits[start:end],
+            )
+        }
+
+    def to_transactions(self):
+        """Chuyển về dạng list dict giống kết quả của parse_spmf_file"""
+        return [
+            {"items": self.transaction_items(tid), "tu": float(self.tu[tid])}
+            for tid in range(len(self))
+        ]
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """Tạo store từ list transaction dạng {'items': {...}, 'tu': ...}"""
+        lengths = np.fromiter(
+            (len(t["items"]) for t in transactions), dtype=np.int64, count=len(transactions)
+        )
+        offsets = np.zeros(len(transactions) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        total = int(offsets[-1])
+        items = np.empty(total, dtype=np.int32)
+        quantities = np.empty(total, dtype=np.int32)
+        profits = np.empty(total, dtype=np.float64)
+        pos = 0
+        for t in transactions:
+            for item_id, (qty, profit) in t["items"].items():
+                items[pos] = item_id
+                quantities[pos] = qty
+                profits[pos] = profit
+                pos += 1
+
+        tu = np.fromiter(
+            (t["tu"] for t in transactions), dtype=np.float64, count=len(transactions)
+        )
+        utilities = quantities * profits
+        return cls(offsets, items, quantities, profits, utilities, tu)
+
+
+def round_profits(profits):
+    """
+    Làm tròn Unit_Profit về 2 chữ số đúng như khi ghi '{:.2f}' ra file SPMF
+    (np.round có thể lệch ở các giá trị biên do sai số nhị phân)
+    """
+    profits = np.asarray(profits, dtype=np.float64)
+    return np.char.mod("%.2f", profits).astype(np.float64)
+
+
+def build_transaction_store(invoice_nos, item_ids, quantities, profits, invoice_dates=None):
+    """
+    Gom các dòng (InvoiceNo, StockCode ID, Quantity, Unit_Profit) thành store CSR
+
+    Thứ tự transaction theo InvoiceNo tăng dần và thứ tự item trong transaction
+    theo thứ tự dòng gốc, giống hệt file SPMF do clean_and_filter_data ghi ra.
+
+    Args:
+        invoice_nos: Mảng InvoiceNo (dạng chuỗi)
+        item_ids: Mảng ID sản phẩm
+        quantities: Mảng Quantity
+        profits: Mảng Unit_Profit (chưa làm tròn)
+        invoice_dates: Mảng InvoiceDate (tùy chọn, lấy ngày của dòng đầu mỗi invoice)
+
+    Returns:
+        TransactionStore
+    """
+    invoice_nos = np.asarray(invoice_nos).astype(str)
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    profits = round_profits(profits)
+
+    # Sắp xếp ổn định theo InvoiceNo (giữ thứ tự dòng trong cùng 1 invoice)
+    order = np.argsort(invoice_nos, kind="stable")
+    invoice_nos = invoice_nos[order]
+    item_ids = item_ids[order]
+    quantities = quantities[order]
+    profits = profits[order]
+    if invoice_dates is not None:
+        invoice_dates = np.asarray(invoice_dates, dtype="datetime64[s]")[order]
+
+    n_rows = len(invoice_nos)
+    if n_rows == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return TransactionStore(
+            np.zeros(1, dtype=np.int64),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.int32),
+            empty, empty.copy(), empty.copy(),
+            None if invoice_dates is None else np.empty(0, dtype="datetime64[s]"),
+        )
+
+    new_tx = np.ones(n_rows, dtype=bool)
+    new_tx[1:] = invoice_nos[1:] != invoice_nos[:-1]
+    row_tids = np.cumsum(new_tx) - 1
+    n_tx = int(row_tids[-1]) + 1
+
+    return store_from_rows(
+        row_tids, n_tx, item_ids, quantities, profits,
+        dates=None if invoice_dates is None else invoice_dates[new_tx],
+    )
+
+
+def store_from_rows(row_tids, n_tx, item_ids, quantities, profits, tu=None, dates=None):
+    """
+    Gom các dòng (transaction ID, item, quantity, profit) thành store CSR
+
+    Args:
+        row_tids: Transaction ID (0..n_tx-1, không giảm) của từng dòng
+        tu: TU của từng transaction (None = tổng quantity * profit mọi dòng)
+        dates: Ngày của từng transaction (tùy chọn)
+
+    Returns:
+        TransactionStore
+    """
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    profits = np.asarray(profits, dtype=np.float64)
+    n_rows = len(item_ids)
+
+    # TU tính trên mọi dòng của invoice (kể cả item bị lặp)
+    row_utilities = quantities * profits
+    if tu is None:
+        tu = np.bincount(row_tids, weights=row_utilities, minlength=n_tx)
+
+    # Item lặp trong cùng invoice: giữ vị trí đầu tiên, giá trị của dòng cuối
+    key = row_tids * (int(item_ids.max(initial=0)) + 1) + item_ids
+    _, first_idx = np.unique(key, return_index=True)
+    _, last_rev = np.unique(key[::-1], return_index=True)
+    last_idx = n_rows - 1 - last_rev
+    keep = np.argsort(first_idx, kind="stable")
+    first_idx = first_idx[keep]
+    last_idx = last_idx[keep]
+
+    entry_tids = row_tids[first_idx]
+    offsets = np.zeros(n_tx + 1, dtype=np.int64)
+    np.cumsum(np.bincount(entry_tids, minlength=n_tx), out=offsets[1:])
+
+    return TransactionStore(
+        offsets,
+        item_ids[first_idx].astype(np.int32),
+        quantities[last_idx].astype(np.int32),
+        profits[last_idx],
+        row_utilities[last_idx],
+        np.asarray(tu, dtype=np.float64),
+        dates,
+    )
+
+
+def concat_transaction_stores(*stores):
+    """Nối nhiều store (transaction của store sau được đánh ID tiếp theo store trước)"""
+    offsets = [np.zeros(1, dtype=np.int64)]
+    base = 0
+    for store in stores:
+        offsets.append(np.asarray(store.offsets[1:], dtype=np.int64) + base)
+        base += store.num_entries
+    arrays = {
+        name: np.concatenate([np.asarray(getattr(store, name), dtype=dtype) for store in stores])
+        for name, dtype in STORE_ARRAYS.items() if name != "offsets"
+    }
+    if all(store.dates is not None for store in stores):
+        arrays["dates"] = np.concatenate([np.asarray(store.dates) for store in stores])
+    return TransactionStore(np.concatenate(offsets), **arrays)
+
+
+def take_transactions(store, tids):
+    """Store con gồm các transaction tids (giữ thứ tự, đánh lại ID từ 0)"""
+    tids = np.asarray(tids, dtype=np.int64)
+    offsets = np.asarray(store.offsets)
+    lengths = offsets[tids + 1] - offsets[tids]
+    new_offsets = np.zeros(len(tids) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    entries = np.repeat(offsets[tids] - new_offsets[:-1], lengths) + np.arange(int(new_offsets[-1]))
+    return TransactionStore(
+        new_offsets,
+        np.asarray(store.items)[entries],
+        np.asarray(store.quantities)[entries],
+        np.asarray(store.profits)[entries],
+        np.asarray(store.utilities)[entries],
+        np.asarray(store.tu)[tids],
+        None if store.dates is None else np.asarray(store.dates)[tids],
+    )
+
+
+def slice_transactions(store, start, stop=None):
+    """
+    Store con gồm các transaction liên tiếp [start, stop) (đánh lại ID từ 0)
+
+    Các mảng entry là view của store gốc (không copy), chỉ offsets được tạo mới.
+    """
+    stop = len(store) if stop is None else stop
+    offsets = np.asarray(store.offsets[start:stop + 1], dtype=np.int64)
+    lo, hi = int(offsets[0]), int(offsets[-1])
+    return TransactionStore(
+        offsets - lo,
+        store.items[lo:hi],
+        store.quantities[lo:hi],
+        store.profits[lo:hi],
+        store.utilities[lo:hi],
+        store.tu[start:stop],
+        None if store.dates is None else store.dates[start:stop],
+    )
+
+
+def save_transaction_store(store, store_dir):
+    """Ghi store ra thư mục (mỗi mảng 1 file .npy + meta.json)"""
+    os.makedirs(store_dir, exist_ok=True)
+    for name, dtype in STORE_ARRAYS.items():
+        np.save(
+            os.path.join(store_dir, f"{name}.npy"),
+            np.ascontiguousarray(getattr(store, name), dtype=dtype),
+        )
+    for name, dtype in OPTIONAL_STORE_ARRAYS.items():
+        path = os.path.join(store_dir, f"{name}.npy")
+        if getattr(store, name) is not None:
+            np.save(path, np.ascontiguousarray(getattr(store, name), dtype=dtype))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    _write_meta(store_dir, len(store), store.num_entries)
+
+
+def _write_meta(store_dir, num_transactions, num_entries):
+    meta = {
+        "version": STORE_VERSION,
+        "num_transactions": num_transactions,
+        "num_entries": num_entries,
+    }
+    with open(os.path.join(store_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+class TransactionStoreWriter:
+    """
+    Ghi store theo từng phần mà không giữ cả store trong RAM
+
+    Mỗi mảng được nối vào 1 file nhị phân tạm; close() chuyển sang .npy theo
+    từng block và ghi meta.json, nên thư mục load được bằng
+    load_transaction_store giống store do save_transaction_store ghi.
+
+        writer = TransactionStoreWriter(store_dir)
+        for part in parts:
+            writer.append(build_transaction_store(...))
+        writer.close()
+    """
+
+    COPY_BLOCK = 1 << 22
+
+    def __init__(self, store_dir):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.num_transactions = 0
+        self.num_entries = 0
+        self.has_dates = None
+        self._files = {}
+        self._counts = {}
+        self._write("offsets", np.zeros(1, dtype=np.int64))
+
+    def _dtype(self, name):
+        return np.dtype(STORE_ARRAYS[name] if name in STORE_ARRAYS else OPTIONAL_STORE_ARRAYS[name])
+
+    def _write(self, name, values):
+        if name not in self._files:
+            self._files[name] = open(os.path.join(self.store_dir, f"{name}.npy.part"), "wb")
+            self._counts[name] = 0
+        values = np.ascontiguousarray(values, dtype=self._dtype(name))
+        values.tofile(self._files[name])
+        self._counts[name] += len(values)
+
+    def append(self, store):
+        """Nối các transaction của store vào sau các transaction đã ghi"""
+        has_dates = store.dates is not None
+        if self.has_dates is None:
+            self.has_dates = has_dates
+        elif has_dates != self.has_dates:
+            raise ValueError("All appended stores must either have dates or not")
+        self._write("offsets", np.asarray(store.offsets[1:], dtype=np.int64) + self.num_entries)
+        for name in STORE_ARRAYS:
+            if name != "offsets":
+                self._write(name, getattr(store, name))
+        if has_dates:
+            self._write("dates", store.dates)
+        self.num_transactions += len(store)
+        self.num_entries += store.num_entries
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        for name, count in self._counts.items():
+            part_path = os.path.join(self.store_dir, f"{name}.npy.part")
+            dtype = self._dtype(name)
+            out = np.lib.format.open_memmap(
+                os.path.join(self.store_dir, f"{name}.npy"), mode="w+", dtype=dtype, shape=(count,)
+            )
+            if count:
+                part = np.memmap(part_path, dtype=dtype, mode="r", shape=(count,))
+                for start in range(0, count, self.COPY_BLOCK):
+                    out[start:start + self.COPY_BLOCK] = part[start:start + self.COPY_BLOCK]
+                del part
+            out.flush()
+            del out
+            os.remove(part_path)
+        if not self.has_dates:
+            for name in OPTIONAL_STORE_ARRAYS:
+                path = os.path.join(self.store_dir, f"{name}.npy")
+                if os.path.exists(path):
+                    os.remove(path)
+        _write_meta(self.store_dir, self.num_transactions, self.num_entries)
+
+
+def load_transaction_store(store_dir, mmap=True):
+    """
+    Load store từ thư mục
+
+    Args:
+        store_dir: Thư mục chứa các file .npy
+        mmap: True để memory-map (không đọc toàn bộ vào RAM)
+
+    Returns:
+        TransactionStore
+    """
+    with open(os.path.join(store_dir, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != STORE_VERSION:
+        raise ValueError(
+            f"Transaction store version {meta.get('version')} không được hỗ trợ "
+            f"(cần version {STORE_VERSION}): {store_dir}"
+        )
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in STORE_ARRAYS
+    }
+    for name in OPTIONAL_STORE_ARRAYS:
+        path = os.path.join(store_dir, f"{name}.npy")
+        if os.path.exists(path):
+            arrays[name] = np.load(path, mmap_mode=mmap_mode)
+    return TransactionStore(**arrays)
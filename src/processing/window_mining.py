@@ -0,0 +1,121 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .transaction_store import load_transaction_store, slice_transactions, take_transactions
+    from .incremental_mining import (
+        DEFAULT_LOWER_RATIO, apply_batch, build_incremental_state, compare_with_full_mine, expire_batch,
+    )
+except ImportError:
+    from transaction_store import load_transaction_store, slice_transactions, take_transactions
+    from incremental_mining import (
+        DEFAULT_LOWER_RATIO, apply_batch, build_incremental_state, compare_with_full_mine, expire_batch,
+    )
+
+
+TRANSACTION_STORE_DIR = 'data/processed/transaction_store'
+
+
+def split_into_panes(store, pane="1h"):
+    """
+    Chia store thành các pane thời gian theo InvoiceDate
+
+    Args:
+        store: TransactionStore có dates
+        pane: Độ dài 1 pane (chuỗi pandas Timedelta, ví dụ '1h', '1D')
+
+    Returns:
+        List (pane_start, TransactionStore) theo thời gian tăng dần (bỏ pane rỗng)
+    """
+    if store.dates is None:
+        raise ValueError("Transaction store has no InvoiceDate, re-run clean_and_filter_data")
+    pane_seconds = int(pd.Timedelta(pane).total_seconds())
+    seconds = np.asarray(store.dates, dtype="datetime64[s]").astype(np.int64)
+    pane_ids = seconds // pane_seconds
+    order = np.argsort(pane_ids, kind="stable")
+    bounds = np.flatnonzero(np.diff(pane_ids[order])) + 1
+    panes = []
+    for tids in np.split(order, bounds):
+        if len(tids) == 0:
+            continue
+        start = np.datetime64(int(pane_ids[tids[0]]) * pane_seconds, "s")
+        panes.append((start, take_transactions(store, tids)))
+    return panes
+
+
+class SlidingWindowMiner:
+    """
+    Mine HUI trên cửa sổ thời gian trượt (ví dụ 30 ngày gần nhất)
+
+    Transaction được gom theo pane (ví dụ 1 giờ). Khi thêm 1 pane mới, pane
+    mới được áp dụng như 1 batch của incremental miner, các pane đã ra khỏi
+    cửa sổ được trừ đi; không phải mine lại toàn bộ cửa sổ.
+
+    state.store luôn là các pane trong cửa sổ nối theo thứ tự nên chỉ cần
+    nhớ số transaction của từng pane: mỗi pane chỉ copy cửa sổ 1 lần
+    (apply_batch), pane bị bỏ và phần còn lại là view cắt từ state.store.
+    """
+
+    def __init__(self, min_utility, window="30D", max_size=2, lower_ratio=DEFAULT_LOWER_RATIO):
+        self.min_utility = min_utility
+        self.window = np.timedelta64(int(pd.Timedelta(window).total_seconds()), "s")
+        self.max_size = max_size
+        self.lower_ratio = lower_ratio
+        # (pane_start, số transaction, batch index trong state; None = pane lúc tạo state)
+        self.panes = deque()
+        self.state = None
+
+    def window_store(self):
+        return self.state.store if self.state is not None else None
+
+    def add_pane(self, pane_start, store):
+        """
+        Thêm 1 pane và bỏ các pane có pane_start <= pane_start mới - window
+
+        Returns:
+            Dict HUI của cửa sổ hiện tại
+        """
+        pane_start = np.datetime64(pane_start, "s")
+        if self.panes and pane_start <= self.panes[-1][0]:
+            raise ValueError(f"Pane {pane_start} is not newer than the last pane {self.panes[-1][0]}")
+
+        if self.state is None:
+            self.panes.append((pane_start, len(store), None))
+            self.state = build_incremental_state(store, self.min_utility, self.max_size, self.lower_ratio)
+        else:
+            self.panes.append((pane_start, len(store), self.state.batches))
+            self.state = apply_batch(self.state, store, self.lower_ratio)
+
+        while self.panes[0][0] <= pane_start - self.window:
+            _, size, batch_index = self.panes.popleft()
+            expired = slice_transactions(self.state.store, 0, size)
+            remaining = slice_transactions(self.state.store, size)
+            expire_batch(self.state, expired, remaining, batch_index)
+        return self.high_utility_itemsets()
+
+    def high_utility_itemsets(self):
+        if self.state is None:
+            return {}
+        return self.state.high_utility_itemsets()
+
+    def verify(self):
+        """So sánh HUI của cửa sổ với mine lại toàn bộ cửa sổ (list itemset lệch)"""
+        return compare_with_full_mine(self.state)
+
+
+def mine_recent_window(min_utility, window="30D", pane="1h", max_size=2,
+                       store_dir=TRANSACTION_STORE_DIR):
+    """
+    Replay toàn bộ transaction store qua cửa sổ trượt, trả về miner ở cuối
+    lịch sử (HUI của khoảng window gần nhất). Sau đó có thể gọi
+    miner.add_pane() cho mỗi pane mới.
+    """
+    store = load_transaction_store(store_dir, mmap=False)
+    miner = SlidingWindowMiner(min_utility, window=window, max_size=max_size)
+    panes = split_into_panes(store, pane)
+    for pane_start, pane_store in panes:
+        miner.add_pane(pane_start, pane_store)
+    print(f"✓ Window {window}: {len(miner.panes)} panes, {len(miner.high_utility_itemsets())} HUIs")
+    return miner
@@ -1,39 +1,380 @@
 #!/usr/bin/env python3
 """
-Simple HTTP Server for Product Recommendation Web Demo
+HTTP Server for Product Recommendation Web Demo
 Run this file to start the web server
+
+Phục vụ web/ và output/ cho nhiều client cùng lúc (mỗi kết nối 1 thread):
+- Nén gzip / brotli: dùng file nén sẵn cạnh file gốc (.gz / .br, vd. của
+  rule_artifacts) nếu có, nếu không thì nén 1 lần và giữ trong RAM
+- ETag + If-None-Match / If-Modified-Since: file không đổi thì trả 304
+- Cache-Control: file có hash nội dung trong tên được cache vĩnh viễn,
+  file khác luôn được trình duyệt kiểm tra lại (rẻ nhờ 304)
+- Range request (tải 1 phần / tải tiếp)
+
+    python start_server.py                          # mở trình duyệt
+    python start_server.py --headless --port 8080   # không mở trình duyệt (server, CI)
 """
 
+import argparse
+import datetime
+import email.utils
+import gzip
 import http.server
-import socketserver
-import webbrowser
+import mimetypes
 import os
+import re
+import threading
+import webbrowser
+from io import BytesIO
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:  # brotli không bắt buộc: chỉ nén gzip (file .br có sẵn vẫn được dùng)
+    brotli = None
+
 # Configuration
 PORT = 8000
 DIRECTORY = Path(__file__).parent
+START_PAGE = "/web/index.html"
+
+# Thứ tự ưu tiên khi client nhận nhiều encoding: (tên, đuôi file nén sẵn)
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+# File nhỏ hơn không đáng nén, file lớn hơn MAX_COMPRESS_BYTES chỉ dùng bản nén sẵn
+MIN_COMPRESS_BYTES = 1024
+MAX_COMPRESS_BYTES = 64 << 20
+# Tổng dung lượng bản nén giữ trong RAM
+COMPRESSION_CACHE_BYTES = 128 << 20
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Tên file có hash nội dung (<stem>.<12 hex>.json của rule_artifacts): nội dung không bao giờ đổi
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+
+# Thư mục được nén trước khi nhận request (--precompress)
+PRECOMPRESS_DIRS = ("web", "output")
+
+
+def compress(data, encoding):
+    if encoding == "gzip":
+        # mtime=0: cùng nội dung thì cùng bản nén
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def available_encodings():
+    return [name for name, _ in ENCODINGS if name != "br" or brotli is not None]
+
+
+class CompressionCache:
+    """
+    Bản nén của các file, dùng chung giữa các thread
+
+    Key theo (đường dẫn, encoding), kèm (mtime, size) của file gốc: file bị
+    ghi lại thì bản cũ tự bị bỏ. Vượt max_bytes thì bỏ các bản nén cũ nhất.
+    """
+
+    def __init__(self, max_bytes=COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, encoding, stat):
+        key = (path, encoding)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+        # Nén ngoài lock: các file khác vẫn được phục vụ trong lúc nén
+        with open(path, "rb") as f:
+            data = compress(f.read(), encoding)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old[1])
+            self._entries[key] = (version, data)
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted = self._entries.pop(next(iter(self._entries)))
+                self.total_bytes -= len(evicted[1])
+        return data
+
+
+class FileSlice:
+    """File chỉ đọc được length byte bắt đầu từ offset (body của response 206)"""
+
+    def __init__(self, f, offset, length):
+        f.seek(offset)
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def parse_accept_encoding(header):
+    """Các encoding client nhận (q > 0)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    Range "bytes=a-b" / "bytes=a-" / "bytes=-n"
+
+    Returns:
+        (start, end) (end tính cả), None nếu header không dùng được (trả cả
+        file), hoặc False nếu khoảng nằm ngoài file (416)
+    """
+    unit, _, spec = (header or "").partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            suffix = int(last)
+            # "bytes=-0": 0 byte cuối, không thỏa được
+            if suffix == 0:
+                return False
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+    if start > end and last:
+        return None
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+def etag_matches(header, etag):
+    """If-None-Match: so sánh yếu (bỏ W/), '*' khớp mọi ETag"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
 
 class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive: trình duyệt tải nhiều file trên cùng 1 kết nối
+    protocol_version = "HTTP/1.1"
+    # Header và body được ghi 2 lần; tắt Nagle để không bị delayed ACK giữ lại ~40ms
+    disable_nagle_algorithm = True
+    server_version = "RecommendationStatic/1.0"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(DIRECTORY), **kwargs)
 
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = next((os.path.join(path, name) for name in ("index.html", "index.htm")
+                          if os.path.isfile(os.path.join(path, name))), None)
+            if index is None or not self.path.split("?", 1)[0].endswith("/"):
+                # Redirect thêm "/" hoặc liệt kê thư mục như SimpleHTTPRequestHandler
+                return super().send_head()
+            path = index
+        if not os.path.isfile(path):
+            # 404 (kể cả "file/" có dấu / thừa)
+            return super().send_head()
+        stat = os.stat(path)
+
+        ctype = self.guess_type(path)
+        compressible = ctype.startswith(COMPRESSIBLE_TYPES)
+        validator = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        encoding, source = self.select_encoding(path, stat, compressible)
+        etag = f'"{validator}-{encoding}"' if encoding else f'"{validator}"'
+
+        if self.not_modified(etag, stat):
+            self.send_response(304)
+            self.send_cache_headers(path, etag, stat, compressible)
+            self.end_headers()
+            return None
+
+        if encoding:
+            if isinstance(source, bytes):
+                body, length = BytesIO(source), len(source)
+            else:
+                body, length = open(source, "rb"), os.path.getsize(source)
+            self.send_response(200)
+            self.send_header("Content-Encoding", encoding)
+        else:
+            body, length = self.open_identity(path, stat.st_size, etag, stat)
+            if body is None:
+                return None
+
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(length))
+        self.send_cache_headers(path, etag, stat, compressible)
+        self.end_headers()
+        return body
+
+    def select_encoding(self, path, stat, compressible):
+        """
+        Chọn bản nén cho request
+
+        Returns:
+            (encoding, nguồn): nguồn là đường dẫn file nén sẵn hoặc bytes;
+            (None, None) = trả file gốc (request có Range luôn nhận file gốc)
+        """
+        if "Range" in self.headers:
+            return None, None
+        accepted = parse_accept_encoding(self.headers.get("Accept-Encoding"))
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            sidecar = path + suffix
+            try:
+                if os.stat(sidecar).st_mtime_ns >= stat.st_mtime_ns:
+                    return encoding, sidecar
+            except OSError:
+                pass
+            if (compressible and MIN_COMPRESS_BYTES <= stat.st_size <= MAX_COMPRESS_BYTES
+                    and encoding in available_encodings()):
+                return encoding, self.server.compression_cache.get(path, encoding, stat)
+        return None, None
+
+    def not_modified(self, etag, stat):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=datetime.timezone.utc)
+            return int(stat.st_mtime) <= since.timestamp()
+        return False
+
+    def open_identity(self, path, size, etag, stat):
+        """Mở file gốc, gửi status 200 / 206 / 416 theo header Range"""
+        byte_range = parse_range(self.headers.get("Range"), size) if "Range" in self.headers else None
+        if_range = self.headers.get("If-Range")
+        if byte_range is not None and if_range and if_range.strip() != etag:
+            # If-Range khác phiên bản hiện tại: gửi lại cả file
+            byte_range = None
+        if byte_range is False:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None, 0
+
+        f = open(path, "rb")
+        if byte_range is None:
+            self.send_response(200)
+            return f, size
+        start, end = byte_range
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        return FileSlice(f, start, end - start + 1), end - start + 1
+
+    def send_cache_headers(self, path, etag, stat, compressible):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(stat.st_mtime))
+        self.send_header("Cache-Control", CACHE_IMMUTABLE if HASHED_NAME.search(path) else CACHE_REVALIDATE)
+        self.send_header("Accept-Ranges", "bytes")
+        if compressible:
+            self.send_header("Vary", "Accept-Encoding")
+
+
+class StaticServer(http.server.ThreadingHTTPServer):
+    # 1 client chậm chỉ giữ 1 thread, không chặn các client khác
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, quiet=False):
+        super().__init__(address, MyHTTPRequestHandler)
+        self.quiet = quiet
+        self.compression_cache = CompressionCache()
+
+
+def precompress(server, dirs=PRECOMPRESS_DIRS):
+    """Nén trước các file nén được trong dirs (request đầu tiên không phải chờ nén)"""
+    count = 0
+    for rel_dir in dirs:
+        for root, _, files in os.walk(DIRECTORY / rel_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith((".gz", ".br")):
+                    continue
+                stat = os.stat(path)
+                ctype = mimetypes.guess_type(path)[0] or ""
+                if not ctype.startswith(COMPRESSIBLE_TYPES) or not MIN_COMPRESS_BYTES <= stat.st_size <= MAX_COMPRESS_BYTES:
+                    continue
+                compressed = False
+                for encoding, suffix in ENCODINGS:
+                    if encoding in available_encodings() and not os.path.exists(path + suffix):
+                        server.compression_cache.get(path, encoding, stat)
+                        compressed = True
+                count += compressed
+    return count
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Static server for the web demo (web/ + output/)")
+    parser.add_argument("--host", default="")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--headless", action="store_true", help="Không tự mở trình duyệt")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Nén trước các file trong web/ và output/ khi khởi động")
+    parser.add_argument("--quiet", action="store_true", help="Không log từng request")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🛍️  Product Recommendation Web Demo Server")
     print("=" * 60)
     print(f"📂 Serving directory: {DIRECTORY}")
-    print(f"🌐 Server running at: http://localhost:{PORT}")
-    print(f"📱 Open in browser: http://localhost:{PORT}/web/index.html")
-    print("=" * 60)
-    print("Press Ctrl+C to stop the server")
-    print("=" * 60)
-    
-    # Start server
-    with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
+    print(f"🌐 Server running at: http://localhost:{args.port}")
+    print(f"📱 Open in browser: http://localhost:{args.port}{START_PAGE}")
+    print(f"🗜️  Compression: {', '.join(available_encodings())} (+ file .gz/.br có sẵn)")
+
+    with StaticServer((args.host, args.port), quiet=args.quiet) as httpd:
+        if args.precompress:
+            count = precompress(httpd)
+            print(f"🗜️  Precompressed {count} files ({httpd.compression_cache.total_bytes / 1024:.1f} KB)")
+        print("=" * 60)
+        print("Press Ctrl+C to stop the server")
+        print("=" * 60)
         try:
-            # Auto-open browser
-            webbrowser.open(f'http://localhost:{PORT}/web/index.html')
+            if not args.headless:
+                webbrowser.open(f'http://localhost:{args.port}{START_PAGE}')
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n\n✅ Server stopped. Goodbye!")
@@ -0,0 +1,48 @@
+import os
+import sys
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "processing"))
+sys.path.insert(0, os.path.join(ROOT, "src", "benchmarks"))
+
+from synthetic_data import generate_online_retail
+from transaction_store import build_transaction_store
+
+
+def synthetic_store(n_rows, seed=0, profit_ratio=0.1, **kwargs):
+    """
+    TransactionStore từ dataset tổng hợp (bỏ invoice hủy / giá 0 như bước
+    làm sạch, StockCode -> ID theo thứ tự xuất hiện)
+    """
+    df = generate_online_retail(n_rows, seed=seed, **kwargs)
+    df = df[(df["Quantity"] > 0) & (df["UnitPrice"] > 0)]
+    item_ids = pd.factorize(df["StockCode"])[0]
+    return build_transaction_store(
+        df["InvoiceNo"].to_numpy(), item_ids, df["Quantity"].to_numpy(),
+        df["UnitPrice"].to_numpy() * profit_ratio, df["InvoiceDate"].to_numpy(),
+    )
+
+
+def assert_stores_equal(a, b):
+    for name in ("offsets", "items", "quantities", "profits", "utilities", "tu"):
+        np.testing.assert_array_equal(np.asarray(getattr(a, name)), np.asarray(getattr(b, name)), err_msg=name)
+
+
+def brute_force_itemsets(store, max_size):
+    """Utility/support của mọi itemset (kích thước <= max_size) có trong ít nhất 1 transaction"""
+    offsets = np.asarray(store.offsets)
+    items, utilities = np.asarray(store.items), np.asarray(store.utilities)
+    results = {}
+    for t in range(len(store)):
+        lo, hi = offsets[t], offsets[t + 1]
+        entries = dict(zip(items[lo:hi].tolist(), utilities[lo:hi].tolist()))
+        for size in range(1, max_size + 1):
+            for itemset in combinations(sorted(entries), size):
+                info = results.setdefault(itemset, {'utility': 0.0, 'support': 0})
+                info['utility'] += sum(entries[item] for item in itemset)
+                info['support'] += 1
+    return results
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import assert_stores_equal
+from data_cleaning import clean_and_filter_data
+from synthetic_data import generate_online_retail
+from transaction_store import load_transaction_store
+
+CHUNK_ROWS = 97
+
+
+@pytest.fixture
+def mapped_data(tmp_path):
+    """
+    mapped_data.csv nhỏ (StockCode đã là ID, có Unit_Profit) + item_mapping.json,
+    kèm 1 invoice hủy và 1 mã hàng đặc biệt
+    """
+    df = generate_online_retail(2_000, seed=3)
+    df.loc[df.index[:4], "InvoiceNo"] = "C" + df["InvoiceNo"].iloc[0]
+    df.loc[df.index[10], "StockCode"] = "POST"
+    codes, uniques = pd.factorize(df["StockCode"])
+    df["StockCode"] = codes
+    df["Unit_Profit"] = (df["UnitPrice"] * 0.1).round(2)
+    mapping_file = tmp_path / "item_mapping.json"
+    mapping_file.write_text(json.dumps({code: i for i, code in enumerate(uniques)}), encoding="utf-8")
+    return df, str(mapping_file)
+
+
+def clean(tmp_path, df, mapping_file, name, chunk_rows):
+    input_file = tmp_path / f"{name}.csv"
+    df.to_csv(input_file, index=False)
+    out = tmp_path / name
+    stats = clean_and_filter_data(
+        str(input_file), mapping_file, str(out) + "_spmf.txt", str(out), None,
+        return_df=False, chunk_rows=chunk_rows,
+    )
+    with open(str(out) + "_spmf.txt", "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return stats, lines, load_transaction_store(str(out), mmap=False)
+
+
+def test_chunked_matches_full_read(tmp_path, mapped_data, capsys):
+    df, mapping_file = mapped_data
+    full = clean(tmp_path, df, mapping_file, "full", None)
+    chunked = clean(tmp_path, df, mapping_file, "chunked", CHUNK_ROWS)
+
+    assert chunked[0] == full[0]
+    assert chunked[1] == full[1]
+    assert_stores_equal(chunked[2], full[2])
+    np.testing.assert_array_equal(chunked[2].dates, full[2].dates)
+    assert "⚠" not in capsys.readouterr().out
+
+
+def test_chunked_keeps_file_order_of_unsorted_invoice(tmp_path, mapped_data, capsys):
+    # Như invoice 'A563185' của dataset gốc: InvoiceNo không theo thứ tự nhưng
+    # các dòng vẫn liền nhau, nên chỉ thứ tự transaction khác bản đọc cả file
+    df, mapping_file = mapped_data
+    invoices = df["InvoiceNo"].unique()
+    df.loc[df["InvoiceNo"] == invoices[len(invoices) // 2], "InvoiceNo"] = "A563185"
+    full = clean(tmp_path, df, mapping_file, "full", None)
+    chunked = clean(tmp_path, df, mapping_file, "chunked", CHUNK_ROWS)
+
+    assert chunked[0] == full[0]
+    assert chunked[1] != full[1]
+    assert sorted(chunked[1]) == sorted(full[1])
+    assert full[1][-1] in chunked[1]
+    assert "⚠" not in capsys.readouterr().out
+
+
+def test_chunked_warns_on_split_invoice(tmp_path, mapped_data, capsys):
+    df, mapping_file = mapped_data
+    # Invoice đầu tiên xuất hiện lại ở cuối file, cách nhiều chunk
+    df = pd.concat([df, df[df["InvoiceNo"] == df["InvoiceNo"].iloc[20]]], ignore_index=True)
+    full = clean(tmp_path, df, mapping_file, "full", None)
+    chunked = clean(tmp_path, df, mapping_file, "chunked", CHUNK_ROWS)
+
+    assert chunked[0]["transactions"] == full[0]["transactions"] + 1
+    assert "⚠" in capsys.readouterr().out
@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import brute_force_itemsets, synthetic_store
+from mining_implementation import find_high_utility_itemsets_optimized
+from transaction_store import TransactionStore
+
+
+def tx(*items):
+    return {'items': {item: (1, 1.0) for item in items}, 'tu': float(len(items))}
+
+
+def assert_same_itemsets(result, expected):
+    assert set(result) == set(expected)
+    for itemset, info in expected.items():
+        assert result[itemset]['support'] == info['support'], itemset
+        assert result[itemset]['utility'] == pytest.approx(info['utility']), itemset
+
+
+def test_zero_threshold_has_no_phantom_itemsets():
+    # min_utility = 0: rank không có transaction chung với prefix (support 0)
+    # vẫn đạt utility >= 0 nhưng không phải itemset
+    store = TransactionStore.from_transactions([tx(1, 2), tx(2, 3), tx(1, 3)])
+    expected = brute_force_itemsets(store, 2)
+    for engine in ("utility_list", "pairwise"):
+        assert_same_itemsets(find_high_utility_itemsets_optimized(store, 0, max_size=2, engine=engine), expected)
+
+
+@pytest.mark.parametrize("max_size", [2, 3])
+def test_zero_threshold_matches_brute_force(max_size):
+    store = synthetic_store(300, seed=4, n_items=15, mean_basket=4)
+    expected = brute_force_itemsets(store, max_size)
+    result = find_high_utility_itemsets_optimized(store, 0, max_size=max_size)
+    assert_same_itemsets(result, expected)
+    if max_size == 2:
+        assert_same_itemsets(find_high_utility_itemsets_optimized(store, 0, max_size=2, engine="pairwise"), expected)
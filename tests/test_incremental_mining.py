@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+import incremental_mining
+from conftest import assert_stores_equal, synthetic_store
+from hui_miner import compute_twu
+from incremental_mining import (
+    apply_batch, build_incremental_state, compare_with_full_mine, load_incremental_state,
+    save_incremental_state,
+)
+from transaction_store import TransactionStore, take_transactions
+
+MIN_UTILITY = 150
+BASE_TRANSACTIONS = 450
+BATCH_TRANSACTIONS = 60
+
+
+@pytest.fixture(scope="module")
+def store():
+    return synthetic_store(6_000, seed=1, mean_basket=6)
+
+
+@pytest.fixture
+def repairs(monkeypatch):
+    """Đếm số lần repair_item / rescan_itemsets được gọi trong apply_batch"""
+    calls = {"repair_item": 0, "rescan_itemsets": 0}
+    for name in calls:
+        original = getattr(incremental_mining, name)
+
+        def counted(*args, _name=name, _original=original, **kwargs):
+            calls[_name] += 1
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(incremental_mining, name, counted)
+    return calls
+
+
+def slices(store, start, size):
+    """Các batch liên tiếp (size transaction) từ start đến hết store"""
+    return [take_transactions(store, np.arange(lo, min(lo + size, len(store))))
+            for lo in range(start, len(store), size)]
+
+
+def hot_batch(state, copies=5):
+    """
+    Batch đẩy 1 item có TWU thấp (chưa nằm trong state) vượt min_utility:
+    apply_batch phải sửa item đó bằng repair_item
+    """
+    twu, _, support = compute_twu(state.store)
+    item, partner = np.flatnonzero((support > 0) & (twu < state.lower_utility))[:2].tolist()
+    profit = 1.0
+    quantity = int(state.min_utility / copies) + 1
+    items = {item: (quantity, profit), partner: (1, profit)}
+    return [{'items': items, 'tu': quantity * profit + profit} for _ in range(copies)]
+
+
+def test_repair_restores_invariant(repairs):
+    # (1, 2) bị loại ở từng batch (TWU batch + slack < min_utility) nhưng TWU
+    # tích lũy vượt lower_utility; khi slack của item 1 vượt min_utility,
+    # repair_item phải thêm (1, 2) vào state, nếu không batch cuối sẽ bỏ sót HUI này
+    def tx(*entries):
+        items = {item: (1, float(profit)) for item, profit in entries}
+        return {'items': items, 'tu': float(sum(profit for _, profit in entries))}
+
+    filler = [tx((3, 1)) for _ in range(10)]
+    state = build_incremental_state(TransactionStore.from_transactions(
+        [tx((1, 10), (2, 10)), tx((1, 40))] + filler), 100, 2)
+    for batch in ([tx((1, 20), (2, 20))], [tx((1, 30))], [tx((1, 20), (2, 25))]):
+        state = apply_batch(state, batch)
+        assert compare_with_full_mine(state) == []
+    assert repairs["repair_item"] >= 1
+    assert state.high_utility_itemsets()[(1, 2)]['utility'] == pytest.approx(105)
+
+
+@pytest.mark.parametrize("max_size", [2, 3])
+def test_batches_match_full_mine(store, repairs, max_size):
+    state = build_incremental_state(take_transactions(store, np.arange(BASE_TRANSACTIONS)), MIN_UTILITY, max_size)
+    assert compare_with_full_mine(state) == []
+
+    for i, batch in enumerate(slices(store, BASE_TRANSACTIONS, BATCH_TRANSACTIONS)):
+        state = apply_batch(state, batch)
+        assert compare_with_full_mine(state) == [], f"batch {i}"
+        if i == 0:
+            state = apply_batch(state, hot_batch(state))
+            assert repairs["repair_item"] > 0
+            assert compare_with_full_mine(state) == [], "hot batch"
+
+    assert repairs["rescan_itemsets"] > 0
+    assert len(state.store) == len(store) + 5
+    assert state.high_utility_itemsets()
+
+
+def test_save_load_round_trip(store, tmp_path):
+    state = build_incremental_state(take_transactions(store, np.arange(BASE_TRANSACTIONS)), MIN_UTILITY, 3)
+    batches = slices(store, BASE_TRANSACTIONS, BATCH_TRANSACTIONS)
+    state = apply_batch(state, batches[0])
+
+    save_incremental_state(state, str(tmp_path))
+    loaded = load_incremental_state(str(tmp_path))
+
+    assert_stores_equal(loaded.store, state.store)
+    assert loaded.itemsets == state.itemsets
+    np.testing.assert_array_equal(loaded.item_slack, state.item_slack)
+    np.testing.assert_array_equal(loaded.item_reset, state.item_reset)
+    assert (loaded.min_utility, loaded.max_size, loaded.lower_utility, loaded.batches) == \
+        (state.min_utility, state.max_size, state.lower_utility, state.batches)
+
+    # State đọc lại tiếp tục cập nhật được như state gốc
+    for batch in batches[1:3]:
+        state = apply_batch(state, batch)
+        loaded = apply_batch(loaded, batch)
+        assert loaded.itemsets == state.itemsets
+    assert compare_with_full_mine(loaded) == []
+
+
+def test_load_rejects_other_version(store, tmp_path):
+    state = build_incremental_state(take_transactions(store, np.arange(100)), MIN_UTILITY, 2)
+    save_incremental_state(state, str(tmp_path))
+    meta_file = tmp_path / "meta.json"
+    meta_file.write_text(meta_file.read_text(encoding="utf-8").replace('"version": 1', '"version": 0'),
+                         encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_incremental_state(str(tmp_path))
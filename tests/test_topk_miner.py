@@ -0,0 +1,28 @@
+import pytest
+
+from conftest import brute_force_itemsets, synthetic_store
+from mining_implementation import find_high_utility_itemsets_optimized
+
+
+@pytest.mark.parametrize("max_size", [2, 3])
+def test_k_larger_than_itemsets_returns_all_real_itemsets(max_size):
+    # K > số item: ngưỡng khởi đầu 0, không được lấy itemset có support 0
+    store = synthetic_store(300, seed=4, n_items=15, mean_basket=4)
+    expected = brute_force_itemsets(store, max_size)
+    result = find_high_utility_itemsets_optimized(store, None, max_size=max_size, top_k=len(expected) + 50)
+    assert set(result) == set(expected)
+    for itemset, info in result.items():
+        assert info['support'] == expected[itemset]['support'] > 0, itemset
+        assert info['utility'] == pytest.approx(expected[itemset]['utility']), itemset
+
+
+def test_top_k_matches_brute_force():
+    store = synthetic_store(300, seed=4, n_items=15, mean_basket=4)
+    expected = brute_force_itemsets(store, 3)
+    k = 25
+    result = find_high_utility_itemsets_optimized(store, None, max_size=3, top_k=k)
+    assert len(result) == k
+    kth = sorted((info['utility'] for info in expected.values()), reverse=True)[k - 1]
+    for itemset, info in result.items():
+        assert info['utility'] == pytest.approx(expected[itemset]['utility']), itemset
+        assert info['utility'] >= kth - 1e-6
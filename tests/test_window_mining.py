@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import incremental_mining
+from conftest import assert_stores_equal, synthetic_store
+from transaction_store import TransactionStore, concat_transaction_stores, slice_transactions
+from window_mining import SlidingWindowMiner, split_into_panes
+
+MIN_UTILITY = 100
+
+
+@pytest.fixture(scope="module")
+def panes():
+    return split_into_panes(synthetic_store(6_000, seed=1, mean_basket=6), "7D")
+
+
+def test_slice_transactions(panes):
+    store = concat_transaction_stores(*(pane for _, pane in panes[:3]))
+    first = len(panes[0][1])
+    assert_stores_equal(slice_transactions(store, 0, first), panes[0][1])
+    assert_stores_equal(slice_transactions(store, first),
+                        concat_transaction_stores(panes[1][1], panes[2][1]))
+
+
+@pytest.mark.parametrize("max_size", [2, 3])
+def test_window_matches_full_mine(panes, max_size):
+    miner = SlidingWindowMiner(MIN_UTILITY, window="60D", max_size=max_size)
+    for i, (pane_start, pane) in enumerate(panes):
+        miner.add_pane(pane_start, pane)
+        assert miner.verify() == [], f"pane {i}"
+
+        # state.store luôn là các pane trong cửa sổ
+        assert len(miner.window_store()) == sum(size for _, size, _ in miner.panes)
+        window = concat_transaction_stores(*(store for _, store in panes[i + 1 - len(miner.panes):i + 1]))
+        assert_stores_equal(miner.window_store(), window)
+    assert len(miner.panes) < len(panes)
+
+
+def test_expired_panes_leave_slack(monkeypatch):
+    # Mỗi pane cộng 11 (TWU) vào slack của item 1, cửa sổ giữ 2 pane (3 pane
+    # trong lúc áp dụng pane mới): slack không vượt lower_utility + 33 <
+    # min_utility nên không bao giờ phải repair_item (nếu pane hết hạn không
+    # được trừ thì slack tăng mãi và repair lặp lại)
+    calls = []
+    original = incremental_mining.repair_item
+    monkeypatch.setattr(incremental_mining, "repair_item",
+                        lambda state, item: calls.append(item) or original(state, item))
+
+    def pane(day):
+        txs = [{'items': {1: (1, 10.0), 2: (1, 1.0)}, 'tu': 11.0}]
+        txs += [{'items': {3: (1, 1.0)}, 'tu': 1.0} for _ in range(3)]
+        return np.datetime64("2011-01-01") + np.timedelta64(day, "D"), TransactionStore.from_transactions(txs)
+
+    miner = SlidingWindowMiner(100, window="2D", max_size=2)
+    for day in range(10):
+        miner.add_pane(*pane(day))
+        assert len(miner.panes) <= 2
+        assert miner.state.item_slack[1] <= miner.state.lower_utility + 22 + 1e-6
+        assert miner.verify() == []
+    assert calls == []
@@ -46,11 +46,11 @@ function displayCart() {
     displayRecommendations(cart);
 }
 
-function displayRecommendations(cart) {
+async function displayRecommendations(cart) {
     const recommendationsSection = document.getElementById('recommendations-section');
     const recommendationsGrid = document.getElementById('recommendations-grid');
     
-    const recommendedRules = getRecommendationsForCart(cart);
+    const recommendedRules = await getRecommendationsForCart(cart);
     
     if (recommendedRules.length === 0) {
         recommendationsSection.style.display = 'none';
@@ -61,14 +61,18 @@ function displayRecommendations(cart) {
     
     // Get product details for recommendations
     const recommendedProducts = recommendedRules.map(rule => {
-        // Find product in allProducts
-        const product = allProducts.find(p => 
-            p.name.toUpperCase() === rule.suggest.toUpperCase()
-        );
+        // Price comes with shard rules, otherwise find product in allProducts
+        let price = rule.price;
+        if (price === undefined || price === null) {
+            const product = allProducts.find(p => 
+                p.name.toUpperCase() === rule.suggest.toUpperCase()
+            );
+            price = product ? product.price : 0;
+        }
         
         return {
             name: rule.suggest,
-            price: product ? product.price : 0,
+            price: price,
             expectedUtility: rule.expected_utility,
             basedOn: rule.input
         };
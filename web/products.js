@@ -39,8 +39,36 @@ async function loadProducts() {
     }
 }
 
-// Load recommendation rules from JSON
+// ID-based rule artifacts (built by src/processing/rule_artifacts.py):
+// manifest.json -> shared name/price table + one rule shard per item
+const RULE_ARTIFACTS_DIR = '../output/rule_artifacts/';
+let ruleManifest = null;
+let ruleProducts = null;
+let ruleProductIds = new Map();
+const ruleShards = new Map();
+
+async function fetchJson(url, options) {
+    const response = await fetch(url, options);
+    if (!response.ok) {
+        throw new Error(`${url}: HTTP ${response.status}`);
+    }
+    return response.json();
+}
+
+// Load recommendation rules (manifest + product table, shards are loaded per cart)
 async function loadRecommendations() {
+    try {
+        // manifest.json has a fixed name so always revalidate it; every other
+        // file has a content hash in its name and can be cached for good
+        ruleManifest = await fetchJson(RULE_ARTIFACTS_DIR + 'manifest.json', { cache: 'no-cache' });
+        ruleProducts = await fetchJson(RULE_ARTIFACTS_DIR + ruleManifest.products);
+        ruleProductIds = new Map(ruleProducts.names.map((name, id) => [name.toUpperCase(), id]));
+        return ruleManifest;
+    } catch (error) {
+        // Artifacts not built yet: use the full JSON file as before
+        console.warn('Rule artifacts not available, falling back to recommendation_rules.json:', error);
+        ruleManifest = null;
+    }
     try {
         const response = await fetch('../output/recommendation_rules.json');
         recommendations = await response.json();
@@ -51,6 +79,56 @@ async function loadRecommendations() {
     }
 }
 
+// Load the rule shards of the items currently in the cart
+async function loadRulesForCart(cart) {
+    if (!ruleManifest || !cart) {
+        return;
+    }
+    const pending = [];
+    cart.forEach(product => {
+        const id = ruleProductIds.get(product.name.toUpperCase());
+        const path = id === undefined ? undefined : ruleManifest.shards[id];
+        if (path === undefined || ruleShards.has(id)) {
+            return;
+        }
+        const shard = fetchJson(RULE_ARTIFACTS_DIR + path).catch(error => {
+            console.error('Error loading rule shard:', error);
+            ruleShards.delete(id);
+            return [];
+        });
+        ruleShards.set(id, shard);
+        pending.push(shard);
+    });
+    await Promise.all(pending);
+}
+
+// Matching rules from the loaded shards, in the same format as recommendation_rules.json
+async function getShardRulesForCart(cart) {
+    const cartIds = new Set();
+    cart.forEach(product => {
+        const id = ruleProductIds.get(product.name.toUpperCase());
+        if (id !== undefined) {
+            cartIds.add(id);
+        }
+    });
+
+    const rules = [];
+    for (const id of cartIds) {
+        const shard = ruleShards.has(id) ? await ruleShards.get(id) : [];
+        shard.forEach(([utility, suggest, antecedent]) => {
+            if (antecedent.every(item => cartIds.has(item))) {
+                rules.push({
+                    input: antecedent.map(item => ruleProducts.names[item]),
+                    suggest: ruleProducts.names[suggest],
+                    expected_utility: utility,
+                    price: ruleProducts.prices[suggest]
+                });
+            }
+        });
+    }
+    return rules;
+}
+
 // Get unique products (remove duplicates)
 function getUniqueProducts(products) {
     const uniqueMap = new Map();
@@ -109,8 +187,8 @@ function updateCartCount() {
 }
 
 // Get recommendations based on cart items
-function getRecommendationsForCart(cart) {
-    if (!cart || cart.length === 0 || !recommendations || recommendations.length === 0) {
+async function getRecommendationsForCart(cart) {
+    if (!cart || cart.length === 0) {
         return [];
     }
     
@@ -118,12 +196,21 @@ function getRecommendationsForCart(cart) {
     const cartProductNames = cart.map(p => p.name.toUpperCase());
     
     // Find matching rules
-    const matchingRules = recommendations.filter(rule => {
-        // Check if all items in rule.input are in cart
-        return rule.input.every(inputItem => 
-            cartProductNames.includes(inputItem.toUpperCase())
-        );
-    });
+    let matchingRules;
+    if (ruleManifest) {
+        await loadRulesForCart(cart);
+        matchingRules = await getShardRulesForCart(cart);
+    } else {
+        if (!recommendations || recommendations.length === 0) {
+            return [];
+        }
+        matchingRules = recommendations.filter(rule => {
+            // Check if all items in rule.input are in cart
+            return rule.input.every(inputItem => 
+                cartProductNames.includes(inputItem.toUpperCase())
+            );
+        });
+    }
     
     // Sort by expected_utility and get unique suggestions
     const suggestions = new Map();